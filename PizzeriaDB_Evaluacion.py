@@ -1,6 +1,42 @@
 # -*- coding: utf-8 -*-
-import pyodbc
-from datetime import datetime
+import argparse
+import asyncio
+import bisect
+import builtins
+import calendar
+import csv
+import hashlib
+import heapq
+import json
+import math
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+try:
+    import numpy as np
+except ImportError:  # La analítica en memoria es opcional
+    np = None
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # La exportación a Parquet/Arrow es opcional
+    pa = pq = None
+try:
+    import pyodbc
+except ImportError:  # Sin driver ODBC solo queda disponible el backend SQLite
+    pyodbc = None
 # --- CONFIGURACIÓN DE LA CONEXIÓN ---
 
 SERVER_NAME = 'WIN-170IUCRPJ9H\SQLEXPRESS'
@@ -13,458 +49,4285 @@ conn_str = (
     f"Trusted_Connection=yes;"
 )
 
+# Backend a utilizar: 'sqlserver' (producción) o 'sqlite' (pruebas y benchmarks locales)
+DB_BACKEND = os.environ.get('PIZZERIA_BACKEND', 'sqlserver')
+SQLITE_PATH = os.environ.get('PIZZERIA_SQLITE_PATH', 'PizzeriaDB.sqlite3')
+# Latencia de red simulada por viaje al servidor en el backend SQLite (para benchmarks realistas)
+SQLITE_LATENCY_MS = float(os.environ.get('PIZZERIA_SQLITE_LATENCY_MS', '0'))
+# Conexión de reportes (consultas, volcados, analítica): réplica de lectura o la misma base en solo lectura
+REPORTING_ENABLED = os.environ.get('PIZZERIA_REPORTING', '1') != '0'
+REPORTING_CONN_STR = os.environ.get('PIZZERIA_REPORTING_CONN_STR') or (conn_str + "ApplicationIntent=ReadOnly;")
+REPORTING_SQLITE_PATH = os.environ.get('PIZZERIA_REPORTING_SQLITE_PATH')
+# Archivo histórico: base aparte para las tablas *_Archivo (vacío = misma base), antigüedad por defecto
+# y si los reportes incluyen los pedidos archivados
+ARCHIVE_DB = os.environ.get('PIZZERIA_ARCHIVE_DB', '')
+ARCHIVE_RETENTION_DAYS = int(os.environ.get('PIZZERIA_ARCHIVE_RETENTION_DAYS', '730'))
+REPORTS_INCLUDE_ARCHIVE = os.environ.get('PIZZERIA_REPORTS_ARCHIVE', '0') == '1'
+# Pool de conexiones: tamaño, espera máxima al pedir una conexión y reintentos al reconectar
+POOL_SIZE = int(os.environ.get('PIZZERIA_POOL_SIZE', '4'))
+POOL_TIMEOUT = float(os.environ.get('PIZZERIA_POOL_TIMEOUT', '30'))
+POOL_HEALTH_CHECK_SECONDS = float(os.environ.get('PIZZERIA_POOL_HEALTH_CHECK', '30'))
+POOL_CONNECT_RETRIES = int(os.environ.get('PIZZERIA_POOL_RETRIES', '5'))
+# Segundos que el catálogo de pizzas e ingredientes se usa sin verificar cambios de otras terminales
+CATALOG_TTL = float(os.environ.get('PIZZERIA_CATALOG_TTL', '300'))
+# Filas que se piden al servidor en cada fetchmany y filas por página al mostrar tablas
+FETCH_SIZE = int(os.environ.get('PIZZERIA_FETCH_SIZE', '500'))
+PAGE_SIZE = int(os.environ.get('PIZZERIA_PAGE_SIZE', '50'))
+MAX_COLUMN_WIDTH = 40
+# Búsqueda de clientes: máximo de coincidencias y uso del índice en memoria (prefijos y trigramas)
+CLIENT_SEARCH_LIMIT = int(os.environ.get('PIZZERIA_CLIENT_SEARCH_LIMIT', '10'))
+CLIENT_INDEX_ENABLED = os.environ.get('PIZZERIA_CLIENT_INDEX', '0') == '1'
+# Instrumentación de consultas: activa por defecto, umbral del log de consultas lentas y destino
+QUERY_STATS_ENABLED = os.environ.get('PIZZERIA_QUERY_STATS', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('PIZZERIA_SLOW_QUERY_MS', '200'))
+SLOW_QUERY_LOG = os.environ.get('PIZZERIA_SLOW_QUERY_LOG', 'slow_queries.log')
+STATS_DIR = os.environ.get('PIZZERIA_STATS_DIR', '.')
+# Filas por lote al exportar a Parquet/Arrow (cada lote se escribe y se libera antes de leer el siguiente)
+EXPORT_CHUNK = int(os.environ.get('PIZZERIA_EXPORT_CHUNK', '50000'))
+# Diario local de pedidos: los pedidos se guardan primero en este archivo y un hilo los envía a la base
+JOURNAL_ENABLED = os.environ.get('PIZZERIA_JOURNAL', '0') == '1'
+JOURNAL_PATH = os.environ.get('PIZZERIA_JOURNAL_PATH', 'pedidos_pendientes.sqlite3')
+JOURNAL_BATCH_SIZE = int(os.environ.get('PIZZERIA_JOURNAL_BATCH', '100'))
+JOURNAL_FLUSH_SECONDS = float(os.environ.get('PIZZERIA_JOURNAL_FLUSH', '2'))
+JOURNAL_RETENTION_DAYS = int(os.environ.get('PIZZERIA_JOURNAL_RETENTION_DAYS', '7'))
+# Modo multisucursal: 'Centro=PizzeriaDB_Centro,Norte=sqlite:norte.sqlite3' (base de SQL Server en
+# SERVER_NAME, cadena de conexión completa o archivo SQLite) y segundos de espera por sucursal
+BRANCHES = os.environ.get('PIZZERIA_BRANCHES', '')
+BRANCH_TIMEOUT = float(os.environ.get('PIZZERIA_BRANCH_TIMEOUT', '10'))
+# Claves por consulta en la última ronda del top-N multisucursal (SQL Server admite 2100 parámetros)
+BRANCH_KEYS_PER_QUERY = 1000
+
+# Excepciones capturables sin importar el backend activo
+DB_ERRORS = (sqlite3.Error,) + ((pyodbc.Error,) if pyodbc else ())
+DB_INTEGRITY_ERRORS = (sqlite3.IntegrityError,) + ((pyodbc.IntegrityError,) if pyodbc else ())
+
+# --- BACKENDS DE BASE DE DATOS ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Cliente (
+    ID_Cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+    Nombre TEXT NOT NULL,
+    Apellido TEXT NOT NULL,
+    Telefono TEXT NOT NULL UNIQUE,
+    Email TEXT UNIQUE,
+    Direccion_Completa TEXT
+);
+CREATE TABLE IF NOT EXISTS Pizza (
+    ID_Pizza INTEGER PRIMARY KEY AUTOINCREMENT,
+    Nombre_Pizza TEXT NOT NULL UNIQUE,
+    Descripcion_Pizza TEXT,
+    Precio_Base_Pizza REAL NOT NULL,
+    Disponible INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS Ingrediente (
+    ID_Ingrediente INTEGER PRIMARY KEY AUTOINCREMENT,
+    Nombre_Ingrediente TEXT NOT NULL UNIQUE,
+    Precio_Adicional_Ingrediente REAL NOT NULL DEFAULT 0,
+    Tipo_Ingrediente TEXT
+);
+CREATE TABLE IF NOT EXISTS Pedido (
+    ID_Pedido INTEGER PRIMARY KEY AUTOINCREMENT,
+    ID_Cliente INTEGER NOT NULL REFERENCES Cliente (ID_Cliente),
+    Fecha_Hora_Pedido TEXT NOT NULL,
+    Direccion_Entrega_Pedido TEXT,
+    Total_Pedido REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS DetallePedido (
+    ID_DetallePedido INTEGER PRIMARY KEY AUTOINCREMENT,
+    ID_Pedido INTEGER NOT NULL REFERENCES Pedido (ID_Pedido),
+    ID_Pizza_Menu INTEGER NOT NULL REFERENCES Pizza (ID_Pizza),
+    Cantidad INTEGER NOT NULL,
+    Precio_Unitario_Pizza_Personalizada REAL NOT NULL,
+    Subtotal_Detalle REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Pizza_Ingrediente_Personalizado (
+    ID_DetallePedido INTEGER NOT NULL REFERENCES DetallePedido (ID_DetallePedido),
+    ID_Ingrediente INTEGER NOT NULL REFERENCES Ingrediente (ID_Ingrediente)
+);
+CREATE TABLE IF NOT EXISTS Resumen_Cliente (
+    ID_Cliente INTEGER PRIMARY KEY,
+    TotalPedidos INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS IX_Resumen_Cliente_Total ON Resumen_Cliente (TotalPedidos DESC);
+CREATE TABLE IF NOT EXISTS Resumen_Pizza (
+    ID_Pizza INTEGER PRIMARY KEY,
+    VecesPedida INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS IX_Resumen_Pizza_Veces ON Resumen_Pizza (VecesPedida DESC);
+CREATE TABLE IF NOT EXISTS Resumen_Ingrediente (
+    ID_Ingrediente INTEGER PRIMARY KEY,
+    Frecuencia INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS IX_Resumen_Ingrediente_Frecuencia ON Resumen_Ingrediente (Frecuencia DESC);
+CREATE TABLE IF NOT EXISTS Pedido_Clave (
+    Clave TEXT PRIMARY KEY,
+    ID_Pedido INTEGER NOT NULL REFERENCES Pedido (ID_Pedido)
+);
+CREATE INDEX IF NOT EXISTS IX_Pedido_Clave_Pedido ON Pedido_Clave (ID_Pedido);
+"""
+
+# Tablas de resumen en SQL Server (se crean con "Tablas de resumen" en el menú de mantenimiento)
+SQLSERVER_SUMMARY_SCHEMA = """
+IF OBJECT_ID(N'Resumen_Cliente') IS NULL
+BEGIN
+    CREATE TABLE Resumen_Cliente (ID_Cliente INT NOT NULL PRIMARY KEY, TotalPedidos INT NOT NULL);
+    CREATE INDEX IX_Resumen_Cliente_Total ON Resumen_Cliente (TotalPedidos DESC);
+END;
+IF OBJECT_ID(N'Resumen_Pizza') IS NULL
+BEGIN
+    CREATE TABLE Resumen_Pizza (ID_Pizza INT NOT NULL PRIMARY KEY, VecesPedida INT NOT NULL);
+    CREATE INDEX IX_Resumen_Pizza_Veces ON Resumen_Pizza (VecesPedida DESC);
+END;
+IF OBJECT_ID(N'Resumen_Ingrediente') IS NULL
+BEGIN
+    CREATE TABLE Resumen_Ingrediente (ID_Ingrediente INT NOT NULL PRIMARY KEY, Frecuencia INT NOT NULL);
+    CREATE INDEX IX_Resumen_Ingrediente_Frecuencia ON Resumen_Ingrediente (Frecuencia DESC);
+END;
+"""
+
+# Tablas de pedidos archivados: mismas columnas que las originales, con los IDs originales
+SQLITE_ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {prefix}Pedido_Archivo (
+    ID_Pedido INTEGER PRIMARY KEY,
+    ID_Cliente INTEGER NOT NULL,
+    Fecha_Hora_Pedido TEXT NOT NULL,
+    Direccion_Entrega_Pedido TEXT,
+    Total_Pedido REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {prefix}IX_Pedido_Archivo_Fecha ON Pedido_Archivo (Fecha_Hora_Pedido);
+CREATE TABLE IF NOT EXISTS {prefix}DetallePedido_Archivo (
+    ID_DetallePedido INTEGER PRIMARY KEY,
+    ID_Pedido INTEGER NOT NULL,
+    ID_Pizza_Menu INTEGER NOT NULL,
+    Cantidad INTEGER NOT NULL,
+    Precio_Unitario_Pizza_Personalizada REAL NOT NULL,
+    Subtotal_Detalle REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {prefix}IX_DetallePedido_Archivo_Pedido ON DetallePedido_Archivo (ID_Pedido);
+CREATE TABLE IF NOT EXISTS {prefix}Pizza_Ingrediente_Personalizado_Archivo (
+    ID_DetallePedido INTEGER NOT NULL,
+    ID_Ingrediente INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {prefix}IX_PIP_Archivo_DetallePedido ON Pizza_Ingrediente_Personalizado_Archivo (ID_DetallePedido);
+"""
+
+SQLSERVER_ARCHIVE_SCHEMA = """
+IF OBJECT_ID(N'{prefix}Pedido_Archivo') IS NULL
+BEGIN
+    CREATE TABLE {prefix}Pedido_Archivo (
+        ID_Pedido INT NOT NULL PRIMARY KEY, ID_Cliente INT NOT NULL, Fecha_Hora_Pedido DATETIME NOT NULL,
+        Direccion_Entrega_Pedido NVARCHAR(255) NULL, Total_Pedido DECIMAL(10, 2) NOT NULL);
+    CREATE INDEX IX_Pedido_Archivo_Fecha ON {prefix}Pedido_Archivo (Fecha_Hora_Pedido);
+END;
+IF OBJECT_ID(N'{prefix}DetallePedido_Archivo') IS NULL
+BEGIN
+    CREATE TABLE {prefix}DetallePedido_Archivo (
+        ID_DetallePedido INT NOT NULL PRIMARY KEY, ID_Pedido INT NOT NULL, ID_Pizza_Menu INT NOT NULL, Cantidad INT NOT NULL,
+        Precio_Unitario_Pizza_Personalizada DECIMAL(10, 2) NOT NULL, Subtotal_Detalle DECIMAL(10, 2) NOT NULL);
+    CREATE INDEX IX_DetallePedido_Archivo_Pedido ON {prefix}DetallePedido_Archivo (ID_Pedido);
+END;
+IF OBJECT_ID(N'{prefix}Pizza_Ingrediente_Personalizado_Archivo') IS NULL
+    CREATE TABLE {prefix}Pizza_Ingrediente_Personalizado_Archivo (
+        ID_DetallePedido INT NOT NULL INDEX IX_PIP_Archivo_DetallePedido, ID_Ingrediente INT NOT NULL);
+"""
+
+# Claves de idempotencia de los pedidos enviados desde el diario local
+SQLSERVER_ORDER_KEYS_SCHEMA = """
+IF OBJECT_ID(N'Pedido_Clave') IS NULL
+    CREATE TABLE Pedido_Clave (
+        Clave CHAR(32) NOT NULL PRIMARY KEY,
+        ID_Pedido INT NOT NULL REFERENCES Pedido (ID_Pedido) INDEX IX_Pedido_Clave_Pedido
+    );
+"""
+
+# Traducciones T-SQL -> SQLite para las construcciones que usa este script
+_SQLITE_REWRITES = [
+    (re.compile(r"^(\s*SELECT\s+)TOP\s+(\d+)\s+(.*?);?\s*$", re.I | re.S), r"\1\3 LIMIT \2"),
+    (re.compile(r"^(.*?)\s+OUTPUT\s+INSERTED\.(\w+)(.*?);?\s*$", re.I | re.S), r"\1\3 RETURNING \2"),
+    (re.compile(r"@@IDENTITY", re.I), "last_insert_rowid()"),
+    (re.compile(r"\bMONTH\(([^()]+)\)", re.I), r"CAST(strftime('%m', \1) AS INTEGER)"),
+]
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+
+# Sentencias con las que sqlite3 abre una transacción de escritura implícita
+_SQLITE_WRITE = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE)\b", re.I)
+
+_LIKE_PATTERNS = {}
+
+def _sqlite_like(pattern, value, escape=None):
+    """LIKE sin distinguir mayúsculas también fuera de ASCII (como la intercalación CI de SQL Server).
+
+    El LIKE nativo de SQLite solo ignora mayúsculas en ASCII; con este la base local y el
+    índice de clientes en memoria aplican la misma regla ('Á' coincide con 'á').
+    """
+    if pattern is None or value is None:
+        return None
+    regex = _LIKE_PATTERNS.get((pattern, escape))
+    if regex is None:
+        parts, i = [], 0
+        while i < len(pattern):
+            char = pattern[i]
+            if char == escape and i + 1 < len(pattern):
+                parts.append(re.escape(pattern[i + 1]))
+                i += 2
+                continue
+            parts.append('.*' if char == '%' else '.' if char == '_' else re.escape(char))
+            i += 1
+        if len(_LIKE_PATTERNS) > 1000:
+            _LIKE_PATTERNS.clear()
+        regex = _LIKE_PATTERNS[(pattern, escape)] = re.compile("".join(parts) + r"\Z", re.I | re.S)
+    return regex.match(str(value)) is not None
+
+
+def _sqlite_binary_checksum(*values):
+    """BINARY_CHECKSUM de SQL Server para SQLite: entero de 32 bits con signo de la fila."""
+    digest = zlib.crc32(repr(values).encode('utf-8'))
+    return digest - (1 << 32) if digest >= 1 << 31 else digest
+
+
+class _SQLiteChecksumAgg:
+    """CHECKSUM_AGG de SQL Server para SQLite (XOR de las sumas de verificación de las filas)."""
+
+    def __init__(self):
+        self.total = None
+
+    def step(self, value):
+        if value is not None:
+            self.total = (self.total or 0) ^ value
+
+    def finalize(self):
+        return self.total
+
+# Lote T-SQL que registra un pedido completo en un solo viaje al servidor. El carrito
+# viaja como JSON y los IDs generados se recuperan con OUTPUT INSERTED (sin @@IDENTITY).
+SQLSERVER_ORDER_BATCH = """
+SET NOCOUNT ON;
+DECLARE @Pedido TABLE (ID_Pedido INT, ID_Cliente INT);
+DECLARE @Detalle TABLE (Linea INT, ID_DetallePedido INT);
+
+INSERT INTO Pedido (ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido)
+OUTPUT INSERTED.ID_Pedido, INSERTED.ID_Cliente INTO @Pedido
+VALUES (?, ?, ?, ?);
+
+DECLARE @Carrito NVARCHAR(MAX) = ?;
+
+MERGE INTO DetallePedido AS T
+USING (
+    SELECT P.ID_Pedido, C.Linea, C.ID_Pizza, C.Cantidad, C.Precio_Unitario, C.Subtotal
+    FROM OPENJSON(@Carrito) WITH (
+        Linea INT '$.linea',
+        ID_Pizza INT '$.id_pizza',
+        Cantidad INT '$.cantidad',
+        Precio_Unitario DECIMAL(18, 2) '$.precio_unitario',
+        Subtotal DECIMAL(18, 2) '$.subtotal'
+    ) AS C
+    CROSS JOIN @Pedido AS P
+) AS S
+ON 1 = 0
+WHEN NOT MATCHED THEN
+    INSERT (ID_Pedido, ID_Pizza_Menu, Cantidad, Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle)
+    VALUES (S.ID_Pedido, S.ID_Pizza, S.Cantidad, S.Precio_Unitario, S.Subtotal)
+OUTPUT S.Linea, INSERTED.ID_DetallePedido INTO @Detalle;
+
+INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente)
+SELECT D.ID_DetallePedido, E.ID_Ingrediente
+FROM OPENJSON(@Carrito) WITH (Linea INT '$.linea', Extras NVARCHAR(MAX) '$.extras' AS JSON) AS C
+CROSS APPLY OPENJSON(C.Extras) WITH (ID_Ingrediente INT '$') AS E
+JOIN @Detalle AS D ON D.Linea = C.Linea;
+
+IF OBJECT_ID(N'Resumen_Cliente') IS NOT NULL
+BEGIN
+    MERGE Resumen_Cliente WITH (HOLDLOCK) AS T
+    USING @Pedido AS S ON T.ID_Cliente = S.ID_Cliente
+    WHEN MATCHED THEN UPDATE SET TotalPedidos = T.TotalPedidos + 1
+    WHEN NOT MATCHED THEN INSERT (ID_Cliente, TotalPedidos) VALUES (S.ID_Cliente, 1);
+
+    MERGE Resumen_Pizza WITH (HOLDLOCK) AS T
+    USING (
+        SELECT ID_Pizza, COUNT(*) AS N
+        FROM OPENJSON(@Carrito) WITH (ID_Pizza INT '$.id_pizza')
+        GROUP BY ID_Pizza
+    ) AS S ON T.ID_Pizza = S.ID_Pizza
+    WHEN MATCHED THEN UPDATE SET VecesPedida = T.VecesPedida + S.N
+    WHEN NOT MATCHED THEN INSERT (ID_Pizza, VecesPedida) VALUES (S.ID_Pizza, S.N);
+
+    MERGE Resumen_Ingrediente WITH (HOLDLOCK) AS T
+    USING (
+        SELECT E.ID_Ingrediente, COUNT(*) AS N
+        FROM OPENJSON(@Carrito) WITH (Extras NVARCHAR(MAX) '$.extras' AS JSON) AS C
+        CROSS APPLY OPENJSON(C.Extras) WITH (ID_Ingrediente INT '$') AS E
+        GROUP BY E.ID_Ingrediente
+    ) AS S ON T.ID_Ingrediente = S.ID_Ingrediente
+    WHEN MATCHED THEN UPDATE SET Frecuencia = T.Frecuencia + S.N
+    WHEN NOT MATCHED THEN INSERT (ID_Ingrediente, Frecuencia) VALUES (S.ID_Ingrediente, S.N);
+END;
+
+SELECT P.ID_Pedido, D.Linea, D.ID_DetallePedido
+FROM @Pedido AS P CROSS JOIN @Detalle AS D
+ORDER BY D.Linea;
+"""
+
+
+# Importación masiva en SQL Server: los pedidos de un bloque se cargan con fast_executemany en
+# tablas temporales y se pasan a las tablas reales con sentencias de conjunto.
+SQLSERVER_IMPORT_STAGING = """
+IF OBJECT_ID(N'tempdb..#ImportPedido') IS NULL
+BEGIN
+    CREATE TABLE #ImportPedido (Ref INT PRIMARY KEY, ID_Cliente INT, Fecha DATETIME2(0), Direccion NVARCHAR(400), Total DECIMAL(18, 2));
+    CREATE TABLE #ImportDetalle (Ref INT, Linea INT, ID_Pizza INT, Cantidad INT, Precio DECIMAL(18, 2), Subtotal DECIMAL(18, 2));
+    CREATE TABLE #ImportExtra (Ref INT, Linea INT, ID_Ingrediente INT);
+END;
+TRUNCATE TABLE #ImportPedido;
+TRUNCATE TABLE #ImportDetalle;
+TRUNCATE TABLE #ImportExtra;
+"""
+
+SQLSERVER_IMPORT_BATCH = """
+SET NOCOUNT ON;
+DECLARE @Pedidos TABLE (Ref INT, ID_Pedido INT);
+DECLARE @Detalles TABLE (Ref INT, Linea INT, ID_DetallePedido INT);
+
+MERGE INTO Pedido AS T
+USING #ImportPedido AS S ON 1 = 0
+WHEN NOT MATCHED THEN
+    INSERT (ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido)
+    VALUES (S.ID_Cliente, S.Fecha, S.Direccion, S.Total)
+OUTPUT S.Ref, INSERTED.ID_Pedido INTO @Pedidos;
+
+MERGE INTO DetallePedido AS T
+USING (
+    SELECT P.ID_Pedido, D.Ref, D.Linea, D.ID_Pizza, D.Cantidad, D.Precio, D.Subtotal
+    FROM #ImportDetalle AS D JOIN @Pedidos AS P ON P.Ref = D.Ref
+) AS S ON 1 = 0
+WHEN NOT MATCHED THEN
+    INSERT (ID_Pedido, ID_Pizza_Menu, Cantidad, Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle)
+    VALUES (S.ID_Pedido, S.ID_Pizza, S.Cantidad, S.Precio, S.Subtotal)
+OUTPUT S.Ref, S.Linea, INSERTED.ID_DetallePedido INTO @Detalles;
+
+INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente)
+SELECT D.ID_DetallePedido, E.ID_Ingrediente
+FROM #ImportExtra AS E JOIN @Detalles AS D ON D.Ref = E.Ref AND D.Linea = E.Linea;
+
+IF OBJECT_ID(N'Resumen_Cliente') IS NOT NULL
+BEGIN
+    MERGE Resumen_Cliente WITH (HOLDLOCK) AS T
+    USING (SELECT ID_Cliente, COUNT(*) AS N FROM #ImportPedido GROUP BY ID_Cliente) AS S ON T.ID_Cliente = S.ID_Cliente
+    WHEN MATCHED THEN UPDATE SET TotalPedidos = T.TotalPedidos + S.N
+    WHEN NOT MATCHED THEN INSERT (ID_Cliente, TotalPedidos) VALUES (S.ID_Cliente, S.N);
+
+    MERGE Resumen_Pizza WITH (HOLDLOCK) AS T
+    USING (SELECT ID_Pizza, COUNT(*) AS N FROM #ImportDetalle GROUP BY ID_Pizza) AS S ON T.ID_Pizza = S.ID_Pizza
+    WHEN MATCHED THEN UPDATE SET VecesPedida = T.VecesPedida + S.N
+    WHEN NOT MATCHED THEN INSERT (ID_Pizza, VecesPedida) VALUES (S.ID_Pizza, S.N);
+
+    MERGE Resumen_Ingrediente WITH (HOLDLOCK) AS T
+    USING (SELECT ID_Ingrediente, COUNT(*) AS N FROM #ImportExtra GROUP BY ID_Ingrediente) AS S ON T.ID_Ingrediente = S.ID_Ingrediente
+    WHEN MATCHED THEN UPDATE SET Frecuencia = T.Frecuencia + S.N
+    WHEN NOT MATCHED THEN INSERT (ID_Ingrediente, Frecuencia) VALUES (S.ID_Ingrediente, S.N);
+END;
+
+SELECT Ref, ID_Pedido FROM @Pedidos ORDER BY Ref;
+"""
+
+
+def _cart_json(carrito):
+    """Serializa el carrito con el número de línea que usa el lote de SQL Server."""
+    return json.dumps([
+        {
+            'linea': linea,
+            'id_pizza': item['id_pizza'],
+            'cantidad': item['cantidad'],
+            'precio_unitario': item['precio_unitario'],
+            'subtotal': item['subtotal'],
+            'extras': list(item['extras']),
+        }
+        for linea, item in enumerate(carrito)
+    ])
+
+
+class SQLiteCursor:
+    """Cursor SQLite con la interfaz de pyodbc que usa el resto del script."""
+
+    def __init__(self, connection, raw_cursor):
+        self.backend = connection.backend
+        self._connection = connection
+        self._raw = raw_cursor
+        self._batch_depth = 0
+
+    def execute(self, sql, *params):
+        # pyodbc acepta parámetros sueltos o una secuencia; sqlite3 solo una secuencia
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        self._leg()
+        with self._connection.writing(sql):
+            self._raw.execute(self.backend.translate(sql), params)
+        self._leg()
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._leg()
+        with self._connection.writing(sql):
+            self._raw.executemany(self.backend.translate(sql), seq_of_params)
+        self._leg()
+        return self
+
+    def _leg(self):
+        # Cada sentencia es un viaje al servidor: media latencia de ida antes de ejecutarla y
+        # media de vuelta después. La ida de la primera escritura transcurre sin bloqueos; desde
+        # ahí hasta el commit la transacción conserva el bloqueo de escritura de SQLite, igual
+        # que el servidor conserva los suyos.
+        if self.backend.latency and not self._batch_depth:
+            time.sleep(self.backend.latency / 2)
+
+    @contextmanager
+    def round_trip(self):
+        """Cobra las sentencias del bloque como un solo viaje, como un lote T-SQL."""
+        self._leg()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            self._leg()
+
+    def fetchval(self):
+        row = self._raw.fetchone()
+        return row[0] if row else None
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class SQLiteConnection:
+    """Conexión SQLite que entrega cursores compatibles con pyodbc."""
+
+    def __init__(self, backend, raw_connection):
+        self.backend = backend
+        self._raw = raw_connection
+        self._holds_writer = False
+
+    def cursor(self):
+        return SQLiteCursor(self, self._raw.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    @contextmanager
+    def writing(self, sql):
+        """Toma el turno de escritor del backend antes de la sentencia que abre una transacción.
+
+        Los escritores esperan en cola, como en el gestor de bloqueos de un servidor, en lugar
+        del sondeo con esperas crecientes de SQLite. Si el turno no llega en POOL_TIMEOUT
+        segundos se sigue sin él y decide el bloqueo propio de SQLite.
+        """
+        if not self._holds_writer and not self._raw.in_transaction and _SQLITE_WRITE.match(sql):
+            self._holds_writer = self.backend.writer.acquire(timeout=POOL_TIMEOUT)
+        try:
+            yield
+        finally:
+            if not self._raw.in_transaction:
+                self._release_writer()
+
+    def _release_writer(self):
+        if self._holds_writer:
+            self._holds_writer = False
+            self.backend.writer.release()
+
+    def commit(self):
+        # La vuelta del commit ya no retiene el bloqueo de escritura
+        if self.backend.latency:
+            time.sleep(self.backend.latency / 2)
+        try:
+            self._raw.commit()
+        finally:
+            self._release_writer()
+        if self.backend.latency:
+            time.sleep(self.backend.latency / 2)
+
+    def rollback(self):
+        try:
+            self._raw.rollback()
+        finally:
+            self._release_writer()
+
+    def close(self):
+        try:
+            self._raw.close()
+        finally:
+            self._release_writer()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class SQLServerBackend:
+    """Backend de producción: SQL Server a través de pyodbc."""
+    name = 'sqlserver'
+
+    def __init__(self, connection_string=None, read_only=False):
+        self.connection_string = connection_string or conn_str
+        self.read_only = read_only
+
+    def connect(self):
+        if pyodbc is None:
+            raise RuntimeError("El módulo pyodbc no está instalado; usa PIZZERIA_BACKEND=sqlite.")
+        if not self.read_only:
+            return pyodbc.connect(self.connection_string)
+        # Reportes: cada consulta en su propia transacción y, si la base lo permite, con SNAPSHOT
+        # para leer versiones de fila en lugar de tomar bloqueos compartidos que frenan los pedidos.
+        # Con READ_COMMITTED_SNAPSHOT activo o en una réplica legible el efecto es el mismo.
+        cnxn = pyodbc.connect(self.connection_string, autocommit=True, readonly=True)
+        if cnxn.execute("SELECT snapshot_isolation_state FROM sys.databases WHERE database_id = DB_ID()").fetchval() == 1:
+            cnxn.execute("SET TRANSACTION ISOLATION LEVEL SNAPSHOT")
+        return cnxn
+
+    def reporting_backend(self):
+        """Backend para consultas de solo lectura (ApplicationIntent=ReadOnly o PIZZERIA_REPORTING_CONN_STR)."""
+        if self.read_only or not REPORTING_ENABLED:
+            return self
+        return SQLServerBackend(REPORTING_CONN_STR, read_only=True)
+
+    def translate(self, sql):
+        return sql
+
+    def describe(self):
+        return SERVER_NAME + (" (solo lectura)" if self.read_only else "")
+
+    def insert_orders(self, cursor, orders):
+        """Inserta un bloque de pedidos mediante tablas temporales cargadas con fast_executemany.
+
+        Devuelve los ID_Pedido generados, en el mismo orden que orders."""
+        cursor.execute(SQLSERVER_IMPORT_STAGING)
+        cursor.fast_executemany = True
+        cursor.executemany("INSERT INTO #ImportPedido (Ref, ID_Cliente, Fecha, Direccion, Total) VALUES (?, ?, ?, ?, ?)",
+                           [(ref, o['id_cliente'], o['fecha'], o['direccion'], o['total']) for ref, o in enumerate(orders)])
+        cursor.executemany("INSERT INTO #ImportDetalle (Ref, Linea, ID_Pizza, Cantidad, Precio, Subtotal) VALUES (?, ?, ?, ?, ?, ?)",
+                           [(ref, linea, item['id_pizza'], item['cantidad'], item['precio_unitario'], item['subtotal'])
+                            for ref, o in enumerate(orders) for linea, item in enumerate(o['carrito'])])
+        extras = [(ref, linea, extra_id) for ref, o in enumerate(orders)
+                  for linea, item in enumerate(o['carrito']) for extra_id in item['extras']]
+        if extras:
+            cursor.executemany("INSERT INTO #ImportExtra (Ref, Linea, ID_Ingrediente) VALUES (?, ?, ?)", extras)
+        return [row[1] for row in cursor.execute(SQLSERVER_IMPORT_BATCH).fetchall()]
+
+    def ensure_summary_tables(self, cursor):
+        cursor.execute(SQLSERVER_SUMMARY_SCHEMA)
+
+    def ensure_order_keys(self, cursor):
+        cursor.execute(SQLSERVER_ORDER_KEYS_SCHEMA)
+
+    def archive_prefix(self, cursor):
+        return f"{ARCHIVE_DB}.dbo." if ARCHIVE_DB else ""
+
+    def archive_atomic(self, cursor):
+        return True  # Una transacción entre bases de la misma instancia es atómica
+
+    def ensure_archive_tables(self, cursor):
+        cursor.execute(SQLSERVER_ARCHIVE_SCHEMA.format(prefix=self.archive_prefix(cursor)))
+
+    def identity_insert(self, cursor, table, enabled):
+        cursor.execute(f"SET IDENTITY_INSERT {table} {'ON' if enabled else 'OFF'}")
+
+    def index_exists(self, cursor, name):
+        return cursor.execute("SELECT 1 FROM sys.indexes WHERE name = ?", name).fetchone() is not None
+
+    def create_index(self, cursor, name, table, columns, include=()):
+        sql = f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+        if include:
+            sql += f" INCLUDE ({', '.join(include)})"
+        cursor.execute(sql)
+
+    def insert_order(self, cursor, id_cliente, fecha, direccion, total, carrito):
+        """Inserta Pedido, DetallePedido, extras y contadores de resumen en un solo lote.
+
+        Devuelve (ID_Pedido, IDs de detalle)."""
+        rows = cursor.execute(SQLSERVER_ORDER_BATCH, id_cliente, fecha, direccion, total, _cart_json(carrito)).fetchall()
+        return rows[0][0], [row[2] for row in rows]
+
+
+class SQLiteBackend:
+    """Backend local sobre SQLite que crea el esquema de PizzeriaDB si no existe."""
+    name = 'sqlite'
+
+    def __init__(self, path=None, latency_ms=None, read_only=False):
+        self.path = path or SQLITE_PATH
+        self.latency = (SQLITE_LATENCY_MS if latency_ms is None else latency_ms) / 1000.0
+        self.read_only = read_only
+        self._translations = {}
+        self.writer = threading.Lock()  # Turno de escritura entre las conexiones de este backend
+
+    def connect(self):
+        raw = sqlite3.connect(self.path, timeout=POOL_TIMEOUT, check_same_thread=False)
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.create_function('like', 2, _sqlite_like, deterministic=True)
+        raw.create_function('like', 3, _sqlite_like, deterministic=True)
+        raw.create_function('BINARY_CHECKSUM', -1, _sqlite_binary_checksum, deterministic=True)
+        raw.create_aggregate('CHECKSUM_AGG', 1, _SQLiteChecksumAgg)
+        if self.path != ':memory:':
+            raw.execute("PRAGMA journal_mode = WAL")  # Lectores concurrentes con un escritor
+        raw.executescript(SQLITE_SCHEMA)
+        if ARCHIVE_DB and self.path != ':memory:':
+            raw.execute("ATTACH DATABASE ? AS archivo", (ARCHIVE_DB,))
+        raw.executescript(SQLITE_ARCHIVE_SCHEMA.format(prefix="archivo." if ARCHIVE_DB and self.path != ':memory:' else ""))
+        if self.read_only:
+            raw.execute("PRAGMA query_only = ON")  # En WAL cada lectura ve una instantánea y no bloquea escrituras
+        return SQLiteConnection(self, raw)
+
+    def reporting_backend(self):
+        """Backend de solo lectura sobre PIZZERIA_REPORTING_SQLITE_PATH o el mismo archivo."""
+        if self.read_only or not REPORTING_ENABLED or self.path == ':memory:':
+            return self  # Una base en memoria no puede abrirse desde otra conexión
+        return SQLiteBackend(REPORTING_SQLITE_PATH or self.path, self.latency * 1000.0, read_only=True)
+
+    def translate(self, sql):
+        translated = self._translations.get(sql)
+        if translated is None:
+            translated = sql
+            for pattern, replacement in _SQLITE_REWRITES:
+                translated = pattern.sub(replacement, translated)
+            self._translations[sql] = translated
+        return translated
+
+    def describe(self):
+        return self.path + (" (solo lectura)" if self.read_only else "")
+
+    def insert_order(self, cursor, id_cliente, fecha, direccion, total, carrito):
+        """Inserta el pedido completo; con latencia simulada cuenta como un viaje, igual que
+        SQLSERVER_ORDER_BATCH en SQL Server."""
+        with cursor.round_trip():
+            return self._insert_order(cursor, id_cliente, fecha, direccion, total, carrito)
+
+    def _insert_order(self, cursor, id_cliente, fecha, direccion, total, carrito):
+        id_pedido = cursor.execute(
+            "INSERT INTO Pedido (ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido) VALUES (?, ?, ?, ?) RETURNING ID_Pedido",
+            id_cliente, fecha, direccion, total).fetchval()
+        ids_detalle = []
+        extras = []
+        for item in carrito:
+            id_detalle = cursor.execute(
+                "INSERT INTO DetallePedido (ID_Pedido, ID_Pizza_Menu, Cantidad, Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle) VALUES (?, ?, ?, ?, ?) RETURNING ID_DetallePedido",
+                id_pedido, item['id_pizza'], item['cantidad'], item['precio_unitario'], item['subtotal']).fetchval()
+            ids_detalle.append(id_detalle)
+            extras.extend((id_detalle, extra_id) for extra_id in item['extras'])
+        if extras:
+            cursor.executemany("INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente) VALUES (?, ?)", extras)
+        cursor.execute(
+            "INSERT INTO Resumen_Cliente (ID_Cliente, TotalPedidos) VALUES (?, 1) "
+            "ON CONFLICT (ID_Cliente) DO UPDATE SET TotalPedidos = TotalPedidos + 1", id_cliente)
+        cursor.executemany(
+            "INSERT INTO Resumen_Pizza (ID_Pizza, VecesPedida) VALUES (?, 1) "
+            "ON CONFLICT (ID_Pizza) DO UPDATE SET VecesPedida = VecesPedida + 1",
+            [(item['id_pizza'],) for item in carrito])
+        cursor.executemany(
+            "INSERT INTO Resumen_Ingrediente (ID_Ingrediente, Frecuencia) VALUES (?, 1) "
+            "ON CONFLICT (ID_Ingrediente) DO UPDATE SET Frecuencia = Frecuencia + 1",
+            [(extra_id,) for _, extra_id in extras])
+        return id_pedido, ids_detalle
+
+    def insert_orders(self, cursor, orders):
+        with cursor.round_trip():
+            return [self.insert_order(cursor, o['id_cliente'], o['fecha'], o['direccion'], o['total'], o['carrito'])[0]
+                    for o in orders]
+
+    def ensure_summary_tables(self, cursor):
+        pass  # Ya forman parte de SQLITE_SCHEMA
+
+    def ensure_order_keys(self, cursor):
+        pass  # Pedido_Clave ya forma parte de SQLITE_SCHEMA
+
+    def archive_prefix(self, cursor):
+        return "archivo." if ARCHIVE_DB and self.path != ':memory:' else ""
+
+    def archive_atomic(self, cursor):
+        # En modo WAL un commit que toca la base principal y una adjunta no es atómico entre
+        # archivos: una caída a mitad puede dejar aplicado solo uno de los dos
+        return not self.archive_prefix(cursor)
+
+    def ensure_archive_tables(self, cursor):
+        pass  # connect() ya crea las tablas de archivo (y adjunta PIZZERIA_ARCHIVE_DB si se indicó)
+
+    def identity_insert(self, cursor, table, enabled):
+        pass  # SQLite acepta IDs explícitos en columnas AUTOINCREMENT
+
+    def index_exists(self, cursor, name):
+        return cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", name).fetchone() is not None
+
+    def create_index(self, cursor, name, table, columns, include=()):
+        # SQLite no tiene INCLUDE: las columnas incluidas se agregan al final de la clave
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(list(columns) + list(include))})")
+
+
+def get_backend(name=None, **options):
+    """Devuelve el backend configurado (por defecto, el indicado en PIZZERIA_BACKEND)."""
+    name = (name or DB_BACKEND).lower()
+    if name == 'sqlserver':
+        return SQLServerBackend(**options)
+    if name == 'sqlite':
+        return SQLiteBackend(**options)
+    raise ValueError(f"Backend desconocido: {name}")
+
+
+def backend_for(cursor):
+    """Backend al que pertenece un cursor (los cursores pyodbc son siempre de SQL Server)."""
+    return getattr(cursor, 'backend', None) or SQLServerBackend()
+
+# --- INSTRUMENTACIÓN DE CONSULTAS ---
+# Límites (en segundos) de los histogramas de latencia, al estilo de Prometheus
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StatementStats:
+    """Contadores e histogramas de una sentencia SQL (normalizada: espacios colapsados)."""
+    __slots__ = ('sql', 'fingerprint', 'calls', 'errors', 'rows', 'execute_seconds', 'fetch_seconds',
+                 'max_execute_seconds', 'execute_buckets', 'fetch_buckets')
+
+    def __init__(self, sql):
+        self.sql = sql
+        # Identificador estable para etiquetar la serie: textos con el mismo inicio no se confunden
+        self.fingerprint = hashlib.sha1(sql.encode('utf-8')).hexdigest()[:16]
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.execute_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self.max_execute_seconds = 0.0
+        self.execute_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.fetch_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def to_dict(self):
+        return {
+            'sql': self.sql,
+            'fingerprint': self.fingerprint,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'execute_seconds': self.execute_seconds,
+            'fetch_seconds': self.fetch_seconds,
+            'max_execute_seconds': self.max_execute_seconds,
+            'buckets': list(LATENCY_BUCKETS) + ['+Inf'],
+            'execute_histogram': list(self.execute_buckets),
+            'fetch_histogram': list(self.fetch_buckets),
+        }
+
+
+class QueryStats:
+    """Registro de latencias por sentencia y log de consultas lentas."""
+
+    def __init__(self, slow_ms=None, slow_log=None):
+        self.slow_seconds = (SLOW_QUERY_MS if slow_ms is None else slow_ms) / 1000.0
+        self.slow_log = SLOW_QUERY_LOG if slow_log is None else slow_log
+        self._lock = threading.Lock()
+        self._statements = {}  # Texto tal cual llega -> estadísticas (evita normalizar en cada llamada)
+        self._by_text = {}  # Texto normalizado -> estadísticas
+
+    def _entry(self, sql):
+        entry = self._statements.get(sql)
+        if entry is None:
+            text = " ".join(sql.split())
+            entry = self._by_text.get(text)
+            if entry is None:
+                entry = self._by_text[text] = StatementStats(text)
+            self._statements[sql] = entry
+        return entry
+
+    def record_execute(self, sql, seconds, failed=False):
+        with self._lock:
+            entry = self._entry(sql)
+            entry.calls += 1
+            entry.errors += failed
+            entry.execute_seconds += seconds
+            entry.max_execute_seconds = max(entry.max_execute_seconds, seconds)
+            entry.execute_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if seconds >= self.slow_seconds and self.slow_log:
+            self._log_slow(entry.sql, seconds)
+
+    def record_fetch(self, sql, rows, seconds):
+        with self._lock:
+            entry = self._entry(sql)
+            entry.rows += rows
+            entry.fetch_seconds += seconds
+            entry.fetch_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def _log_slow(self, sql, seconds):
+        try:
+            with open(self.slow_log, 'a', encoding='utf-8') as log:
+                log.write(f"{datetime.now().isoformat(' ', 'seconds')}\t{seconds * 1000:.1f} ms\t{sql}\n")
+        except OSError:
+            pass  # El log de consultas lentas nunca debe interrumpir la operación
+
+    def snapshot(self):
+        with self._lock:
+            return [entry.to_dict() for entry in self._by_text.values()]
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._by_text.clear()
+
+    def to_json(self):
+        return json.dumps({'generated_at': datetime.now().isoformat(), 'statements': self.snapshot()}, indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Texto en formato de exposición de Prometheus (una familia de métricas por bloque).
+
+        Cada serie se identifica por la huella de la sentencia normalizada (query); el texto
+        recortado va en la etiqueta sql solo como referencia legible.
+        """
+        stats = self.snapshot()
+        labels = ['query="{}",sql="{}"'.format(stat['fingerprint'], stat['sql'][:120].replace('\\', '\\\\').replace('"', '\\"'))
+                  for stat in stats]
+        lines = []
+        for metric, key in (('calls', 'calls'), ('errors', 'errors'), ('rows', 'rows')):
+            lines.append(f"# TYPE pizzeria_query_{metric}_total counter")
+            lines.extend(f'pizzeria_query_{metric}_total{{{label}}} {stat[key]}' for label, stat in zip(labels, stats))
+        for phase in ('execute', 'fetch'):
+            name = f"pizzeria_query_{phase}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for label, stat in zip(labels, stats):
+                cumulative = 0
+                for bound, count in zip(stat['buckets'], stat[f'{phase}_histogram']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label}}} {stat[f"{phase}_seconds"]}')
+                lines.append(f'{name}_count{{{label}}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, folder=None):
+        """Escribe query_stats.json y query_stats.prom en folder; devuelve las rutas."""
+        folder = folder or STATS_DIR
+        paths = (os.path.join(folder, 'query_stats.json'), os.path.join(folder, 'query_stats.prom'))
+        for path, content in zip(paths, (self.to_json(), self.to_prometheus())):
+            with open(path, 'w', encoding='utf-8') as out:
+                out.write(content)
+        return paths
+
+
+query_stats = QueryStats()
+
+
+class InstrumentedCursor:
+    """Cursor que mide la ejecución y la lectura de cada sentencia en un QueryStats."""
+
+    def __init__(self, raw_cursor, stats):
+        self._raw = raw_cursor
+        self._stats = stats
+        self._sql = None
+
+    def execute(self, sql, *params):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            self._raw.execute(sql, *params)
+        except Exception:
+            self._stats.record_execute(sql, time.perf_counter() - start, failed=True)
+            raise
+        self._stats.record_execute(sql, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            self._raw.executemany(sql, seq_of_params)
+        except Exception:
+            self._stats.record_execute(sql, time.perf_counter() - start, failed=True)
+            raise
+        self._stats.record_execute(sql, time.perf_counter() - start)
+        return self
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        result = getattr(self._raw, method)(*args)
+        if method in ('fetchone', 'fetchval'):
+            rows = 0 if result is None else 1
+        else:
+            rows = len(result)
+        self._stats.record_fetch(self._sql, rows, time.perf_counter() - start)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch('fetchone')
+
+    def fetchval(self):
+        return self._timed_fetch('fetchval')
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch('fetchmany', size) if size is not None else self._timed_fetch('fetchmany')
+
+    def fetchall(self):
+        return self._timed_fetch('fetchall')
+
+    def __iter__(self):
+        # Lee por bloques y registra una sola vez al terminar (o al abandonar) la iteración,
+        # para no sumar el costo del registro a cada fila de los bucles medidos
+        rows = 0
+        seconds = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = self._raw.fetchmany(FETCH_SIZE)
+                seconds += time.perf_counter() - start
+                if not batch:
+                    break
+                rows += len(batch)
+                yield from batch
+        finally:
+            self._stats.record_fetch(self._sql, rows, seconds)
+
+    @property
+    def fast_executemany(self):
+        return getattr(self._raw, 'fast_executemany', False)
+
+    @fast_executemany.setter
+    def fast_executemany(self, value):
+        self._raw.fast_executemany = value
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class InstrumentedConnection:
+    """Conexión cuyos cursores quedan instrumentados."""
+
+    def __init__(self, raw_connection, stats):
+        self._raw = raw_connection
+        self._stats = stats
+
+    def cursor(self):
+        return InstrumentedCursor(self._raw.cursor(), self._stats)
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+def instrument(cnxn, stats=None):
+    """Envuelve una conexión para registrar sus consultas (si la instrumentación está activa)."""
+    if not QUERY_STATS_ENABLED:
+        return cnxn
+    return InstrumentedConnection(cnxn, stats or query_stats)
+
+
+def show_query_stats(stats=None):
+    """Muestra las sentencias ordenadas por tiempo total y permite exportar las métricas."""
+    stats = stats or query_stats
+    rows = sorted(stats.snapshot(), key=lambda s: s['execute_seconds'] + s['fetch_seconds'], reverse=True)
+    print_rows(
+        ["Llamadas", "Filas", "Ejecución ms", "Lectura ms", "Máx ms", "SQL"],
+        [(s['calls'], s['rows'], f"{s['execute_seconds'] * 1000:.1f}", f"{s['fetch_seconds'] * 1000:.1f}",
+          f"{s['max_execute_seconds'] * 1000:.1f}", s['sql']) for s in rows[:20]],
+        "Consultas más costosas")
+    if input("\n¿Exportar métricas a JSON y Prometheus? (s/n): ").lower() == 's':
+        try:
+            for path in stats.dump():
+                print(f"✅ Métricas escritas en {path}")
+        except OSError as ex:
+            print(f"No se pudieron escribir las métricas: {ex}")
+
 # --- FUNCIONES AUXILIARES ---
-def print_results(cursor, description="Resultados de la consulta"):
-    """Función para imprimir de forma ordenada los resultados de cualquier consulta."""
-    print(f"\n--- {description} ---")
+def _column_widths(columns, sample):
+    """Calcula el ancho de cada columna a partir del encabezado y una muestra de filas."""
+    widths = [len(str(col)) for col in columns]
+    for row in sample:
+        for i, item in enumerate(row):
+            widths[i] = max(widths[i], len(str(item)))
+    return [min(width, MAX_COLUMN_WIDTH) for width in widths]
+
+def _format_cell(item, width):
+    text = str(item)
+    if len(text) > width:
+        text = text[:width - 1] + "…"
+    return f"{text: <{width}}"
+
+def render_rows(columns, batches, description="Resultados de la consulta", fmt='table', out=None, page_size=None):
+    """Escribe lotes de filas en formato 'table', 'csv' o 'jsonl' sin acumularlos en memoria.
+
+    Con page_size (solo en formato tabla) se pausa cada page_size filas y el usuario
+    puede detener el listado escribiendo 'q'. Devuelve True si hubo al menos una fila.
+    """
+    out = out or sys.stdout
+    batches = iter(batches)
+    first = next(batches, [])
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        emit = writer.writerow
+    elif fmt == 'jsonl':
+        emit = lambda row: out.write(json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n")
+    else:
+        print(f"\n--- {description} ---", file=out)
+        widths = _column_widths(columns, first)
+        header = " | ".join(_format_cell(col, width) for col, width in zip(columns, widths))
+        print(header, file=out)
+        print("-" * len(header), file=out)
+        emit = lambda row: print(" | ".join(_format_cell(item, width) for item, width in zip(row, widths)), file=out)
+
+    count = 0
+    batch = first
+    while batch:
+        for row in batch:
+            emit(row)
+            count += 1
+            if fmt == 'table' and page_size and count % page_size == 0:
+                if input(f"-- {count} filas mostradas. Enter para continuar, 'q' para detener: ").lower() == 'q':
+                    print("-" * len(header), file=out)
+                    return True
+        batch = next(batches, [])
+
+    if fmt == 'table':
+        if not count:
+            print("La consulta no devolvió resultados.", file=out)
+            return False
+        print("-" * len(header), file=out)
+    return count > 0
+
+def print_rows(columns, rows, description="Resultados de la consulta"):
+    """Imprime filas ya cargadas en memoria con el mismo formato que print_results."""
+    return render_rows(columns, [rows], description)
+
+def print_results(cursor, description="Resultados de la consulta", fmt='table', out=None, page_size=None):
+    """Función para imprimir de forma ordenada los resultados de cualquier consulta.
+
+    Las filas se leen del cursor en bloques de FETCH_SIZE, por lo que la memoria usada
+    no depende del tamaño del resultado y la primera fila se muestra de inmediato.
+    """
+    try:
+        columns = [column[0] for column in cursor.description]
+        batches = iter(lambda: cursor.fetchmany(FETCH_SIZE), [])
+        return render_rows(columns, batches, description, fmt, out, page_size)
+    except DB_ERRORS as ex:
+        print(f"Error al procesar los resultados: {ex}")
+        return False
+
+# --- CACHÉ DEL CATÁLOGO ---
+class CatalogCache:
+    """Copia en memoria de Pizza e Ingrediente para armar carritos sin consultar la base.
+
+    Las escrituras de este proceso llaman a invalidate(); los cambios hechos desde otras
+    terminales se detectan comparando una huella del catálogo cuando vence el TTL. La huella
+    es una suma de verificación de cada fila (CHECKSUM_AGG de BINARY_CHECKSUM, registradas
+    también en SQLite), así que cambia con cualquier precio, nombre o Disponible, aunque dos
+    cambios dejen igual la suma de precios.
+    """
+    PIZZA_SQL = "SELECT ID_Pizza, Nombre_Pizza, Precio_Base_Pizza, Disponible FROM Pizza"
+    INGREDIENTE_SQL = "SELECT ID_Ingrediente, Nombre_Ingrediente, Precio_Adicional_Ingrediente FROM Ingrediente"
+    VERSION_SQL = (
+        "SELECT (SELECT COUNT(*) FROM Pizza), "
+        "(SELECT CHECKSUM_AGG(BINARY_CHECKSUM(ID_Pizza, Nombre_Pizza, Precio_Base_Pizza, Disponible)) FROM Pizza), "
+        "(SELECT COUNT(*) FROM Ingrediente), "
+        "(SELECT CHECKSUM_AGG(BINARY_CHECKSUM(ID_Ingrediente, Nombre_Ingrediente, Precio_Adicional_Ingrediente)) FROM Ingrediente)"
+    )
+
+    def __init__(self, ttl=None):
+        self.ttl = CATALOG_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._pizzas = None
+        self._ingredientes = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._pizzas = None
+
+    def _version_of(self, cursor):
+        return tuple(cursor.execute(self.VERSION_SQL).fetchone())
+
+    def _ensure(self, cursor):
+        """Devuelve (pizzas, ingredientes) vigentes, tomados bajo el candado.
+
+        Los métodos de lectura usan esta copia local: invalidate() puede dejar self._pizzas
+        en None desde otro hilo en cualquier momento.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._pizzas is not None and now - self._checked_at < self.ttl:
+                return self._pizzas, self._ingredientes
+            version = self._version_of(cursor)
+            if self._pizzas is None or version != self._version:
+                self._pizzas = {
+                    row[0]: (row[1], float(row[2]), bool(row[3]))
+                    for row in cursor.execute(self.PIZZA_SQL).fetchall()
+                }
+                self._ingredientes = {
+                    row[0]: (row[1], float(row[2]))
+                    for row in cursor.execute(self.INGREDIENTE_SQL).fetchall()
+                }
+                self._version = version
+            self._checked_at = now
+            return self._pizzas, self._ingredientes
+
+    def available_pizzas(self, cursor):
+        """Filas (ID_Pizza, Nombre_Pizza, Precio_Base_Pizza) de las pizzas disponibles."""
+        pizzas, _ = self._ensure(cursor)
+        return [(pid, nombre, precio) for pid, (nombre, precio, disponible) in pizzas.items() if disponible]
+
+    def pizza_price(self, cursor, id_pizza):
+        pizzas, _ = self._ensure(cursor)
+        pizza = pizzas.get(id_pizza)
+        return pizza[1] if pizza else None
+
+    def extra_ingredients(self, cursor):
+        """Filas (ID_Ingrediente, Nombre_Ingrediente, Precio_Adicional_Ingrediente) con precio adicional."""
+        _, ingredientes = self._ensure(cursor)
+        return [(iid, nombre, precio) for iid, (nombre, precio) in ingredientes.items() if precio > 0]
+
+    def ingredient_price(self, cursor, id_ingrediente):
+        _, ingredientes = self._ensure(cursor)
+        ingrediente = ingredientes.get(id_ingrediente)
+        return ingrediente[1] if ingrediente else None
+
+
+catalog = CatalogCache()
+
+def price_cart(cursor, items):
+    """Valida y calcula precios de un carrito igual que create_new_order.
+
+    items es una lista de {'id_pizza', 'cantidad', 'extras'}; devuelve (carrito, total)
+    o lanza ValueError con el motivo.
+    """
+    carrito = []
+    total_pedido = 0.0
+    for item in items:
+        try:
+            id_pizza = int(item['id_pizza'])
+            cantidad = item.get('cantidad')
+            extras = [int(extra) for extra in item.get('extras') or []]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError(f"Línea de pizza no válida: {item}") from None
+        # Sin valor por defecto: una cantidad ausente, vacía o 0 es un error, no una pizza
+        if cantidad is None or str(cantidad).strip() == '':
+            raise ValueError(f"Falta la cantidad de la pizza {id_pizza}")
+        try:
+            cantidad = int(cantidad)
+        except (TypeError, ValueError):
+            raise ValueError(f"Cantidad no válida: {cantidad}") from None
+        precio_unitario = catalog.pizza_price(cursor, id_pizza)
+        if precio_unitario is None:
+            raise ValueError(f"La pizza {id_pizza} no existe")
+        if cantidad <= 0:
+            raise ValueError(f"Cantidad no válida: {cantidad}")
+        for extra_id in extras:
+            precio_extra = catalog.ingredient_price(cursor, extra_id)
+            if precio_extra is None:
+                raise ValueError(f"El ingrediente {extra_id} no existe")
+            precio_unitario += precio_extra
+        subtotal = precio_unitario * cantidad
+        carrito.append({'id_pizza': id_pizza, 'cantidad': cantidad, 'precio_unitario': precio_unitario, 'subtotal': subtotal, 'extras': extras})
+        total_pedido += subtotal
+    return carrito, total_pedido
+
+# --- TABLAS DE RESUMEN ---
+# (tabla de resumen, clave, contador, agregado equivalente sobre las tablas de pedidos)
+SUMMARIES = [
+    ('Resumen_Cliente', 'ID_Cliente', 'TotalPedidos',
+     "SELECT ID_Cliente AS Clave, COUNT(*) AS N FROM Pedido GROUP BY ID_Cliente"),
+    ('Resumen_Pizza', 'ID_Pizza', 'VecesPedida',
+     "SELECT ID_Pizza_Menu AS Clave, COUNT(*) AS N FROM DetallePedido GROUP BY ID_Pizza_Menu"),
+    ('Resumen_Ingrediente', 'ID_Ingrediente', 'Frecuencia',
+     "SELECT ID_Ingrediente AS Clave, COUNT(*) AS N FROM Pizza_Ingrediente_Personalizado GROUP BY ID_Ingrediente"),
+]
+
+def rebuild_summaries(cnxn, cursor):
+    """Crea (si hace falta) y recalcula desde cero las tablas de resumen en una transacción."""
+    try:
+        backend_for(cursor).ensure_summary_tables(cursor)
+        for table, key, counter, aggregate in SUMMARIES:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"INSERT INTO {table} ({key}, {counter}) SELECT Clave, N FROM ({aggregate}) AS A")
+        cnxn.commit()
+        return True
+    except DB_ERRORS as ex:
+        cnxn.rollback()
+        print(f"\n❌ No se pudieron reconstruir los resúmenes. Error: {ex}")
+        return False
+
+def verify_summaries(cursor):
+    """Devuelve {tabla: filas con diferencias} comparando cada resumen con su agregado real."""
+    drift = {}
+    for table, key, counter, aggregate in SUMMARIES:
+        sql = (f"SELECT COUNT(*) FROM ({aggregate}) AS A FULL OUTER JOIN {table} AS R ON R.{key} = A.Clave "
+               f"WHERE COALESCE(A.N, 0) <> COALESCE(R.{counter}, 0)")
+        drift[table] = cursor.execute(sql).fetchval()
+    return drift
+
+def run_summary_report(cursor, summary_sql, live_sql, description):
+    """Muestra un reporte desde las tablas de resumen; si no existen, usa el agregado completo."""
+    try:
+        cursor.execute(summary_sql)
+    except DB_ERRORS:
+        print("(Tablas de resumen no disponibles: se calcula sobre todo el historial.)")
+        cursor.execute(live_sql)
+    return print_results(cursor, description)
+
+def handle_summaries(cnxn, cursor):
+    """Submenú para verificar o reconstruir las tablas de resumen."""
+    print("\n--- Tablas de Resumen ---")
+    print("1. Verificar diferencias | 2. Reconstruir | 3. Volver")
+    choice = input("Selecciona una opción (1-3): ")
+    if choice == '1':
+        try:
+            for table, rows in verify_summaries(cursor).items():
+                estado = "✅ al día" if rows == 0 else f"❌ {rows} filas con diferencias"
+                print(f"{table}: {estado}")
+        except DB_ERRORS as ex:
+            print(f"\nNo se pudieron verificar los resúmenes (¿ya fueron creados?). Error: {ex}")
+    elif choice == '2':
+        if rebuild_summaries(cnxn, cursor):
+            print("\n✅ ¡Tablas de resumen reconstruidas!")
+
+# --- BÚSQUEDA DE PEDIDOS POR FECHA ---
+def month_ranges(months, years):
+    """Convierte meses y años en rangos semiabiertos [inicio, fin) de Fecha_Hora_Pedido.
+
+    Los meses consecutivos se fusionan en un solo rango para que la consulta use
+    el menor número posible de búsquedas sobre el índice de fechas.
+    """
+    ranges = []
+    for year in sorted(years):
+        for month in sorted(set(months)):
+            start = datetime(year, month, 1)
+            end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+    return ranges
+
+def order_years(cursor, text='', include_archive=False):
+    """Interpreta '' (todos los años con pedidos), '2024' o '2023-2025' como lista de años."""
+    text = text.strip()
+    if not text:
+        sql = "SELECT MIN(Fecha_Hora_Pedido), MAX(Fecha_Hora_Pedido) FROM Pedido"
+        first, last = cursor.execute(with_archive(cursor, sql) if include_archive else sql).fetchone()
+        if first is None:
+            return []
+        if isinstance(first, str):  # SQLite guarda las fechas como texto ISO
+            first, last = datetime.fromisoformat(first), datetime.fromisoformat(last)
+        return list(range(first.year, last.year + 1))
+    start, _, end = text.partition('-')
+    start = int(start)
+    end = int(end) if end else start
+    if not 1 <= start <= end <= 9999:
+        raise ValueError(text)
+    return list(range(start, end + 1))
+
+def search_orders_by_date(cursor, ranges, include_archive=False):
+    """Ejecuta la búsqueda de pedidos en los rangos dados usando comparaciones indexables."""
+    conditions = " OR ".join(["(Fecha_Hora_Pedido >= ? AND Fecha_Hora_Pedido < ?)"] * len(ranges))
+    sql = f"SELECT ID_Pedido, ID_Cliente, Fecha_Hora_Pedido, Total_Pedido FROM Pedido WHERE {conditions}"
+    params = [bound for date_range in ranges for bound in date_range]
+    if include_archive:
+        # Cada rama usa su propio índice de fechas
+        sql += f" UNION ALL {sql.replace('FROM Pedido', f'FROM {backend_for(cursor).archive_prefix(cursor)}Pedido_Archivo')}"
+        params += params
+    return cursor.execute(sql + " ORDER BY Fecha_Hora_Pedido;", params)
+
+# --- ÍNDICES ---
+# (nombre, tabla, columnas clave, columnas incluidas, consultas a las que sirve)
+INDEXES = [
+    ('IX_Pedido_Fecha', 'Pedido', ['Fecha_Hora_Pedido'], ['ID_Cliente', 'Total_Pedido'],
+     "Consultas especiales › Pedidos por mes/año (rangos de Fecha_Hora_Pedido)"),
+    ('IX_Pedido_Cliente', 'Pedido', ['ID_Cliente'], [],
+     "Top 3 clientes (cálculo completo), reconstrucción de Resumen_Cliente, borrado de clientes"),
+    ('IX_DetallePedido_Pedido', 'DetallePedido', ['ID_Pedido'], [],
+     "Detalle de un pedido, borrado/archivo de pedidos"),
+    ('IX_DetallePedido_Pizza', 'DetallePedido', ['ID_Pizza_Menu'], [],
+     "Pizzas más populares (cálculo completo), reconstrucción de Resumen_Pizza, borrado de pizzas"),
+    ('IX_PIP_DetallePedido', 'Pizza_Ingrediente_Personalizado', ['ID_DetallePedido'], [],
+     "Extras de cada línea de pedido, borrado/archivo de pedidos"),
+    ('IX_PIP_Ingrediente', 'Pizza_Ingrediente_Personalizado', ['ID_Ingrediente'], [],
+     "Ingredientes extra más populares (cálculo completo), reconstrucción de Resumen_Ingrediente, borrado de ingredientes"),
+    ('IX_Cliente_Apellido_Nombre', 'Cliente', ['Apellido', 'Nombre'], ['Telefono', 'Email'],
+     "Búsqueda de clientes por apellido (nuevo pedido, mantenimiento de clientes)"),
+    ('IX_Cliente_Nombre', 'Cliente', ['Nombre'], ['Apellido', 'Telefono', 'Email'],
+     "Búsqueda de clientes por nombre (nuevo pedido, mantenimiento de clientes)"),
+]
+
+def provision_indexes(cnxn, cursor):
+    """Crea los índices de INDEXES que falten y devuelve [(nombre, tabla, creado, consultas)]."""
+    backend = backend_for(cursor)
+    report = []
+    for name, table, columns, include, serves in INDEXES:
+        created = False
+        if not backend.index_exists(cursor, name):
+            backend.create_index(cursor, name, table, columns, include)
+            created = True
+        report.append((name, table, created, serves))
+    cnxn.commit()
+    return report
+
+def handle_indexes(cnxn, cursor):
+    """Crea los índices que usan las consultas del programa y muestra para qué sirve cada uno."""
+    print("\n--- Índices de PizzeriaDB ---")
+    try:
+        report = provision_indexes(cnxn, cursor)
+    except DB_ERRORS as ex:
+        cnxn.rollback()
+        print(f"\n❌ No se pudieron crear los índices. Error: {ex}")
+        return
+    for name, table, created, serves in report:
+        print(f"{'✅ creado    ' if created else '   ya existía'} | {name} ON {table}")
+        print(f"               Atiende: {serves}")
+
+# --- BÚSQUEDA DE CLIENTES ---
+# Teléfono y Email ya tienen índice por sus restricciones UNIQUE; nombre y apellido usan los de INDEXES.
+CLIENT_COLUMNS = ["ID_Cliente", "Nombre", "Apellido", "Telefono", "Email"]
+CLIENT_SEARCH_SQL = "SELECT TOP {limit} ID_Cliente, Nombre, Apellido, Telefono, Email FROM Cliente WHERE {where} ORDER BY {order}"
+
+def _like_escape(text):
+    """Escapa los comodines de LIKE para usarlo con ESCAPE '\\'."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('[', '\\[')
+
+def _like_prefix(text):
+    return _like_escape(text) + '%'
+
+def _client_query_kind(text):
+    """Clasifica la búsqueda: ('id', n), ('telefono', prefijo), ('email', prefijo) o ('nombre', palabras).
+
+    Regla única para la base y el índice en memoria: el teléfono o el email empiezan por el
+    texto, o cada palabra es el inicio del nombre o del apellido, sin distinguir mayúsculas.
+    Los resultados se ordenan por la columna buscada (apellido y nombre) y luego por ID_Cliente.
+    """
+    if text.startswith('#') and text[1:].isdigit():
+        return 'id', int(text[1:])
+    if re.fullmatch(r"[\d\s+()-]+", text):
+        return 'telefono', text.replace(' ', '')
+    if '@' in text:
+        return 'email', text
+    return 'nombre', text.split()
+
+
+class ClientSearchIndex:
+    """Índice en memoria de Cliente: listas ordenadas de teléfono, email, nombre y apellido.
+
+    Resuelve las búsquedas con la misma regla que search_clients aplica en SQL (prefijos sin
+    distinguir mayúsculas) mediante búsqueda binaria. Los clientes nuevos se cargan de forma
+    incremental (ID_Cliente mayor al último visto); el índice completo se reconstruye al
+    invalidarlo o cuando vence el TTL.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = CATALOG_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._reset()
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._clients = {}
+        self._keys = {'telefono': [], 'email': [], 'nombre': []}  # (texto en minúsculas, ID_Cliente)
+        self._max_id = 0
+        self._built_at = None
+
+    def _add(self, row):
+        id_cliente, nombre, apellido, telefono, email = row
+        self._clients[id_cliente] = tuple(row)
+        bisect.insort(self._keys['telefono'], ((telefono or '').lower(), id_cliente))
+        bisect.insort(self._keys['email'], ((email or '').lower(), id_cliente))
+        for value in (nombre, apellido):
+            bisect.insort(self._keys['nombre'], ((value or '').lower(), id_cliente))
+        self._max_id = max(self._max_id, id_cliente)
+
+    def _refresh(self, cursor):
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at >= self.ttl:
+            self._reset()
+            self._built_at = now
+        cursor.execute("SELECT ID_Cliente, Nombre, Apellido, Telefono, Email FROM Cliente WHERE ID_Cliente > ? ORDER BY ID_Cliente", self._max_id)
+        for batch in iter(lambda: cursor.fetchmany(FETCH_SIZE), []):
+            for row in batch:
+                self._add(row)
+
+    def _prefix(self, kind, prefix):
+        """IDs cuyo valor indexado en kind empieza por prefix."""
+        keys = self._keys[kind]
+        prefix = prefix.lower()
+        ids = set()
+        for value, id_cliente in keys[bisect.bisect_left(keys, (prefix, 0)):]:
+            if not value.startswith(prefix):
+                break
+            ids.add(id_cliente)
+        return ids
+
+    def search(self, cursor, kind, value, limit):
+        """Devuelve las coincidencias, en el mismo orden que la consulta SQL equivalente."""
+        with self._lock:
+            self._refresh(cursor)
+            if kind == 'nombre':
+                ids = set.intersection(*(self._prefix('nombre', word) for word in value)) if value else set()
+                order = lambda i: (self._clients[i][2] or '', self._clients[i][1] or '', i)
+            else:
+                ids = self._prefix(kind, value)
+                column = 3 if kind == 'telefono' else 4
+                order = lambda i: (self._clients[i][column] or '', i)
+            return [self._clients[id_cliente] for id_cliente in sorted(ids, key=order)[:limit]]
+
+
+client_index = ClientSearchIndex()
+
+def search_clients(cursor, text, limit=None):
+    """Busca clientes por '#ID', prefijo de teléfono, email o inicio de nombre/apellido."""
+    limit = limit or CLIENT_SEARCH_LIMIT
+    kind, value = _client_query_kind(text.strip())
+    if kind == 'id':
+        return cursor.execute("SELECT ID_Cliente, Nombre, Apellido, Telefono, Email FROM Cliente WHERE ID_Cliente = ?", value).fetchall()
+    if CLIENT_INDEX_ENABLED:
+        return client_index.search(cursor, kind, value, limit)
+    if kind == 'telefono':
+        where, order, params = "Telefono LIKE ? ESCAPE '\\'", "Telefono, ID_Cliente", [_like_prefix(value)]
+    elif kind == 'email':
+        where, order, params = "Email LIKE ? ESCAPE '\\'", "Email, ID_Cliente", [_like_prefix(value)]
+    else:
+        where = " AND ".join(["(Nombre LIKE ? ESCAPE '\\' OR Apellido LIKE ? ESCAPE '\\')"] * len(value))
+        order, params = "Apellido, Nombre, ID_Cliente", [_like_prefix(word) for word in value for _ in range(2)]
+    return cursor.execute(CLIENT_SEARCH_SQL.format(limit=int(limit), where=where, order=order), params).fetchall()
+
+def prompt_client_search(cursor):
+    """Pide un criterio de búsqueda y muestra las coincidencias.
+
+    Devuelve None si el usuario cancela, o la lista (posiblemente vacía) de coincidencias.
+    """
+    text = input("Buscar cliente por teléfono, email, nombre/apellido o #ID (o 0 para cancelar): ").strip()
+    if text in ('', '0'):
+        return None
+    rows = search_clients(cursor, text)
+    if not rows:
+        print("No se encontraron clientes con ese criterio.")
+        return []
+    print_rows(CLIENT_COLUMNS, rows, f"Clientes que coinciden con '{text}'")
+    return rows
+
+# --- SECCIÓN DE CONSULTAS ESPECIALES ---
+# Reportes de conteo: (título, consulta sobre tablas de resumen, consulta equivalente sobre el historial)
+SPECIAL_QUERIES = {
+    'top_clientes': (
+        "Top 3 Clientes con más pedidos",
+        "SELECT TOP 3 C.ID_Cliente, C.Nombre, C.Apellido, R.TotalPedidos FROM Resumen_Cliente AS R JOIN Cliente AS C ON C.ID_Cliente = R.ID_Cliente ORDER BY R.TotalPedidos DESC;",
+        "SELECT TOP 3 C.ID_Cliente, C.Nombre, C.Apellido, COUNT(P.ID_Pedido) AS TotalPedidos FROM Cliente AS C JOIN Pedido AS P ON C.ID_Cliente = P.ID_Cliente GROUP BY C.ID_Cliente, C.Nombre, C.Apellido ORDER BY TotalPedidos DESC;",
+    ),
+    'pizzas_populares': (
+        "Pizzas ordenadas por demanda",
+        "SELECT P.Nombre_Pizza, R.VecesPedida FROM Resumen_Pizza AS R JOIN Pizza AS P ON P.ID_Pizza = R.ID_Pizza ORDER BY R.VecesPedida DESC;",
+        "SELECT P.Nombre_Pizza, COUNT(DP.ID_Pizza_Menu) AS VecesPedida FROM DetallePedido AS DP JOIN Pizza AS P ON DP.ID_Pizza_Menu = P.ID_Pizza GROUP BY P.Nombre_Pizza ORDER BY VecesPedida DESC;",
+    ),
+    'extras_populares': (
+        "Ingredientes extra más populares",
+        "SELECT TOP 5 I.Nombre_Ingrediente, R.Frecuencia FROM Resumen_Ingrediente AS R JOIN Ingrediente AS I ON I.ID_Ingrediente = R.ID_Ingrediente ORDER BY R.Frecuencia DESC;",
+        "SELECT TOP 5 I.Nombre_Ingrediente, COUNT(PIP.ID_Ingrediente) AS Frecuencia FROM Pizza_Ingrediente_Personalizado AS PIP JOIN Ingrediente AS I ON PIP.ID_Ingrediente = I.ID_Ingrediente GROUP BY I.Nombre_Ingrediente ORDER BY Frecuencia DESC;",
+    ),
+}
+
+def fetch_special_query(cursor, name, include_archive=False):
+    """Ejecuta un reporte de SPECIAL_QUERIES y devuelve (columnas, filas).
+
+    Las tablas de resumen solo cuentan los pedidos vigentes; con include_archive el
+    reporte se calcula sobre los pedidos vigentes y los archivados.
+    """
+    _, summary_sql, live_sql = SPECIAL_QUERIES[name]
+    if include_archive:
+        cursor.execute(with_archive(cursor, live_sql))
+        return [column[0] for column in cursor.description], [tuple(row) for row in cursor.fetchall()]
+    try:
+        cursor.execute(summary_sql)
+    except DB_ERRORS:
+        cursor.execute(live_sql)
+    return [column[0] for column in cursor.description], [tuple(row) for row in cursor.fetchall()]
+
+def prompt_months():
+    """Pide uno o varios meses al usuario y devuelve sus números (1-12)."""
+    meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+    selected_months = []
+    while True:
+        try:
+            print("\nSelecciona un mes para agregar a tu consulta:")
+            for i, mes in enumerate(meses):
+                print(f"{i+1}. {mes}")
+            
+            num_mes = int(input("Ingresa el número del mes (1-12): "))
+            
+            if 1 <= num_mes <= 12:
+                if num_mes not in selected_months:
+                    selected_months.append(num_mes)
+                    print(f"✅ '{meses[num_mes-1]}' ha sido agregado a la consulta.")
+                else:
+                    print(f"'{meses[num_mes-1]}' ya estaba en la lista.")
+            else:
+                print("Número de mes no válido.")
+
+        except ValueError:
+            print("Debes ingresar un número.")
+
+        another_month = input("\n¿Deseas agregar otro mes a la consulta? (s/n): ").lower()
+        if another_month != 's':
+            break
+    return selected_months
+
+def run_special_queries(cursor):
+    """Maneja el submenú de consultas especiales."""
+    meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+    include_archive = REPORTS_INCLUDE_ARCHIVE
+    while True:
+        print("\n--- MENÚ DE CONSULTAS ESPECIALES ---")
+        print("1. Top 3 Clientes con más pedidos")
+        print("2. Pizzas más populares (ordenadas por demanda)")
+        print("3. Pedidos realizados en uno o varios meses")
+        print("4. Ingredientes extra más populares")
+        print("5. Analítica del historial (ingresos, canasta, extras, RFM)")
+        print(f"6. Incluir pedidos archivados: {'Sí' if include_archive else 'No'} (cambiar)")
+        print("7. Volver al menú principal")
+        
+        choice = input("Selecciona una consulta (1-7): ")
+
+        if choice in ('1', '2', '4') and include_archive:
+            name = {'1': 'top_clientes', '2': 'pizzas_populares', '4': 'extras_populares'}[choice]
+            try:
+                cursor.execute(with_archive(cursor, SPECIAL_QUERIES[name][2]))
+                print_results(cursor, SPECIAL_QUERIES[name][0] + " (incluye archivo)")
+            except DB_ERRORS as ex:
+                print(f"\nNo se pudo consultar el archivo histórico (¿ya fue creado?). Error: {ex}")
+        elif choice == '1':
+            description, summary_sql, sql = SPECIAL_QUERIES['top_clientes']
+            run_summary_report(cursor, summary_sql, sql, description)
+        elif choice == '2':
+            description, summary_sql, sql = SPECIAL_QUERIES['pizzas_populares']
+            run_summary_report(cursor, summary_sql, sql, description)
+        elif choice == '3':
+            selected_months = prompt_months()
+            if selected_months:
+                try:
+                    year_text = input("Año o rango de años (ej: 2024 o 2023-2025; Enter para todos): ")
+                    years = order_years(cursor, year_text, include_archive)
+                except ValueError:
+                    print("Año no válido.")
+                    years = None
+                
+                month_names = [meses[m-1] for m in sorted(selected_months)]
+                description = f"Pedidos en los meses de {', '.join(month_names)}"
+                if year_text.strip():
+                    description += f" ({year_text.strip()})"
+                
+                if years:
+                    search_orders_by_date(cursor, month_ranges(selected_months, years), include_archive)
+                    print_results(cursor, description)
+                elif years is not None:
+                    print("\nNo hay pedidos registrados.")
+            else:
+                print("\nNo se seleccionó ningún mes para la consulta.")
+
+        elif choice == '4':
+            description, summary_sql, sql = SPECIAL_QUERIES['extras_populares']
+            run_summary_report(cursor, summary_sql, sql, description)
+        elif choice == '5':
+            run_analytics_menu(cursor)
+        elif choice == '6':
+            include_archive = not include_archive
+        elif choice == '7':
+            break
+        else:
+            print("Opción no válida.")
+        
+        if choice in ['1', '2', '3', '4']:
+             input("\nPresiona Enter para continuar...")
+
+
+# --- ANALÍTICA EN MEMORIA ---
+# IDs por debajo de la marca de agua que cada carga incremental vuelve a leer. En SQL Server
+# el IDENTITY se asigna al insertar y no al confirmar: un pedido con ID menor puede quedar
+# visible después que uno mayor, y leer solo "ID > marca" lo perdería para siempre.
+INCREMENTAL_OVERLAP = 1000
+MONTH_NAMES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+
+def _to_datetime64(values):
+    """Fechas de pyodbc (datetime) o SQLite (texto ISO) como datetime64[s]."""
+    return np.array([v if isinstance(v, datetime) else datetime.fromisoformat(v) for v in values],
+                    dtype='datetime64[us]').astype('datetime64[s]')
+
+
+def _fetch_columns(cursor, sql, *params):
+    """Ejecuta sql y devuelve sus columnas como listas, leyendo en bloques de FETCH_SIZE."""
+    cursor.execute(sql, *params)
+    columns = [[] for _ in cursor.description]
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            return columns
+        for column, values in zip(columns, zip(*batch)):
+            column.extend(values)
+
+
+class OrderAnalytics:
+    """Copia columnar (arrays de NumPy) de Pedido, DetallePedido y sus extras.
+
+    refresh() solo trae los pedidos con ID_Pedido mayor que la marca de agua menos
+    INCREMENTAL_OVERLAP y descarta los que ya tiene, así que después de la primera carga
+    cada actualización lee los pedidos nuevos más una ventana acotada.
+    Todos los reportes se calculan en memoria sobre la misma extracción. Los pedidos
+    modificados o borrados en la base se reflejan con refresh(full=True).
+    """
+
+    def __init__(self):
+        self.watermark = 0
+        self.refreshed_at = None
+        self._reset()
+
+    def _reset(self):
+        self.watermark = 0
+        if np is None:
+            return
+        empty_int, empty_float = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        self.order_id, self.order_client, self.order_total = empty_int, empty_int, empty_float
+        self.order_date = np.empty(0, dtype='datetime64[s]')
+        self.line_id, self.line_order, self.line_pizza, self.line_qty = empty_int, empty_int, empty_int, empty_int
+        self.line_subtotal = empty_float
+        self.extra_line, self.extra_ingredient = empty_int, empty_int
+        self.pizza_names, self.ingredient_names = {}, {}
+
+    def refresh(self, cursor, full=False):
+        """Carga los pedidos nuevos desde la marca de agua; devuelve cuántos se agregaron."""
+        if np is None:
+            raise RuntimeError("El módulo numpy no está instalado; instálalo para usar la analítica.")
+        if full:
+            self._reset()
+        self.pizza_names = dict(cursor.execute("SELECT ID_Pizza, Nombre_Pizza FROM Pizza").fetchall())
+        self.ingredient_names = dict(cursor.execute("SELECT ID_Ingrediente, Nombre_Ingrediente FROM Ingrediente").fetchall())
+        low = max(self.watermark - INCREMENTAL_OVERLAP, 0)
+        ids, clients, dates, totals = _fetch_columns(
+            cursor, "SELECT ID_Pedido, ID_Cliente, Fecha_Hora_Pedido, Total_Pedido FROM Pedido WHERE ID_Pedido > ? ORDER BY ID_Pedido", low)
+        self.refreshed_at = datetime.now()
+        if not ids:
+            return 0
+        high = ids[-1]
+        new = ~np.isin(np.array(ids, dtype=np.int64), self.order_id)
+        if not new.any():
+            return 0
+        # Los detalles se acotan a la misma ventana para no cargar líneas de pedidos aún no leídos
+        line_ids, line_orders, pizzas, quantities, subtotals = _fetch_columns(
+            cursor, "SELECT ID_DetallePedido, ID_Pedido, ID_Pizza_Menu, Cantidad, Subtotal_Detalle FROM DetallePedido "
+                    "WHERE ID_Pedido > ? AND ID_Pedido <= ?", low, high)
+        extra_lines, extra_orders, ingredients = _fetch_columns(
+            cursor, "SELECT PIP.ID_DetallePedido, DP.ID_Pedido, PIP.ID_Ingrediente FROM Pizza_Ingrediente_Personalizado AS PIP "
+                    "JOIN DetallePedido AS DP ON DP.ID_DetallePedido = PIP.ID_DetallePedido "
+                    "WHERE DP.ID_Pedido > ? AND DP.ID_Pedido <= ?", low, high)
+        new_ids = np.array(ids, dtype=np.int64)[new]
+        new_lines = np.isin(np.array(line_orders, dtype=np.int64), new_ids)
+        new_extras = np.isin(np.array(extra_orders, dtype=np.int64), new_ids)
+
+        order_id = np.concatenate([self.order_id, new_ids])
+        order = np.argsort(order_id, kind='stable')  # Los pedidos que llegan tarde quedan entre los ya cargados
+        self.order_id = order_id[order]
+        self.order_client = np.concatenate([self.order_client, np.array(clients, dtype=np.int64)[new]])[order]
+        self.order_date = np.concatenate([self.order_date, _to_datetime64(dates)[new]])[order]
+        self.order_total = np.concatenate([self.order_total, np.array(totals, dtype=np.float64)[new]])[order]
+        self.line_id = np.concatenate([self.line_id, np.array(line_ids, dtype=np.int64)[new_lines]])
+        self.line_order = np.concatenate([self.line_order, np.array(line_orders, dtype=np.int64)[new_lines]])
+        self.line_pizza = np.concatenate([self.line_pizza, np.array(pizzas, dtype=np.int64)[new_lines]])
+        self.line_qty = np.concatenate([self.line_qty, np.array(quantities, dtype=np.int64)[new_lines]])
+        self.line_subtotal = np.concatenate([self.line_subtotal, np.array(subtotals, dtype=np.float64)[new_lines]])
+        self.extra_line = np.concatenate([self.extra_line, np.array(extra_lines, dtype=np.int64)[new_extras]])
+        self.extra_ingredient = np.concatenate([self.extra_ingredient, np.array(ingredients, dtype=np.int64)[new_extras]])
+        self.watermark = max(self.watermark, high)
+        return int(new.sum())
+
+    def _line_order_index(self):
+        """Posición en los arrays de pedidos de cada línea de detalle (order_id está ordenado)."""
+        return np.searchsorted(self.order_id, self.line_order)
+
+    def revenue_by_month(self):
+        months, inverse = np.unique(self.order_date.astype('datetime64[M]'), return_inverse=True)
+        revenue = np.bincount(inverse, weights=self.order_total, minlength=len(months))
+        orders = np.bincount(inverse, minlength=len(months))
+        rows = [(str(month), int(count), round(float(total), 2), round(float(total / count), 2))
+                for month, count, total in zip(months, orders, revenue)]
+        return ["Mes", "Pedidos", "Ingresos", "Ticket_Promedio"], rows
+
+    def revenue_by_pizza(self):
+        pizzas, inverse = np.unique(self.line_pizza, return_inverse=True)
+        revenue = np.bincount(inverse, weights=self.line_subtotal, minlength=len(pizzas))
+        units = np.bincount(inverse, weights=self.line_qty, minlength=len(pizzas))
+        order = np.argsort(-revenue)
+        rows = [(self.pizza_names.get(int(pizzas[i]), pizzas[i]), int(units[i]), round(float(revenue[i]), 2)) for i in order]
+        return ["Pizza", "Unidades", "Ingresos"], rows
+
+    def revenue_by_month_and_pizza(self):
+        line_month = self.order_date.astype('datetime64[M]')[self._line_order_index()]
+        months, month_idx = np.unique(line_month, return_inverse=True)
+        pizzas, pizza_idx = np.unique(self.line_pizza, return_inverse=True)
+        cells = month_idx * len(pizzas) + pizza_idx
+        size = len(months) * len(pizzas)
+        revenue = np.bincount(cells, weights=self.line_subtotal, minlength=size).reshape(len(months), len(pizzas))
+        units = np.bincount(cells, weights=self.line_qty, minlength=size).reshape(len(months), len(pizzas))
+        rows = []
+        for m, month in enumerate(months):
+            for p in np.argsort(-revenue[m]):
+                if units[m, p]:
+                    rows.append((str(month), self.pizza_names.get(int(pizzas[p]), pizzas[p]), int(units[m, p]), round(float(revenue[m, p]), 2)))
+        return ["Mes", "Pizza", "Unidades", "Ingresos"], rows
+
+    def basket_sizes(self):
+        """Distribución de pizzas (unidades) por pedido."""
+        sizes = np.bincount(self._line_order_index(), weights=self.line_qty, minlength=len(self.order_id)).astype(np.int64)
+        values, counts = np.unique(sizes, return_counts=True)
+        rows = [(int(v), int(c), round(100.0 * c / len(sizes), 2)) for v, c in zip(values, counts)]
+        return ["Pizzas_por_Pedido", "Pedidos", "Porcentaje"], rows
+
+    def extras_attach_rate(self):
+        """Porcentaje de líneas con al menos un extra y extras promedio por línea, por pizza."""
+        line_order = np.argsort(self.line_id)
+        positions = line_order[np.searchsorted(self.line_id, self.extra_line, sorter=line_order)]
+        extras_per_line = np.bincount(positions, minlength=len(self.line_id))
+        pizzas, inverse = np.unique(self.line_pizza, return_inverse=True)
+        lines = np.bincount(inverse, minlength=len(pizzas))
+        with_extras = np.bincount(inverse, weights=extras_per_line > 0, minlength=len(pizzas))
+        extras = np.bincount(inverse, weights=extras_per_line, minlength=len(pizzas))
+        rows = [(self.pizza_names.get(int(pizzas[i]), pizzas[i]), int(lines[i]), int(with_extras[i]),
+                 round(100.0 * with_extras[i] / lines[i], 2), round(float(extras[i] / lines[i]), 2))
+                for i in np.argsort(-(with_extras / np.maximum(lines, 1)))]
+        if len(self.line_id):
+            rows.append(("TOTAL", len(self.line_id), int((extras_per_line > 0).sum()),
+                         round(100.0 * (extras_per_line > 0).mean(), 2), round(float(extras_per_line.mean()), 2)))
+        return ["Pizza", "Lineas", "Con_Extras", "Tasa_%", "Extras_por_Linea"], rows
+
+    def rfm_scores(self, reference=None):
+        """Recencia (días), frecuencia, monto y puntajes 1-5 por quintil para cada cliente.
+
+        Devuelve (clientes, recencia, frecuencia, monto, puntaje_r, puntaje_f, puntaje_m).
+        """
+        clients, inverse = np.unique(self.order_client, return_inverse=True)
+        if reference is None:
+            reference = self.order_date.max() + np.timedelta64(1, 'D') if len(self.order_date) else np.datetime64('now', 's')
+        last = np.full(len(clients), np.datetime64(0, 's'))
+        np.maximum.at(last, inverse, self.order_date)
+        recency = (np.datetime64(reference, 's') - last).astype('timedelta64[D]').astype(np.int64)
+        frequency = np.bincount(inverse, minlength=len(clients))
+        monetary = np.bincount(inverse, weights=self.order_total, minlength=len(clients))
+
+        def quintile(values):
+            ranks = np.empty(len(values), dtype=np.int64)
+            ranks[np.argsort(values, kind='stable')] = np.arange(len(values))
+            return 1 + ranks * 5 // max(len(values), 1)
+
+        return clients, recency, frequency, monetary, quintile(-recency), quintile(frequency), quintile(monetary)
+
+    def rfm_segments(self, reference=None):
+        clients, recency, frequency, monetary, r, f, m = self.rfm_scores(reference)
+        segments = np.select(
+            [(r >= 4) & (f >= 4), f >= 4, (r <= 2) & (f >= 3), (r >= 4) & (f <= 2), (r <= 2) & (f <= 2)],
+            ["Campeones", "Leales", "En riesgo", "Nuevos", "Perdidos"], default="Regulares")
+        rows = []
+        for segment in ["Campeones", "Leales", "Regulares", "Nuevos", "En riesgo", "Perdidos"]:
+            mask = segments == segment
+            if mask.any():
+                rows.append((segment, int(mask.sum()), round(float(frequency[mask].mean()), 1),
+                             round(float(monetary[mask].mean()), 2), round(float(recency[mask].mean()), 1)))
+        return ["Segmento", "Clientes", "Pedidos_Prom", "Gasto_Prom", "Dias_desde_ultimo"], rows
+
+
+ANALYTICS_REPORTS = {
+    'mes': ("Ingresos por mes", OrderAnalytics.revenue_by_month),
+    'pizza': ("Ingresos por pizza", OrderAnalytics.revenue_by_pizza),
+    'mes-pizza': ("Ingresos por mes y pizza", OrderAnalytics.revenue_by_month_and_pizza),
+    'canasta': ("Distribución del tamaño de los pedidos", OrderAnalytics.basket_sizes),
+    'extras': ("Tasa de pedidos con ingredientes extra", OrderAnalytics.extras_attach_rate),
+    'rfm': ("Segmentación RFM de clientes", OrderAnalytics.rfm_segments),
+}
+
+analytics = OrderAnalytics()
+
+
+def run_analytics_menu(cursor):
+    """Actualiza la copia en memoria una vez y permite ver varios reportes sin volver al servidor."""
+    try:
+        added = analytics.refresh(cursor)
+    except RuntimeError as ex:
+        print(f"\n{ex}")
+        return
+    print(f"\nHistorial en memoria: {len(analytics.order_id)} pedidos ({added} nuevos desde la última carga).")
+    names = list(ANALYTICS_REPORTS)
+    while True:
+        for i, name in enumerate(names, 1):
+            print(f"{i}. {ANALYTICS_REPORTS[name][0]}")
+        print(f"{len(names) + 1}. Volver")
+        choice = input(f"Selecciona un reporte (1-{len(names) + 1}): ")
+        if not choice.isdigit() or not 1 <= int(choice) <= len(names):
+            break
+        description, report = ANALYTICS_REPORTS[names[int(choice) - 1]]
+        columns, rows = report(analytics)
+        print_rows(columns, rows, description)
+        input("\nPresiona Enter para continuar...")
+
+
+# --- TABLERO EN VIVO ---
+# Funciones llamadas con (ID_Pedido, total, carrito) después de cada pedido confirmado en este
+# proceso, desde el menú (place_order) o la API (OrderService.create_orders)
+order_listeners = []
+DASHBOARD_TOP = 5
+
+
+class _RollingWindow:
+    """Contadores por intervalo (minuto u hora) en un anillo de `slots` posiciones.
+
+    Agregar un pedido toca una sola posición; las posiciones de intervalos vencidos se
+    reutilizan al volver a escribirlas y se ignoran al sumar.
+    """
+
+    def __init__(self, seconds, slots):
+        self.seconds = seconds
+        self.slots = [[None, 0, 0.0, defaultdict(int), defaultdict(int)] for _ in range(slots)]
+
+    def add(self, now, total, pizzas, extras):
+        period = int(now // self.seconds)
+        slot = self.slots[period % len(self.slots)]
+        if slot[0] != period:
+            slot[:] = [period, 0, 0.0, defaultdict(int), defaultdict(int)]
+        slot[1] += 1
+        slot[2] += total
+        for pizza, units in pizzas:
+            slot[3][pizza] += units
+        for extra in extras:
+            slot[4][extra] += 1
+
+    def live(self, now):
+        """Posiciones vigentes, de la más antigua a la más reciente."""
+        current = int(now // self.seconds)
+        valid = [slot for slot in self.slots if slot[0] is not None and current - len(self.slots) < slot[0] <= current]
+        return sorted(valid, key=lambda slot: slot[0])
+
+    def totals(self, now):
+        orders, revenue, pizzas, extras = 0, 0.0, defaultdict(int), defaultdict(int)
+        for _, n, amount, slot_pizzas, slot_extras in self.live(now):
+            orders += n
+            revenue += amount
+            for key, value in slot_pizzas.items():
+                pizzas[key] += value
+            for key, value in slot_extras.items():
+                extras[key] += value
+        return orders, revenue, pizzas, extras
+
+
+class LiveDashboard:
+    """Ventas de la sesión por minuto (última hora) y por hora (últimas 24 h).
+
+    Se alimenta de los pedidos confirmados en esta terminal (order_listeners) y de un
+    sondeo de los ID_Pedido mayores que la marca de agua, que trae los de otras
+    terminales. Cada pedido cuesta O(líneas) y nunca se vuelve a leer el historial.
+    """
+
+    def __init__(self):
+        self.minutes = _RollingWindow(60, 60)
+        self.hours = _RollingWindow(3600, 24)
+        self.watermark = None
+        self.pizza_names, self.ingredient_names = {}, {}
+        self._recorded = set()  # Pedidos de esta terminal aún no alcanzados por el sondeo
+        self._lock = threading.Lock()
+
+    def _add(self, total, pizzas, extras, now=None):
+        now = time.time() if now is None else now
+        total = float(total)
+        self.minutes.add(now, total, pizzas, extras)
+        self.hours.add(now, total, pizzas, extras)
+
+    def record(self, id_pedido, total, carrito):
+        """Hook de place_order: suma un pedido recién confirmado."""
+        with self._lock:
+            if self.watermark is not None and id_pedido <= self.watermark:
+                return
+            self._recorded.add(id_pedido)
+            self._add(total, [(item['id_pizza'], item['cantidad']) for item in carrito],
+                      [extra for item in carrito for extra in item['extras']])
+
+    def poll(self, cursor, limit=1000):
+        """Suma los pedidos nuevos de otras terminales; devuelve cuántos encontró."""
+        if self.watermark is None:
+            self.watermark = cursor.execute("SELECT MAX(ID_Pedido) FROM Pedido").fetchval() or 0
+            self._recorded = {id_pedido for id_pedido in self._recorded if id_pedido > self.watermark}
+            return 0
+        orders = cursor.execute(f"SELECT TOP {int(limit)} ID_Pedido, Total_Pedido FROM Pedido WHERE ID_Pedido > ? ORDER BY ID_Pedido",
+                                self.watermark).fetchall()
+        if not orders:
+            return 0
+        low, high = self.watermark, orders[-1][0]
+        pizzas, extras = defaultdict(list), defaultdict(list)
+        for id_pedido, pizza, units in cursor.execute(
+                "SELECT ID_Pedido, ID_Pizza_Menu, Cantidad FROM DetallePedido WHERE ID_Pedido > ? AND ID_Pedido <= ?", low, high).fetchall():
+            pizzas[id_pedido].append((pizza, units))
+        for id_pedido, extra in cursor.execute(
+                "SELECT DP.ID_Pedido, PIP.ID_Ingrediente FROM Pizza_Ingrediente_Personalizado AS PIP "
+                "JOIN DetallePedido AS DP ON DP.ID_DetallePedido = PIP.ID_DetallePedido "
+                "WHERE DP.ID_Pedido > ? AND DP.ID_Pedido <= ?", low, high).fetchall():
+            extras[id_pedido].append(extra)
+        with self._lock:
+            for id_pedido, total in orders:
+                if id_pedido in self._recorded:
+                    continue  # Ya sumado por el hook de esta terminal
+                self._add(total, pizzas[id_pedido], extras[id_pedido])
+            self.watermark = high
+            self._recorded = {id_pedido for id_pedido in self._recorded if id_pedido > high}
+        unknown_pizzas = {pizza for lines in pizzas.values() for pizza, _ in lines} - self.pizza_names.keys()
+        unknown_extras = {extra for values in extras.values() for extra in values} - self.ingredient_names.keys()
+        if unknown_pizzas or unknown_extras or not self.pizza_names:
+            self.load_names(cursor)
+        return len(orders)
+
+    def load_names(self, cursor):
+        self.pizza_names = dict(cursor.execute("SELECT ID_Pizza, Nombre_Pizza FROM Pizza").fetchall())
+        self.ingredient_names = dict(cursor.execute("SELECT ID_Ingrediente, Nombre_Ingrediente FROM Ingrediente").fetchall())
+
+    def render(self, now=None):
+        """Texto del tablero; solo suma los 60 + 24 intervalos, no los pedidos."""
+        now = time.time() if now is None else now
+        with self._lock:
+            hour = self.minutes.totals(now)
+            day = self.hours.totals(now)
+            per_minute = {slot[0]: slot[1] for slot in self.minutes.live(now)}
+        current = int(now // 60)
+        lines = [f"=== TABLERO EN VIVO · {datetime.fromtimestamp(now):%H:%M:%S} (Ctrl+C para volver) ===", ""]
+        for label, (orders, revenue, _, _) in (("Última hora", hour), ("Últimas 24 h", day)):
+            average = revenue / orders if orders else 0.0
+            lines.append(f"{label:<13} pedidos: {orders:>5}   ingresos: ${revenue:>10.2f}   ticket: ${average:>7.2f}")
+        counts = [per_minute.get(current - i, 0) for i in range(14, -1, -1)]
+        peak = max(counts) or 1
+        lines += ["", "Pedidos por minuto (últimos 15):"]
+        for i, count in enumerate(counts):
+            minute = datetime.fromtimestamp((current - 14 + i) * 60)
+            lines.append(f"  {minute:%H:%M} {'█' * round(20 * count / peak):<20} {count}")
+        for title, counter, names in (("Pizzas más vendidas (última hora)", hour[2], self.pizza_names),
+                                      ("Extras más pedidos (última hora)", hour[3], self.ingredient_names)):
+            lines += ["", title + ":"]
+            top = sorted(counter.items(), key=lambda item: -item[1])[:DASHBOARD_TOP]
+            lines += [f"  {names.get(key, key)!s:<20} {value}" for key, value in top] or ["  (sin pedidos)"]
+        return "\n".join(lines)
+
+
+def run_dashboard(pool, dashboard, interval=2.0, iterations=None):
+    """Redibuja el tablero en el mismo lugar cada `interval` segundos hasta Ctrl+C."""
+    shown = 0
+    try:
+        while iterations is None or shown < iterations:
+            with pool.connection() as cnxn:
+                cursor = cnxn.cursor()
+                while dashboard.poll(cursor):
+                    pass  # Pone al día la marca de agua si llegaron muchos pedidos
+                if not dashboard.pizza_names:
+                    dashboard.load_names(cursor)
+            sys.stdout.write("\033[H\033[J" + dashboard.render() + "\n")
+            sys.stdout.flush()
+            shown += 1
+            if iterations is None or shown < iterations:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
+
+
+# --- SECCIÓN DE OPERACIONES ---
+
+def insert_client(cnxn, cursor, nombre, apellido, telefono, email=None, direccion=None):
+    """Inserta un cliente y confirma la transacción; devuelve su ID."""
+    sql = "INSERT INTO Cliente (Nombre, Apellido, Telefono, Email, Direccion_Completa) OUTPUT INSERTED.ID_Cliente VALUES (?, ?, ?, ?, ?)"
+    params = (nombre, apellido, telefono, email if email else None, direccion)
+    try:
+        new_client_id = cursor.execute(sql, params).fetchval()
+        cnxn.commit()
+    except DB_ERRORS:
+        cnxn.rollback()
+        raise
+    return new_client_id
+
+def notify_order(id_pedido, total, carrito):
+    """Avisa a order_listeners de un pedido ya confirmado."""
+    for listener in order_listeners:
+        listener(id_pedido, total, carrito)
+
+def place_order(cnxn, cursor, id_cliente, fecha, direccion, total, carrito):
+    """Guarda un pedido ya calculado y confirma la transacción; devuelve el ID del pedido."""
+    try:
+        id_pedido, _ = backend_for(cursor).insert_order(cursor, id_cliente, fecha, direccion, total, carrito)
+        cnxn.commit()
+    except DB_ERRORS:
+        cnxn.rollback()
+        raise
+    notify_order(id_pedido, total, carrito)
+    return id_pedido
+
+def create_new_client(cnxn, cursor, show_title=True):
+    """Guía la creación de un nuevo cliente y devuelve su ID si tiene éxito."""
+    if show_title:
+        print("\n--- Creación de Nuevo Cliente ---")
+    try:
+        # MEJORA: Permitir cancelar en cualquier paso
+        nombre = input("Nombre del cliente (o escriba 'cancelar' para salir): ")
+        if nombre.lower() == 'cancelar': return None
+        apellido = input("Apellido del cliente (o escriba 'cancelar' para salir): ")
+        if apellido.lower() == 'cancelar': return None
+        telefono = input("Teléfono (único) (o escriba 'cancelar' para salir): ")
+        if telefono.lower() == 'cancelar': return None
+        email = input("Email (único, opcional) (o escriba 'cancelar' para salir): ")
+        if email.lower() == 'cancelar': return None
+        direccion = input("Dirección (o escriba 'cancelar' para salir): ")
+        if direccion.lower() == 'cancelar': return None
+        
+        new_client_id = insert_client(cnxn, cursor, nombre, apellido, telefono, email, direccion)
+        
+        print(f"\n✅ ¡Cliente '{nombre} {apellido}' creado con éxito! (ID: {new_client_id})")
+        return new_client_id
+        
+    except DB_INTEGRITY_ERRORS:
+        print("\nERROR: No se pudo crear el cliente. El teléfono o email ya existen.")
+        return None
+    except DB_ERRORS as ex:
+        print(f"\nOcurrió un error inesperado: {ex}")
+        return None
+
+def create_new_order(cnxn, cursor, journal=None):
+    """Guía al usuario para crear un pedido completo.
+
+    Con un diario (OrderJournal) el pedido terminado se registra localmente y se envía
+    a la base de datos en segundo plano, sin esperar al servidor.
+    """
+    print("\n--- Creación de un Nuevo Pedido ---")
+    
+    id_cliente = None
+    while True:
+        is_new_client = input("¿El pedido es para un cliente nuevo? (s/n): ").lower()
+        if is_new_client == 's':
+            id_cliente = create_new_client(cnxn, cursor, show_title=False)
+            if id_cliente is not None:
+                break
+            else:
+                print("Creación de cliente cancelada.")
+                return # Salir si la creación del cliente se cancela
+        elif is_new_client == 'n':
+            matches = prompt_client_search(cursor)
+            if matches is None:
+                print("Selección de cliente cancelada.")
+                return
+            if not matches:
+                continue
+            try:
+                id_cliente_str = input("Ingresa el ID del cliente que realiza el pedido (o 0 para cancelar): ")
+                id_cliente = int(id_cliente_str)
+                if id_cliente == 0:
+                    print("Selección de cliente cancelada.")
+                    return
+                if cursor.execute("SELECT 1 FROM Cliente WHERE ID_Cliente = ?", id_cliente).fetchone():
+                    break
+                else:
+                    print("ID de cliente no existe. Inténtalo de nuevo.")
+            except ValueError:
+                print("ID de cliente no válido.")
+        else:
+            print("Opción no válida. Por favor, responde 's' o 'n'.")
+            
+    if id_cliente is None:
+        print("No se pudo definir un cliente. Pedido cancelado.")
+        return
+
+    carrito = []
+    total_pedido = 0.0
+    while True:
+        if not print_rows(["ID_Pizza", "Nombre_Pizza", "Precio_Base_Pizza"], catalog.available_pizzas(cursor), "Menú de Pizzas"):
+            return
+        try:
+            id_pizza = int(input("Ingresa el ID de la pizza a agregar (o 0 para terminar): "))
+            if id_pizza == 0: break
+            
+            precio_unitario = catalog.pizza_price(cursor, id_pizza)
+            if precio_unitario is None:
+                print("ID de pizza no válido.")
+                continue
+            
+            cantidad = int(input(f"Cantidad de esta pizza: "))
+
+            extras = []
+            while True:
+                add_extra = input("¿Deseas agregar un ingrediente extra a esta pizza? (s/n): ").lower()
+                if add_extra == 'n': break
+                if add_extra == 's':
+                    if not print_rows(["ID_Ingrediente", "Nombre_Ingrediente", "Precio_Adicional_Ingrediente"], catalog.extra_ingredients(cursor), "Ingredientes Extra Disponibles"):
+                        break
+                    try:
+                        id_ingrediente = int(input("Ingresa el ID del ingrediente extra (o 0 para terminar con esta pizza): "))
+                        if id_ingrediente == 0: break
+                        precio_extra = catalog.ingredient_price(cursor, id_ingrediente)
+                        if precio_extra is not None:
+                            precio_unitario += precio_extra
+                            extras.append(id_ingrediente)
+                            print("Ingrediente añadido.")
+                        else:
+                            print("ID de ingrediente no válido.")
+                    except ValueError:
+                        print("Entrada no válida.")
+            
+            subtotal = precio_unitario * cantidad
+            carrito.append({'id_pizza': id_pizza, 'cantidad': cantidad, 'precio_unitario': precio_unitario, 'subtotal': subtotal, 'extras': extras})
+            total_pedido += subtotal
+            print(f"\nSubtotal actual del pedido: ${total_pedido:.2f}")
+
+        except ValueError:
+            print("Entrada no válida. Por favor, ingresa números.")
+    
+    if not carrito:
+        print("No se agregaron pizzas. Pedido cancelado.")
+        return
+        
+    direccion_entrega = input("Ingresa la dirección de entrega: ")
+    meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+    for i, mes in enumerate(meses):
+        print(f"{i+1}. {mes}")
+    try:
+        num_mes = int(input("Selecciona el mes del pedido (1-12): "))
+        if not 1 <= num_mes <= 12: raise ValueError()
+        
+        now = datetime.now()
+        # El día de hoy puede no existir en el mes elegido (31 en febrero): se usa el último del mes
+        dia = min(now.day, calendar.monthrange(now.year, num_mes)[1])
+        fecha_pedido = datetime(now.year, num_mes, dia, now.hour, now.minute, now.second)
+
+    except ValueError:
+        print("Mes no válido. Pedido cancelado.")
+        return
+
+    if journal is not None:
+        clave = journal.append(id_cliente, fecha_pedido, direccion_entrega, total_pedido, carrito)
+        print("\n✅ ¡Pedido registrado! Se guardará en la base de datos en segundo plano.")
+        print(f"Clave del pedido: {clave}, Total: ${total_pedido:.2f}")
+        return
+
+    try:
+        id_pedido_nuevo = place_order(cnxn, cursor, id_cliente, fecha_pedido, direccion_entrega, total_pedido, carrito)
+        print("\n✅ ¡Pedido creado exitosamente en la base de datos!")
+        print(f"ID del nuevo pedido: {id_pedido_nuevo}, Total: ${total_pedido:.2f}")
+
+    except DB_ERRORS as ex:
+        print(f"\n❌ Ocurrió un error al guardar el pedido. Se revirtieron los cambios. Error: {ex}")
+
+# --- SECCIÓN DE MANTENIMIENTO ---
+
+def add_new_pizza(cnxn, cursor):
+    """Guía la creación de una nueva pizza."""
+    print("\n--- Agregar Nueva Pizza ---")
+    try:
+        nombre = input("Nombre de la pizza (o escriba 'cancelar' para salir): ")
+        if nombre.lower() == 'cancelar': return
+        desc = input("Descripción (o escriba 'cancelar' para salir): ")
+        if desc.lower() == 'cancelar': return
+        precio_str = input("Precio base (o escriba 'cancelar' para salir): ")
+        if precio_str.lower() == 'cancelar': return
+        precio = float(precio_str)
+        
+        sql = "INSERT INTO Pizza (Nombre_Pizza, Descripcion_Pizza, Precio_Base_Pizza) VALUES (?, ?, ?)"
+        cursor.execute(sql, nombre, desc, precio)
+        cnxn.commit()
+        catalog.invalidate()
+        print(f"\n✅ ¡Pizza '{nombre}' agregada con éxito!")
+    except DB_INTEGRITY_ERRORS:
+        print("\nERROR: Ya existe una pizza con ese nombre.")
+    except (ValueError, TypeError):
+        print("\nError: El precio debe ser un número válido.")
+    except DB_ERRORS as ex:
+        print(f"\nOcurrió un error: {ex}")
+
+def add_new_ingredient(cnxn, cursor):
+    """Guía la creación de un nuevo ingrediente."""
+    print("\n--- Agregar Nuevo Ingrediente ---")
     try:
-        columns = [column[0] for column in cursor.description]
-        header = " | ".join(f"{col: <20}" for col in columns)
-        print(header)
-        print("-" * len(header))
+        nombre = input("Nombre del ingrediente (o escriba 'cancelar' para salir): ")
+        if nombre.lower() == 'cancelar': return
+        precio_str = input("Precio adicional (o escriba 'cancelar' para salir): ")
+        if precio_str.lower() == 'cancelar': return
+        precio = float(precio_str)
+        tipo = input("Tipo de ingrediente (Ej: Extra Queso) (o escriba 'cancelar' para salir): ")
+        if tipo.lower() == 'cancelar': return
+        
+        sql = "INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente, Tipo_Ingrediente) VALUES (?, ?, ?)"
+        cursor.execute(sql, nombre, precio, tipo)
+        cnxn.commit()
+        catalog.invalidate()
+        print(f"\n✅ ¡Ingrediente '{nombre}' agregado con éxito!")
+    except DB_INTEGRITY_ERRORS:
+        print("\nERROR: Ya existe un ingrediente con ese nombre.")
+    except (ValueError, TypeError):
+        print("\nError: El precio debe ser un número válido.")
+    except DB_ERRORS as ex:
+        print(f"\nOcurrió un error: {ex}")
+
+def handle_maintenance(cnxn, cursor):
+    """Submenú para elegir qué tabla modificar."""
+    while True:
+        print("\n--- Mantenimiento de Registros ---")
+        print("¿Qué tabla deseas modificar?")
+        print("1. Cliente")
+        print("2. Pizza")
+        print("3. Ingrediente")
+        print("4. Tablas de resumen (verificar / reconstruir)")
+        print("5. Índices (crear / revisar)")
+        print("6. Archivar pedidos antiguos")
+        print("7. Volver al Menú Principal")
+        
+        choice = input("Selecciona una opción (1-7): ")
+        
+        if choice == '1':
+            update_delete_menu(cnxn, cursor, 'Cliente', 'ID_Cliente')
+        elif choice == '2':
+            update_delete_menu(cnxn, cursor, 'Pizza', 'ID_Pizza')
+        elif choice == '3':
+            update_delete_menu(cnxn, cursor, 'Ingrediente', 'ID_Ingrediente')
+        elif choice == '4':
+            handle_summaries(cnxn, cursor)
+        elif choice == '5':
+            handle_indexes(cnxn, cursor)
+        elif choice == '6':
+            handle_archive(cnxn, cursor)
+        elif choice == '7':
+            break
+        else:
+            print("Opción no válida.")
+
+def update_delete_menu(cnxn, cursor, table_name, pk_name):
+    """Menú genérico para CRUD en una tabla específica."""
+    while True:
+        print(f"\n--- Modificando tabla: {table_name} ---")
+        print("1. Agregar nuevo registro")
+        print("2. Actualizar un registro existente")
+        print("3. Borrar un registro existente")
+        if table_name in BULK_TABLES:
+            print("4. Cambios masivos (precios, disponibilidad, borrado)")
+        print("5. Volver al menú de mantenimiento")
+
+        choice = input("Selecciona una operación (1-5): ")
+
+        if choice == '1': # AGREGAR
+            if table_name == 'Cliente':
+                create_new_client(cnxn, cursor)
+            elif table_name == 'Pizza':
+                add_new_pizza(cnxn, cursor)
+            elif table_name == 'Ingrediente':
+                add_new_ingredient(cnxn, cursor)
+        
+        elif choice == '2': # ACTUALIZAR
+            print(f"\n--- Actualizar en '{table_name}' ---")
+            if table_name == 'Cliente':
+                if not prompt_client_search(cursor):
+                    continue
+            elif not print_results(cursor.execute(f"SELECT * FROM {table_name}"), f"Registros en {table_name}"):
+                continue
+            try:
+                pk_value_str = input(f"Ingresa el {pk_name} del registro a actualizar (o 0 para cancelar): ")
+                pk_value = int(pk_value_str)
+                if pk_value == 0: continue
+
+                if table_name == 'Cliente':
+                    while True:
+                        print("\n¿Qué campo del cliente deseas actualizar?")
+                        print("1. Nombre | 2. Apellido | 3. Teléfono | 4. Email | 5. Dirección | 6. Cancelar")
+                        field_choice = input("Selecciona un campo: ")
+                        if field_choice == '1': field_to_update = 'Nombre'
+                        elif field_choice == '2': field_to_update = 'Apellido'
+                        elif field_choice == '3': field_to_update = 'Telefono'
+                        elif field_choice == '4': field_to_update = 'Email'
+                        elif field_choice == '5': field_to_update = 'Direccion_Completa'
+                        elif field_choice == '6': break
+                        else:
+                            print("Opción no válida.")
+                            continue
+                        
+                        new_value = input(f"Ingresa el nuevo valor para '{field_to_update}' (o escriba 'cancelar'): ")
+                        if new_value.lower() == 'cancelar': break
+                        sql = f"UPDATE Cliente SET {field_to_update} = ? WHERE ID_Cliente = ?"
+                        params = (new_value, pk_value)
+                        break
+                else: # Lógica para Pizza e Ingrediente
+                    if table_name == 'Pizza':
+                        new_value_str = input("Ingresa el nuevo precio base (o escriba 'cancelar'): ")
+                        if new_value_str.lower() == 'cancelar': continue
+                        new_value = float(new_value_str)
+                        sql = f"UPDATE Pizza SET Precio_Base_Pizza = ? WHERE ID_Pizza = ?"
+                    elif table_name == 'Ingrediente':
+                        new_value_str = input("Ingresa el nuevo precio adicional (o escriba 'cancelar'): ")
+                        if new_value_str.lower() == 'cancelar': continue
+                        new_value = float(new_value_str)
+                        sql = f"UPDATE Ingrediente SET Precio_Adicional_Ingrediente = ? WHERE ID_Ingrediente = ?"
+                    params = (new_value, pk_value)
+                
+                if 'sql' in locals() and 'params' in locals():
+                    column = sql.split(' SET ')[1].split(' = ')[0]
+                    old_value = cursor.execute(f"SELECT {column} FROM {table_name} WHERE {pk_name} = ?", pk_value).fetchval()
+                    cursor.execute(sql, params)
+                    if cursor.rowcount > 0:
+                        cnxn.commit()
+                        if table_name in ('Pizza', 'Ingrediente'):
+                            catalog.invalidate()
+                        elif table_name == 'Cliente':
+                            client_index.invalidate()
+                        print("\n¡Actualización completada!")
+                        print_rows([pk_name, "Campo", "Antes", "Después"], [(pk_value, column, old_value, params[0])], "Cambio aplicado")
+                    else:
+                        print("\nNo se encontró ningún registro con ese ID.")
+
+            except (ValueError, TypeError):
+                print("\nError: Entrada no válida.")
+            except DB_ERRORS as ex:
+                print(f"\nOcurrió un error: {ex}")
+        
+        elif choice == '3': # BORRAR
+            print(f"\n--- Borrar en '{table_name}' ---")
+            if table_name == 'Cliente':
+                if not prompt_client_search(cursor):
+                    continue
+            elif not print_results(cursor.execute(f"SELECT * FROM {table_name}"), f"Registros en {table_name}"):
+                continue
+            try:
+                pk_value_str = input(f"Ingresa el {pk_name} del registro a borrar (o 0 para cancelar): ")
+                pk_value = int(pk_value_str)
+                if pk_value == 0: continue
+
+                if not print_results(cursor.execute(f"SELECT * FROM {table_name} WHERE {pk_name} = ?", pk_value), "Registro a borrar"):
+                    print("\nNo se encontró ningún registro con ese ID.")
+                    input("\nPresiona Enter para continuar...")
+                    continue
+                if input("¿Confirmas el borrado? (s/n): ").lower() != 's':
+                    print("Borrado cancelado.")
+                    input("\nPresiona Enter para continuar...")
+                    continue
+
+                sql = f"DELETE FROM {table_name} WHERE {pk_name} = ?"
+                cursor.execute(sql, pk_value)
+                
+                if cursor.rowcount > 0:
+                    cnxn.commit()
+                    if table_name in ('Pizza', 'Ingrediente'):
+                        catalog.invalidate()
+                    elif table_name == 'Cliente':
+                        client_index.invalidate()
+                    print("\n¡Registro eliminado exitosamente!")
+                else:
+                    print("\nNo se encontró ningún registro con ese ID.")
+
+            except DB_INTEGRITY_ERRORS:
+                print("\n❌ ERROR DE ELIMINACIÓN: No se puede eliminar este registro.")
+                print("Motivo: Otros datos en la base de datos dependen de él (ej: un cliente con pedidos, una pizza en un pedido).")
+            except ValueError:
+                print("\nError: El ID debe ser un número.")
+            except DB_ERRORS as ex:
+                print(f"\nOcurrió un error inesperado: {ex}")
         
-        rows = cursor.fetchall()
-        if not rows:
-            print("La consulta no devolvió resultados.")
+        elif choice == '4' and table_name in BULK_TABLES:
+            handle_bulk_maintenance(cnxn, cursor, table_name)
+        elif choice == '5':
+            break
+        else:
+            print("Opción no válida.")
+        input("\nPresiona Enter para continuar...")
+
+
+def dump_tables(cursor, fmt, folder='.'):
+    """Vuelca cada tabla a un archivo CSV o JSON Lines dentro de folder."""
+    tables = ['Cliente', 'Pizza', 'Ingrediente', 'Pedido', 'DetallePedido', 'Pizza_Ingrediente_Personalizado']
+    extension = 'csv' if fmt == 'csv' else 'jsonl'
+    for table in tables:
+        path = os.path.join(folder, f"{table}.{extension}")
+        with open(path, 'w', encoding='utf-8', newline='') as out:
+            print_results(cursor.execute(f"SELECT * FROM {table}"), fmt=fmt, out=out)
+        print(f"✅ Tabla {table} exportada a {path}")
+
+
+# --- EXPORTACIÓN COLUMNAR ---
+# (tabla, clave incremental o None si se exporta completa, columnas tipadas, filtro por fecha de pedido)
+# Las tablas de pedidos solo crecen y se exportan por marca de agua; las de catálogo y clientes
+# cambian en su lugar, así que se reescriben completas en cada corrida.
+EXPORT_TABLES = [
+    ('Cliente', None, [('ID_Cliente', 'int'), ('Nombre', 'str'), ('Apellido', 'str'), ('Telefono', 'str'),
+                       ('Email', 'str'), ('Direccion_Completa', 'str')], None),
+    ('Pizza', None, [('ID_Pizza', 'int'), ('Nombre_Pizza', 'str'), ('Descripcion_Pizza', 'str'),
+                     ('Precio_Base_Pizza', 'float'), ('Disponible', 'bool')], None),
+    ('Ingrediente', None, [('ID_Ingrediente', 'int'), ('Nombre_Ingrediente', 'str'),
+                           ('Precio_Adicional_Ingrediente', 'float'), ('Tipo_Ingrediente', 'str')], None),
+    ('Pedido', 'ID_Pedido', [('ID_Pedido', 'int'), ('ID_Cliente', 'int'), ('Fecha_Hora_Pedido', 'timestamp'),
+                             ('Direccion_Entrega_Pedido', 'str'), ('Total_Pedido', 'float')],
+     "Fecha_Hora_Pedido >= ?"),
+    ('DetallePedido', 'ID_DetallePedido', [('ID_DetallePedido', 'int'), ('ID_Pedido', 'int'), ('ID_Pizza_Menu', 'int'),
+                                           ('Cantidad', 'int'), ('Precio_Unitario_Pizza_Personalizada', 'float'),
+                                           ('Subtotal_Detalle', 'float')],
+     "ID_Pedido IN (SELECT ID_Pedido FROM Pedido WHERE Fecha_Hora_Pedido >= ?)"),
+    ('Pizza_Ingrediente_Personalizado', 'ID_DetallePedido', [('ID_DetallePedido', 'int'), ('ID_Ingrediente', 'int')],
+     "ID_DetallePedido IN (SELECT DP.ID_DetallePedido FROM DetallePedido AS DP JOIN Pedido AS P "
+     "ON P.ID_Pedido = DP.ID_Pedido WHERE P.Fecha_Hora_Pedido >= ?)"),
+]
+EXPORT_FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+EXPORT_STATE_FILE = 'export_state.json'
+
+
+def _arrow_type(kind):
+    return {'int': pa.int64(), 'str': pa.string(), 'float': pa.float64(), 'bool': pa.bool_(),
+            'timestamp': pa.timestamp('us')}[kind]
+
+
+def _arrow_batch(schema, rows):
+    """Convierte un bloque de filas del cursor en un RecordBatch con los tipos de schema.
+
+    Cada columna se convierte con el tipo que Arrow infiere y después se castea, así el
+    mismo código sirve para DECIMAL/datetime de pyodbc y REAL/texto ISO de SQLite.
+    """
+    columns = list(zip(*rows))
+    arrays = [pa.array(values, from_pandas=False).cast(field.type) for field, values in zip(schema, columns)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ExportMark:
+    """Marca de agua de una tabla incremental y las claves de su ventana que aún faltan.
+
+    Cada corrida vuelve a leer INCREMENTAL_OVERLAP claves por debajo de la marca y solo
+    exporta las que la corrida anterior registró como huecos, así un IDENTITY confirmado
+    fuera de orden se exporta una vez y nunca se pierde.
+    """
+
+    def __init__(self, entry=None):
+        if isinstance(entry, int):
+            entry = {'marca': entry, 'huecos': []}  # Estado de versiones que solo guardaban la marca
+        entry = entry or {'marca': 0, 'huecos': []}
+        self.mark = self.high = entry['marca']
+        self.gaps = set(entry['huecos'])
+        self.recent = deque()  # Claves exportadas dentro de la ventana de la marca nueva
+
+    @property
+    def low(self):
+        return max(self.mark - INCREMENTAL_OVERLAP, 0)
+
+    def keep(self, batch, position):
+        """Filas de batch (ordenado por la clave) que no se exportaron en corridas anteriores."""
+        rows = []
+        for row in batch:
+            value = int(row[position])
+            if value <= self.mark and value not in self.gaps:
+                continue
+            rows.append(row)
+            self.high = max(self.high, value)
+            self.recent.append(value)
+            while self.recent[0] <= self.high - INCREMENTAL_OVERLAP:
+                self.recent.popleft()
+        return rows
+
+    def state(self):
+        window = self.high - INCREMENTAL_OVERLAP
+        missing = self.gaps | set(range(max(self.mark, window) + 1, self.high + 1))
+        return {'marca': self.high, 'huecos': sorted(key for key in missing - set(self.recent) if key > window)}
+
+
+class _ExportWriter:
+    """Escribe RecordBatches a un archivo temporal que se renombra al cerrar."""
+
+    def __init__(self, path, schema, fmt):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        if fmt == 'parquet':
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(self.tmp_path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+    def write(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self, keep=True):
+        self._writer.close()
+        if hasattr(self, '_sink'):
+            self._sink.close()
+        if keep:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+
+def export_tables(cursor, folder='exportacion', fmt='parquet', full=False, since=None):
+    """Exporta las seis tablas a Parquet o Arrow IPC leyendo en bloques con fetchmany.
+
+    Cada tabla va a su propia carpeta dentro de folder. Las tablas de pedidos se exportan
+    de forma incremental: solo las filas con clave mayor que la de la corrida anterior
+    o que faltaban en su ventana (ver _ExportMark, guardado en export_state.json) y cada
+    corrida agrega un archivo nuevo. Con since (fecha) se extraen los pedidos desde esa
+    fecha a la subcarpeta desde-AAAAMMDD, sin tocar el estado incremental.
+    Devuelve {tabla: filas exportadas}.
+    """
+    if pa is None:
+        raise RuntimeError("El módulo pyarrow no está instalado; instálalo para exportar a Parquet/Arrow.")
+    extension = EXPORT_FORMATS[fmt]
+    if since is not None:
+        folder = os.path.join(folder, f"desde-{since:%Y%m%d}")  # Aparte, para no mezclarse con las partes incrementales
+    state_path = os.path.join(folder, EXPORT_STATE_FILE)
+    state = {}
+    if not full and since is None and os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as source:
+            state = json.load(source)
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    exported = {}
+    for table, key, columns, since_filter in EXPORT_TABLES:
+        os.makedirs(os.path.join(folder, table), exist_ok=True)
+        schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns])
+        sql = f"SELECT {', '.join(name for name, _ in columns)} FROM {table}"
+        params = []
+        mark = None
+        if key and since is not None:
+            sql += f" WHERE {since_filter}"
+            params.append(since)
+            path = os.path.join(folder, table, f"{stamp}.{extension}")
+        elif key:
+            mark = _ExportMark(state.get(table))
+            sql += f" WHERE {key} > ?"
+            params.append(mark.low)
+            path = os.path.join(folder, table, f"{mark.mark + 1:012d}-{stamp}.{extension}")
+        else:
+            path = os.path.join(folder, table, f"completa.{extension}")
+        if key:
+            sql += f" ORDER BY {key}"
+            if full and since is None:
+                # Una exportación completa reemplaza las partes incrementales anteriores
+                for name in os.listdir(os.path.join(folder, table)):
+                    if name.endswith('.' + extension) and name[0].isdigit():
+                        os.remove(os.path.join(folder, table, name))
+
+        cursor.execute(sql, *params)
+        writer = _ExportWriter(path, schema, fmt)
+        position = [name for name, _ in columns].index(key) if key else None
+        rows = 0
+        try:
+            while True:
+                batch = cursor.fetchmany(EXPORT_CHUNK)
+                if not batch:
+                    break
+                if mark is not None:
+                    batch = mark.keep(batch, position)
+                    if not batch:
+                        continue
+                writer.write(_arrow_batch(schema, batch))
+                rows += len(batch)
+        except BaseException:
+            writer.close(keep=False)
+            raise
+        # Sin filas nuevas no se deja un archivo vacío, salvo en las tablas completas
+        writer.close(keep=bool(rows) or not key)
+        if mark is not None:
+            state[table] = mark.state()
+        exported[table] = rows
+        print(f"✅ {table}: {rows} filas -> {path if rows or not key else 'sin cambios'}")
+    if since is None:
+        with open(state_path + '.tmp', 'w', encoding='utf-8') as out:
+            json.dump(state, out, indent=2)
+        os.replace(state_path + '.tmp', state_path)
+    return exported
+
+
+# --- ARCHIVO HISTÓRICO ---
+# Tablas de pedidos que se archivan, de padre a hijo: (clave que identifica las filas ya
+# copiadas, columnas en el orden del esquema, filas de un lote de ID_Pedido en {ids})
+ARCHIVED_TABLES = {
+    'Pedido': ('ID_Pedido', ['ID_Pedido', 'ID_Cliente', 'Fecha_Hora_Pedido', 'Direccion_Entrega_Pedido', 'Total_Pedido'],
+               "ID_Pedido IN ({ids})"),
+    'DetallePedido': ('ID_DetallePedido', ['ID_DetallePedido', 'ID_Pedido', 'ID_Pizza_Menu', 'Cantidad',
+                                           'Precio_Unitario_Pizza_Personalizada', 'Subtotal_Detalle'],
+                      "ID_Pedido IN ({ids})"),
+    # Los extras de un detalle se copian en una sola sentencia: si hay alguno en el archivo, están todos
+    'Pizza_Ingrediente_Personalizado': ('ID_DetallePedido', ['ID_DetallePedido', 'ID_Ingrediente'],
+                                        "ID_DetallePedido IN (SELECT ID_DetallePedido FROM DetallePedido WHERE ID_Pedido IN ({ids}))"),
+}
+# Lo que un lote de ID_Pedido (en {ids}) descuenta de cada tabla de resumen:
+# (tabla de resumen, clave, contador, filas que salen por clave)
+ARCHIVED_SUMMARY_DECREMENTS = [
+    ('Resumen_Cliente', 'ID_Cliente', 'TotalPedidos',
+     "SELECT ID_Cliente, COUNT(*) FROM Pedido WHERE ID_Pedido IN ({ids}) GROUP BY ID_Cliente"),
+    ('Resumen_Pizza', 'ID_Pizza', 'VecesPedida',
+     "SELECT ID_Pizza_Menu, COUNT(*) FROM DetallePedido WHERE ID_Pedido IN ({ids}) GROUP BY ID_Pizza_Menu"),
+    ('Resumen_Ingrediente', 'ID_Ingrediente', 'Frecuencia',
+     "SELECT PIP.ID_Ingrediente, COUNT(*) FROM Pizza_Ingrediente_Personalizado AS PIP "
+     "JOIN DetallePedido AS DP ON DP.ID_DetallePedido = PIP.ID_DetallePedido "
+     "WHERE DP.ID_Pedido IN ({ids}) GROUP BY PIP.ID_Ingrediente"),
+]
+_ARCHIVED_REFERENCE = re.compile(r"\b(FROM|JOIN)\s+(Pedido|DetallePedido|Pizza_Ingrediente_Personalizado)\b(\s+AS\s+\w+)?", re.I)
+
+
+def with_archive(cursor, sql):
+    """Reescribe sql para que cada tabla de pedidos lea también su tabla *_Archivo (UNION ALL)."""
+    prefix = backend_for(cursor).archive_prefix(cursor)
+
+    def union(match):
+        keyword, table, alias = match.groups()
+        columns = ', '.join(ARCHIVED_TABLES[table][1])
+        return (f"{keyword} (SELECT {columns} FROM {table} UNION ALL SELECT {columns} FROM {prefix}{table}_Archivo)"
+                f"{alias or ' AS ' + table}")
+    return _ARCHIVED_REFERENCE.sub(union, sql)
+
+
+def _table_exists(cnxn, cursor, table):
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE 1 = 0").fetchall()
+        return True
+    except DB_ERRORS:
+        cnxn.rollback()
+        return False
+
+
+def archive_orders(cnxn, cursor, cutoff, batch_size=500, pause=0.05, max_batches=None, dry_run=False):
+    """Mueve los pedidos anteriores a cutoff, con su detalle y extras, a las tablas *_Archivo.
+
+    Recorre los pedidos por ID_Pedido (keyset) en lotes de batch_size; cada lote es una
+    transacción corta (copiar, descontar resúmenes, borrar) seguida de una pausa, para
+    poder ejecutarse en horario de atención sin bloquear la creación de pedidos.
+    Devuelve la cantidad de pedidos archivados (o por archivar, con dry_run).
+
+    La copia omite las filas que ya están en el archivo, así que volver a ejecutarlo tras
+    una falla es seguro. Si el backend no garantiza un commit atómico entre la base y el
+    archivo (SQLite con PIZZERIA_ARCHIVE_DB adjunta en WAL), cada lote confirma primero la
+    copia y después el borrado: una caída entre ambos deja pedidos duplicados (nunca
+    perdidos) que la siguiente ejecución termina de mover.
+    """
+    if dry_run:
+        return cursor.execute("SELECT COUNT(*) FROM Pedido WHERE Fecha_Hora_Pedido < ?", cutoff).fetchval()
+    backend = backend_for(cursor)
+    backend.ensure_archive_tables(cursor)
+    # Sin estos índices cada borrado recorre las tablas hijas para validar las claves foráneas
+    for name, table, key_columns, include, _ in INDEXES:
+        if name in ('IX_DetallePedido_Pedido', 'IX_PIP_DetallePedido') and not backend.index_exists(cursor, name):
+            backend.create_index(cursor, name, table, key_columns, include)
+    cnxn.commit()
+    prefix = backend.archive_prefix(cursor)
+    atomic = backend.archive_atomic(cursor)
+    summaries = _table_exists(cnxn, cursor, 'Resumen_Cliente')
+    order_keys = _table_exists(cnxn, cursor, 'Pedido_Clave')
+    last_id, archived, batches = 0, 0, 0
+    while max_batches is None or batches < max_batches:
+        ids = [row[0] for row in cursor.execute(
+            f"SELECT TOP {int(batch_size)} ID_Pedido FROM Pedido WHERE ID_Pedido > ? AND Fecha_Hora_Pedido < ? ORDER BY ID_Pedido",
+            last_id, cutoff).fetchall()]
+        if not ids:
+            break
+        marks = ', '.join('?' * len(ids))
+        try:
+            # Copia idempotente: lo que una ejecución interrumpida ya copió no se vuelve a insertar
+            for table, (key, names, rows) in ARCHIVED_TABLES.items():
+                cursor.execute(f"INSERT INTO {prefix}{table}_Archivo ({', '.join(names)}) "
+                               f"SELECT {', '.join('T.' + name for name in names)} FROM {table} AS T "
+                               f"WHERE {rows.format(ids=marks)} AND NOT EXISTS "
+                               f"(SELECT 1 FROM {prefix}{table}_Archivo AS A WHERE A.{key} = T.{key})", *ids)
+            if not atomic:
+                cnxn.commit()  # La copia queda confirmada antes de borrar nada de las tablas vigentes
+            if summaries:
+                # Los resúmenes cuentan solo los pedidos vigentes: se descuenta lo que sale
+                for table, key, counter, leaving in ARCHIVED_SUMMARY_DECREMENTS:
+                    counts = cursor.execute(leaving.format(ids=marks), *ids).fetchall()
+                    if counts:
+                        cursor.executemany(f"UPDATE {table} SET {counter} = {counter} - ? WHERE {key} = ?",
+                                           [(n, clave) for clave, n in counts])
+                    cursor.execute(f"DELETE FROM {table} WHERE {counter} <= 0")
+            if order_keys:
+                cursor.execute(f"DELETE FROM Pedido_Clave WHERE ID_Pedido IN ({marks})", *ids)
+            for table, (_, _, rows) in reversed(ARCHIVED_TABLES.items()):
+                cursor.execute(f"DELETE FROM {table} WHERE {rows.format(ids=marks)}", *ids)
+            cnxn.commit()
+        except DB_ERRORS:
+            cnxn.rollback()
+            raise
+        last_id = ids[-1]
+        archived += len(ids)
+        batches += 1
+        if batches % 20 == 0:
+            print(f"  {archived} pedidos archivados (hasta ID_Pedido {last_id})...")
+        if pause:
+            time.sleep(pause)
+    return archived
+
+
+def handle_archive(cnxn, cursor):
+    """Submenú para archivar pedidos antiguos."""
+    print("\n--- Archivar Pedidos Antiguos ---")
+    try:
+        text = input(f"Archivar pedidos anteriores a (AAAA-MM-DD, Enter = hace {ARCHIVE_RETENTION_DAYS} días): ").strip()
+        cutoff = datetime.fromisoformat(text) if text else datetime.now() - timedelta(days=ARCHIVE_RETENTION_DAYS)
+        pending = archive_orders(cnxn, cursor, cutoff, dry_run=True)
+        if not pending:
+            print("No hay pedidos para archivar.")
+            return
+        if input(f"Se archivarán {pending} pedidos anteriores a {cutoff:%Y-%m-%d}. ¿Continuar? (s/n): ").lower() != 's':
+            return
+        print(f"\n✅ {archive_orders(cnxn, cursor, cutoff)} pedidos archivados.")
+    except ValueError:
+        print("\nFecha no válida.")
+    except DB_ERRORS as ex:
+        print(f"\nOcurrió un error al archivar (los lotes ya confirmados se conservan). Error: {ex}")
+
+
+# --- MANTENIMIENTO MASIVO ---
+# Por tabla: clave, nombre, columna de precio, uso en pedidos y filtros admitidos (filtro -> condición)
+BULK_TABLES = {
+    'Pizza': {
+        'pk': 'ID_Pizza', 'name': 'Nombre_Pizza', 'price': 'Precio_Base_Pizza',
+        'in_use': "EXISTS (SELECT 1 FROM DetallePedido AS DP WHERE DP.ID_Pizza_Menu = Pizza.ID_Pizza)",
+        'filters': {'disponible': "Disponible = ?", 'nombre': "Nombre_Pizza LIKE ? ESCAPE '\\'"},
+    },
+    'Ingrediente': {
+        'pk': 'ID_Ingrediente', 'name': 'Nombre_Ingrediente', 'price': 'Precio_Adicional_Ingrediente',
+        'in_use': "EXISTS (SELECT 1 FROM Pizza_Ingrediente_Personalizado AS PIP WHERE PIP.ID_Ingrediente = Ingrediente.ID_Ingrediente)",
+        'filters': {'tipo': "Tipo_Ingrediente = ?", 'nombre': "Nombre_Ingrediente LIKE ? ESCAPE '\\'"},
+    },
+}
+BULK_ACTIONS = ('porcentaje', 'monto', 'disponible', 'borrar')
+BULK_DELETE_LABEL = 'borrar'
+BULK_KEEP_LABEL = 'en uso (se conserva)'
+
+
+def bulk_where(table, filters=None):
+    """Arma el WHERE de una operación masiva; devuelve (sql, parámetros).
+
+    filters admite 'ids' (lista de claves) y los filtros de BULK_TABLES[table].
+    """
+    spec = BULK_TABLES[table]
+    conditions, params = [], []
+    for name, value in (filters or {}).items():
+        if value is None or value == '' or value == []:
+            continue
+        if name == 'ids':
+            conditions.append(f"{spec['pk']} IN ({', '.join('?' * len(value))})")
+            params.extend(int(v) for v in value)
+        elif name in spec['filters']:
+            conditions.append(spec['filters'][name])
+            if name == 'nombre':
+                value = f"%{_like_escape(value)}%"  # '50%' busca el texto, no un comodín
+            elif name == 'disponible':
+                value = 1 if value else 0
+            params.append(value)
+        else:
+            raise ValueError(f"Filtro no válido para {table}: {name}")
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def bulk_maintenance(cnxn, cursor, table, action, value=None, filters=None, dry_run=False):
+    """Aplica un cambio masivo con una sola sentencia y devuelve (columnas, vista previa).
+
+    La vista previa muestra solo las filas que cambian, con el valor actual y el nuevo.
+    Con dry_run no se modifica nada. El borrado omite las filas usadas en pedidos, que
+    aparecen en la vista previa como 'en uso'.
+    """
+    spec = BULK_TABLES[table]
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Acción no válida: {action}")
+    if action == 'disponible' and table != 'Pizza':
+        raise ValueError("Solo las pizzas tienen disponibilidad.")
+    where, params = bulk_where(table, filters)
+    joiner = " AND " if where else " WHERE "
+    pk, name = spec['pk'], spec['name']
+
+    if action in ('porcentaje', 'monto'):
+        value = float(value)
+        if action == 'porcentaje':
+            if value <= -100:
+                raise ValueError("El porcentaje debe ser mayor que -100.")
+            expression, value_params = f"ROUND({spec['price']} * ?, 2)", [1 + value / 100.0]
+        else:
+            expression, value_params = f"ROUND({spec['price']} + ?, 2)", [value]
+        columns = [pk, name, "Precio_Actual", "Precio_Nuevo"]
+        preview_sql = f"SELECT {pk}, {name}, {spec['price']}, {expression} FROM {table}{where}{joiner}{expression} <> {spec['price']} ORDER BY {pk}"
+        preview_params = value_params + params + value_params
+        update_sql = f"UPDATE {table} SET {spec['price']} = {expression}{where}{joiner}{expression} <> {spec['price']}"
+        update_params = value_params + params + value_params
+    elif action == 'disponible':
+        value = 1 if value else 0
+        columns = [pk, name, "Disponible_Actual", "Disponible_Nuevo"]
+        preview_sql = f"SELECT {pk}, {name}, Disponible, ? FROM {table}{where}{joiner}Disponible <> ? ORDER BY {pk}"
+        preview_params = [value] + params + [value]
+        update_sql = f"UPDATE {table} SET Disponible = ?{where}{joiner}Disponible <> ?"
+        update_params = [value] + params + [value]
+    else:
+        columns = [pk, name, "Accion"]
+        preview_sql = (f"SELECT {pk}, {name}, CASE WHEN {spec['in_use']} THEN '{BULK_KEEP_LABEL}' ELSE '{BULK_DELETE_LABEL}' END "
+                       f"FROM {table}{where} ORDER BY {pk}")
+        preview_params = params
+        update_sql = f"DELETE FROM {table}{where}{joiner}NOT {spec['in_use']}"
+        update_params = params
+
+    preview = [tuple(row) for row in cursor.execute(preview_sql, *preview_params).fetchall()]
+    if action in ('porcentaje', 'monto') and any(row[3] < 0 for row in preview):
+        raise ValueError("El cambio dejaría precios negativos.")
+    if dry_run or not preview:
+        return columns, preview
+    try:
+        cursor.execute(update_sql, *update_params)
+        cnxn.commit()
+    except DB_ERRORS:
+        cnxn.rollback()
+        raise
+    catalog.invalidate()
+    return columns, preview
+
+
+def bulk_affected(action, preview):
+    """Cuántas filas de la vista previa cambian de verdad (el borrado conserva las que están en uso)."""
+    if action == 'borrar':
+        return sum(1 for row in preview if row[2] == BULK_DELETE_LABEL)
+    return len(preview)
+
+
+def handle_bulk_maintenance(cnxn, cursor, table):
+    """Submenú de cambios masivos con vista previa y confirmación."""
+    spec = BULK_TABLES[table]
+    print(f"\n--- Cambios masivos en '{table}' ---")
+    print("1. Cambiar precios en porcentaje | 2. Sumar o restar un monto al precio")
+    if table == 'Pizza':
+        print("3. Marcar como disponibles / no disponibles")
+    print("4. Borrar registros | 5. Cancelar")
+    action = {'1': 'porcentaje', '2': 'monto', '3': 'disponible', '4': 'borrar'}.get(input("Selecciona una operación: "))
+    if action is None or (action == 'disponible' and table != 'Pizza'):
+        return
+    try:
+        value = None
+        if action == 'porcentaje':
+            value = float(input("Porcentaje de cambio (ej: 8 o -5): "))
+        elif action == 'monto':
+            value = float(input("Monto a sumar (negativo para restar): "))
+        elif action == 'disponible':
+            value = input("¿Disponibles? (s/n): ").lower() == 's'
+
+        filters = {}
+        ids = input(f"IDs separados por coma (Enter para no filtrar por {spec['pk']}): ").strip()
+        if ids:
+            filters['ids'] = [int(v) for v in ids.split(',')]
+        filters['nombre'] = input("Nombre contiene (Enter para no filtrar): ").strip()
+        if table == 'Pizza':
+            disponible = input("Solo pizzas disponibles (s), no disponibles (n) o todas (Enter): ").lower()
+            if disponible in ('s', 'n'):
+                filters['disponible'] = disponible == 's'
+        else:
+            filters['tipo'] = input("Tipo de ingrediente (Enter para no filtrar): ").strip()
+
+        columns, preview = bulk_maintenance(cnxn, cursor, table, action, value, filters, dry_run=True)
+        if not print_rows(columns, preview, "Vista previa de los cambios"):
+            return
+        affected = bulk_affected(action, preview)
+        if not affected:
+            print("Todos los registros están en uso en pedidos; no hay nada que borrar.")
+            return
+        if input(f"¿Aplicar los cambios a {affected} registros? (s/n): ").lower() != 's':
+            print("Cambios descartados.")
+            return
+        bulk_maintenance(cnxn, cursor, table, action, value, filters)
+        print("\n✅ ¡Cambios masivos aplicados!")
+    except ValueError as ex:
+        print(f"\nError: {ex}")
+    except DB_ERRORS as ex:
+        print(f"\nOcurrió un error: {ex}")
+
+
+# --- POOL DE CONEXIONES Y SERVICIO DE PEDIDOS ---
+class PoolTimeoutError(RuntimeError):
+    """No hubo una conexión libre en el pool dentro del tiempo de espera."""
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones con verificación de salud y reconexión con espera exponencial.
+
+    Cada operación pide su conexión con `with pool.connection() as cnxn:` y la devuelve
+    al terminar; si la operación falla y la conexión ya no responde, se descarta.
+    """
+
+    def __init__(self, backend, size=None, timeout=None, health_check_seconds=None, retries=None):
+        self.backend = backend
+        self.size = size or POOL_SIZE
+        self.timeout = POOL_TIMEOUT if timeout is None else timeout
+        self.health_check_seconds = POOL_HEALTH_CHECK_SECONDS if health_check_seconds is None else health_check_seconds
+        self.retries = POOL_CONNECT_RETRIES if retries is None else retries
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = queue.LifoQueue()
+        self._closed = False
+
+    def _connect(self):
+        delay = 0.1
+        for attempt in range(self.retries + 1):
+            try:
+                return instrument(self.backend.connect())
+            except DB_ERRORS:
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    @staticmethod
+    def _healthy(cnxn):
+        try:
+            cnxn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except DB_ERRORS:
             return False
+
+    @staticmethod
+    def _discard(cnxn):
+        try:
+            cnxn.close()
+        except DB_ERRORS:
+            pass
+
+    def _checkout(self):
+        while True:
+            try:
+                cnxn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.health_check_seconds or self._healthy(cnxn):
+                return cnxn
+            self._discard(cnxn)
+
+    @contextmanager
+    def connection(self):
+        if self._closed:
+            raise RuntimeError("El pool de conexiones está cerrado.")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(f"No hubo conexiones libres en {self.timeout} s.")
+        cnxn = None
+        try:
+            cnxn = self._checkout()
+            yield cnxn
+        except BaseException:
+            if cnxn is not None:
+                try:
+                    cnxn.rollback()
+                except DB_ERRORS:
+                    pass
+                if not self._healthy(cnxn):
+                    self._discard(cnxn)
+                    cnxn = None
+            raise
+        finally:
+            if cnxn is not None:
+                if self._closed:
+                    self._discard(cnxn)
+                else:
+                    self._idle.put((cnxn, time.monotonic()))
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                cnxn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(cnxn)
+
+
+# Columnas de precio y claves que pueden modificarse desde el servicio
+PRICE_COLUMNS = {'Pizza': 'Precio_Base_Pizza', 'Ingrediente': 'Precio_Adicional_Ingrediente'}
+PRIMARY_KEYS = {'Cliente': 'ID_Cliente', 'Pizza': 'ID_Pizza', 'Ingrediente': 'ID_Ingrediente'}
+
+
+class OrderService:
+    """Operaciones del programa sin input(), seguras para llamarse desde varios hilos.
+
+    Cada método pide su propia conexión al pool durante la operación. Los reportes usan
+    reports_pool (conexiones de solo lectura) si se indica; el resto va al primario.
+    """
+
+    def __init__(self, pool, reports_pool=None):
+        self.pool = pool
+        self.reports_pool = reports_pool or pool
+
+    def menu(self):
+        with self.pool.connection() as cnxn:
+            return catalog.available_pizzas(cnxn.cursor())
+
+    def search_clients(self, text, limit=None):
+        with self.pool.connection() as cnxn:
+            return [tuple(row) for row in search_clients(cnxn.cursor(), text, limit)]
+
+    def create_client(self, nombre, apellido, telefono, email=None, direccion=None):
+        with self.pool.connection() as cnxn:
+            return insert_client(cnxn, cnxn.cursor(), nombre, apellido, telefono, email, direccion)
+
+    def create_order(self, id_cliente, items, direccion='', fecha=None):
+        """Calcula precios desde el catálogo y guarda el pedido; devuelve (ID_Pedido, total)."""
+        with self.pool.connection() as cnxn:
+            cursor = cnxn.cursor()
+            carrito, total = price_cart(cursor, items)
+            if not carrito:
+                raise ValueError("El pedido no tiene pizzas")
+            id_pedido = place_order(cnxn, cursor, id_cliente, fecha or datetime.now(), direccion, total, carrito)
+            return id_pedido, total
+
+    def create_orders(self, orders):
+        """Guarda varios pedidos en una sola transacción.
+
+        orders es una lista de (id_cliente, items, direccion, fecha). Devuelve, en el mismo
+        orden, (ID_Pedido, total) o la excepción de cada pedido. Si el lote completo falla
+        se reintenta pedido por pedido para que un pedido inválido no afecte a los demás.
+        """
+        results = [None] * len(orders)
+        with self.pool.connection() as cnxn:
+            cursor = cnxn.cursor()
+            backend = backend_for(cursor)
+            priced = []
+            for i, (id_cliente, items, direccion, fecha) in enumerate(orders):
+                try:
+                    carrito, total = price_cart(cursor, items)
+                    if not carrito:
+                        raise ValueError("El pedido no tiene pizzas")
+                    priced.append((i, {'id_cliente': id_cliente, 'fecha': fecha or datetime.now(),
+                                       'direccion': direccion, 'total': total, 'carrito': carrito}))
+                except ValueError as ex:
+                    results[i] = ex
+            if not priced:
+                return results
+            try:
+                ids = backend.insert_orders(cursor, [order for _, order in priced])
+                cnxn.commit()
+                for (i, order), id_pedido in zip(priced, ids):
+                    results[i] = (id_pedido, order['total'])
+                    notify_order(id_pedido, order['total'], order['carrito'])
+                return results
+            except DB_ERRORS:
+                cnxn.rollback()
+            for i, order in priced:
+                try:
+                    results[i] = (backend.insert_orders(cursor, [order])[0], order['total'])
+                    cnxn.commit()
+                except DB_ERRORS as ex:
+                    cnxn.rollback()
+                    results[i] = ex
+                else:
+                    notify_order(results[i][0], order['total'], order['carrito'])
+        return results
+
+    def special_query(self, name, include_archive=False):
+        """Ejecuta un reporte de SPECIAL_QUERIES; devuelve (columnas, filas)."""
+        with self.reports_pool.connection() as cnxn:
+            return fetch_special_query(cnxn.cursor(), name, include_archive)
+
+    def orders_by_month(self, months, years_text='', include_archive=False):
+        """Pedidos de los meses indicados (y años, con el formato de order_years)."""
+        with self.reports_pool.connection() as cnxn:
+            cursor = cnxn.cursor()
+            years = order_years(cursor, years_text, include_archive)
+            if not years or not months:
+                return ["ID_Pedido", "ID_Cliente", "Fecha_Hora_Pedido", "Total_Pedido"], []
+            search_orders_by_date(cursor, month_ranges(months, years), include_archive)
+            return [column[0] for column in cursor.description], [tuple(row) for row in cursor.fetchall()]
+
+    def update_price(self, table, pk_value, price):
+        """Cambia el precio de una pizza o ingrediente; devuelve True si existía."""
+        column = PRICE_COLUMNS[table]
+        with self.pool.connection() as cnxn:
+            cursor = cnxn.cursor()
+            cursor.execute(f"UPDATE {table} SET {column} = ? WHERE {PRIMARY_KEYS[table]} = ?", float(price), pk_value)
+            updated = cursor.rowcount > 0
+            cnxn.commit()
+        catalog.invalidate()
+        return updated
+
+    def delete_record(self, table, pk_value):
+        """Borra un registro de Cliente, Pizza o Ingrediente; devuelve True si existía."""
+        with self.pool.connection() as cnxn:
+            cursor = cnxn.cursor()
+            cursor.execute(f"DELETE FROM {table} WHERE {PRIMARY_KEYS[table]} = ?", pk_value)
+            deleted = cursor.rowcount > 0
+            cnxn.commit()
+        if table == 'Cliente':
+            client_index.invalidate()
         else:
-            for row in rows:
-                row_str = " | ".join(f"{str(item): <20}" for item in row)
-                print(row_str)
-            print("-" * len(header))
-            return True
-    except pyodbc.Error as ex:
-        print(f"Error al procesar los resultados: {ex}")
-        return False
+            catalog.invalidate()
+        return deleted
 
-# --- SECCIÓN DE CONSULTAS ESPECIALES ---
-def run_special_queries(cursor):
-    """Maneja el submenú de consultas especiales."""
-    meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+# --- MULTISUCURSAL ---
+# Reportes de toda la cadena. La clave (primera columna) identifica el elemento en cualquier
+# sucursal: los ID_ son locales de cada base, por eso los clientes se unen por teléfono.
+# Cada forma es (SELECT con {top} y el conteo como N, expresión de la clave, expresión del
+# conteo, GROUP BY o None); branch_query_sql agrega los filtros de cada ronda.
+# (columnas, top-N o None para traer todo, forma sobre resumen, forma sobre el historial)
+BRANCH_QUERIES = {
+    'top_clientes': (
+        ["Telefono", "Nombre", "Apellido", "TotalPedidos", "Sucursales"], 3,
+        ("SELECT {top}C.Telefono, C.Nombre, C.Apellido, R.TotalPedidos AS N FROM Resumen_Cliente AS R JOIN Cliente AS C ON C.ID_Cliente = R.ID_Cliente",
+         "C.Telefono", "R.TotalPedidos", None),
+        ("SELECT {top}C.Telefono, C.Nombre, C.Apellido, COUNT(P.ID_Pedido) AS N FROM Cliente AS C JOIN Pedido AS P ON C.ID_Cliente = P.ID_Cliente",
+         "C.Telefono", "COUNT(P.ID_Pedido)", "C.Telefono, C.Nombre, C.Apellido"),
+    ),
+    'pizzas_populares': (
+        ["Nombre_Pizza", "VecesPedida", "Sucursales"], None,
+        ("SELECT {top}P.Nombre_Pizza, R.VecesPedida AS N FROM Resumen_Pizza AS R JOIN Pizza AS P ON P.ID_Pizza = R.ID_Pizza",
+         "P.Nombre_Pizza", "R.VecesPedida", None),
+        ("SELECT {top}P.Nombre_Pizza, COUNT(DP.ID_Pizza_Menu) AS N FROM DetallePedido AS DP JOIN Pizza AS P ON DP.ID_Pizza_Menu = P.ID_Pizza",
+         "P.Nombre_Pizza", "COUNT(DP.ID_Pizza_Menu)", "P.Nombre_Pizza"),
+    ),
+    'extras_populares': (
+        ["Nombre_Ingrediente", "Frecuencia", "Sucursales"], 5,
+        ("SELECT {top}I.Nombre_Ingrediente, R.Frecuencia AS N FROM Resumen_Ingrediente AS R JOIN Ingrediente AS I ON I.ID_Ingrediente = R.ID_Ingrediente",
+         "I.Nombre_Ingrediente", "R.Frecuencia", None),
+        ("SELECT {top}I.Nombre_Ingrediente, COUNT(PIP.ID_Ingrediente) AS N FROM Pizza_Ingrediente_Personalizado AS PIP "
+         "JOIN Ingrediente AS I ON PIP.ID_Ingrediente = I.ID_Ingrediente",
+         "I.Nombre_Ingrediente", "COUNT(PIP.ID_Ingrediente)", "I.Nombre_Ingrediente"),
+    ),
+}
+
+
+def branch_query_sql(form, top=None, minimum=None, keys=None):
+    """Consulta parcial de una sucursal: (sql, parámetros).
+
+    top limita a las top filas de mayor conteo, minimum a las de conteo >= minimum y keys a
+    esas claves; sin opciones devuelve todos los conteos.
+    """
+    select, key, count, group_by = form
+    where, having, params = [], [], []
+    if keys is not None:
+        where.append(f"{key} IN ({', '.join('?' * len(keys))})")
+        params.extend(keys)
+    if minimum is not None:
+        # Sobre el resumen el conteo es una columna; en vivo es un agregado
+        (having if group_by else where).append(f"{count} >= ?")
+        params.append(minimum)
+    sql = select.format(top=f"TOP {int(top)} " if top else "")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if group_by:
+        sql += f" GROUP BY {group_by}"
+    if having:
+        sql += " HAVING " + " AND ".join(having)
+    return sql + f" ORDER BY N DESC, {key};", params
+
+
+def parse_branches(text, backend_name=None):
+    """Interpreta PIZZERIA_BRANCHES y devuelve [(nombre, backend)].
+
+    Cada entrada es nombre=destino: 'sqlite:archivo' (o un archivo si el backend es sqlite),
+    una cadena de conexión ODBC completa o el nombre de una base en SERVER_NAME.
+    """
+    branches = []
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, target = item.partition('=')
+        name, target = name.strip(), target.strip()
+        if not name or not target:
+            raise ValueError(f"Sucursal no válida: '{item}' (formato nombre=destino)")
+        if any(name == existing for existing, _ in branches):
+            raise ValueError(f"Sucursal repetida: {name}")
+        if target.lower().startswith('sqlite:'):
+            backend = SQLiteBackend(target[len('sqlite:'):])
+        elif (backend_name or DB_BACKEND) == 'sqlite':
+            backend = SQLiteBackend(target)
+        elif ';' in target:
+            backend = SQLServerBackend(target)
+        else:
+            backend = SQLServerBackend(conn_str.replace(f"DATABASE={DATABASE_NAME};", f"DATABASE={target};"))
+        branches.append((name, backend))
+    return branches
+
+
+def merge_branch_counts(partials, top_n=None):
+    """Suma los conteos parciales {sucursal: [(clave, etiquetas..., conteo)]} por clave.
+
+    Devuelve filas (clave, etiquetas..., total, sucursales) ordenadas por total
+    descendente (y clave, para que los empates salgan siempre igual), cortadas en top_n.
+    """
+    totals = defaultdict(int)
+    labels = {}
+    sources = defaultdict(list)
+    for branch, rows in partials.items():
+        for row in rows:
+            totals[row[0]] += row[-1]
+            labels.setdefault(row[0], tuple(row[1:-1]))
+            sources[row[0]].append(branch)
+    ranked = sorted(totals, key=lambda key: (-totals[key], key))
+    if top_n is not None:
+        ranked = ranked[:top_n]
+    return [(key,) + labels[key] + (totals[key], ", ".join(sorted(sources[key]))) for key in ranked]
+
+
+def _kth_largest(values, k):
+    """El k-ésimo mayor de values (0 si hay menos de k)."""
+    ranked = heapq.nlargest(k, values)
+    return ranked[-1] if len(ranked) == k else 0
+
+
+class BranchSet:
+    """Consultas en paralelo sobre las bases de varias sucursales.
+
+    Cada sucursal tiene su pool (por la ruta de reportes) y un hilo propio: la consulta de
+    toda la cadena tarda lo que la sucursal más lenta, no la suma. Una sucursal que no
+    responde en `timeout` segundos o falla queda fuera del resultado y se informa aparte.
+    """
+
+    def __init__(self, branches, timeout=None):
+        if not branches:
+            raise ValueError("No hay sucursales configuradas (PIZZERIA_BRANCHES).")
+        self.names = [name for name, _ in branches]
+        self.timeout = BRANCH_TIMEOUT if timeout is None else timeout
+        self.pools = {name: ConnectionPool(backend.reporting_backend(), size=1, timeout=self.timeout, retries=0)
+                      for name, backend in branches}
+        self._executor = ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix='sucursal')
+        self._running = {}
+
+    def _run(self, name, function):
+        started = time.perf_counter()
+        with self.pools[name].connection() as cnxn:
+            result = function(name, cnxn.cursor())
+        return result, time.perf_counter() - started
+
+    def fan_out(self, function, names=None, parallel=True, timeout=None):
+        """Ejecuta function(sucursal, cursor) en cada sucursal de names (todas por omisión).
+
+        Devuelve (resultados, segundos, fallas), los tres indexados por sucursal. Con
+        parallel=False las sucursales se consultan una tras otra (para comparar tiempos).
+        timeout (por omisión self.timeout) es lo que se espera a las sucursales.
+        """
+        names = self.names if names is None else names
+        timeout = self.timeout if timeout is None else timeout
+        results, seconds, failures = {}, {}, {}
+        if not parallel:
+            for name in names:
+                try:
+                    results[name], seconds[name] = self._run(name, function)
+                except (RuntimeError,) + DB_ERRORS as ex:
+                    failures[name] = str(ex).splitlines()[0]
+            return results, seconds, failures
+
+        submitted = {}
+        for name in names:
+            previous = self._running.get(name)
+            if previous is not None and not previous.done():
+                # Una sucursal colgada no acumula hilos: se omite hasta que termine lo anterior
+                failures[name] = "la consulta anterior sigue en curso"
+                continue
+            submitted[name] = self._running[name] = self._executor.submit(self._run, name, function)
+        done, _ = wait(submitted.values(), timeout=timeout)
+        for name, future in submitted.items():
+            if future not in done:
+                failures[name] = f"sin respuesta en {self.timeout:g} s"
+                continue
+            try:
+                results[name], seconds[name] = future.result()
+            except (RuntimeError,) + DB_ERRORS as ex:
+                failures[name] = str(ex).splitlines()[0]
+        return results, seconds, failures
+
+    def special_query(self, name, include_archive=False, parallel=True):
+        """Reporte de BRANCH_QUERIES para toda la cadena: (columnas, filas, segundos, fallas).
+
+        Con top-N ninguna sucursal manda su tabla completa: el corte se calcula en tres
+        rondas con umbral (TPUT). 1) Cada sucursal manda su top-N local; con la suma parcial
+        del N-ésimo se fija un mínimo = ceil(suma / sucursales), porque un elemento del top
+        global llega a ese conteo en alguna sucursal. 2) Cada sucursal manda sus filas con
+        conteo >= mínimo. 3) Para los candidatos que todavía pueden entrar al top se piden
+        los conteos exactos que faltan. Viajan del orden de N filas por sucursal más los
+        candidatos, no una por cliente. Las tres rondas comparten un mismo plazo de timeout
+        segundos: una sucursal lenta no puede demorar la consulta tres veces ese tiempo.
+        """
+        columns, top_n, summary_form, live_form = BRANCH_QUERIES[name]
+        seconds, failures = defaultdict(float), {}
+        deadline = time.monotonic() + self.timeout
+
+        def fetch(cursor, **options):
+            if include_archive:
+                sql, params = branch_query_sql(live_form, **options)
+                cursor.execute(with_archive(cursor, sql), *params)
+            else:
+                try:
+                    sql, params = branch_query_sql(summary_form, **options)
+                    cursor.execute(sql, *params)
+                except DB_ERRORS:
+                    sql, params = branch_query_sql(live_form, **options)
+                    cursor.execute(sql, *params)
+            return [tuple(row) for row in cursor.fetchall()]
+
+        def phase(function, names=None):
+            results, times, failed = self.fan_out(function, names, parallel, max(0.0, deadline - time.monotonic()))
+            for branch, value in times.items():
+                seconds[branch] += value
+            failures.update(failed)
+            return results
+
+        if top_n is None:
+            # Catálogo (pizzas): pocas filas por sucursal, se traen completas
+            results = phase(lambda branch, cursor: fetch(cursor))
+            return columns, merge_branch_counts(results), dict(seconds), failures
+
+        def lower_bounds():
+            totals = defaultdict(int)
+            for rows in known.values():
+                for key, row in rows.items():
+                    totals[key] += row[-1]
+            return totals
+
+        # Ronda 1: top-N local. Quien devuelve menos de N filas ya mandó todo lo que tiene
+        known = {branch: {row[0]: row for row in rows}
+                 for branch, rows in phase(lambda branch, cursor: fetch(cursor, top=top_n)).items()}
+        exhausted = {branch for branch, rows in known.items() if len(rows) < top_n}
+        minimum = max(1, math.ceil(_kth_largest(lower_bounds().values(), top_n) / max(1, len(known))))
+
+        # Ronda 2: filas con conteo >= mínimo. Lo que una sucursal no manda vale a lo sumo mínimo - 1
+        pending = [branch for branch in known if branch not in exhausted]
+        for branch, rows in phase(lambda branch, cursor: fetch(cursor, minimum=minimum), pending).items():
+            known[branch].update((row[0], row) for row in rows)
+        known = {branch: rows for branch, rows in known.items() if branch not in failures}
+        caps = {branch: 0 if branch in exhausted else minimum - 1 for branch in known}
+
+        lower = lower_bounds()
+        threshold = _kth_largest(lower.values(), top_n)
+        candidates = sorted(key for key, total in lower.items()
+                            if total + sum(cap for branch, cap in caps.items() if key not in known[branch]) >= threshold)
+
+        # Ronda 3: conteos exactos de los candidatos que cada sucursal todavía no mandó
+        missing = {branch: [key for key in candidates if key not in known[branch]]
+                   for branch, cap in caps.items() if cap > 0}
+        missing = {branch: keys for branch, keys in missing.items() if keys}
+
+        def exact(branch, cursor):
+            keys, rows = missing[branch], []
+            for start in range(0, len(keys), BRANCH_KEYS_PER_QUERY):
+                rows.extend(fetch(cursor, keys=keys[start:start + BRANCH_KEYS_PER_QUERY]))
+            return rows
+
+        for branch, rows in phase(exact, list(missing)).items():
+            known[branch].update((row[0], row) for row in rows)
+        partials = {branch: [rows[key] for key in candidates if key in rows]
+                    for branch, rows in known.items() if branch not in failures}
+        return columns, merge_branch_counts(partials, top_n), dict(seconds), failures
+
+    def orders_by_month(self, months, years_text='', include_archive=False, parallel=True):
+        """Pedidos de los meses indicados en todas las sucursales, intercalados por fecha."""
+        def partial(branch, cursor):
+            years = order_years(cursor, years_text, include_archive)
+            if not years or not months:
+                return []
+            search_orders_by_date(cursor, month_ranges(months, years), include_archive)
+            return [tuple(row) for row in cursor.fetchall()]
+
+        results, seconds, failures = self.fan_out(partial, parallel=parallel)
+        # Cada sucursal ya viene ordenada por fecha: basta con intercalar
+        merged = heapq.merge(*([(name,) + row for row in rows] for name, rows in results.items()),
+                             key=lambda row: str(row[3]))
+        return ["Sucursal", "ID_Pedido", "ID_Cliente", "Fecha_Hora_Pedido", "Total_Pedido"], list(merged), seconds, failures
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for pool in self.pools.values():
+            pool.close()
+
+
+def print_branch_timings(names, seconds, failures, elapsed):
+    """Muestra el tiempo de cada sucursal y el total de la consulta de toda la cadena."""
+    print_rows(["Sucursal", "ms", "Estado"],
+               [(name, f"{seconds[name] * 1000:.1f}" if name in seconds else "-", failures.get(name, "OK")) for name in names],
+               "Sucursales consultadas")
+    print(f"Tiempo total: {elapsed * 1000:.1f} ms (sucursal más lenta: {max(seconds.values(), default=0) * 1000:.1f} ms, "
+          f"suma: {sum(seconds.values()) * 1000:.1f} ms)")
+    if failures:
+        print(f"⚠️  Resultado parcial: faltan {len(failures)} de {len(names)} sucursales.")
+
+
+def run_branch_query(branches, name, months=None, years_text='', include_archive=False, parallel=True):
+    """Ejecuta un reporte de toda la cadena, lo muestra con sus tiempos y devuelve las fallas."""
+    started = time.perf_counter()
+    if name == 'pedidos_por_mes':
+        columns, rows, seconds, failures = branches.orders_by_month(months, years_text, include_archive, parallel)
+        description = f"Pedidos de la cadena en los meses {', '.join(MONTH_NAMES[m - 1] for m in sorted(months))}"
+    else:
+        columns, rows, seconds, failures = branches.special_query(name, include_archive, parallel)
+        description = SPECIAL_QUERIES[name][0] + " (todas las sucursales)"
+    elapsed = time.perf_counter() - started
+    print_rows(columns, rows, description)
+    print_branch_timings(branches.names, seconds, failures, elapsed)
+    return failures
+
+
+def run_branch_queries(branches, cursor):
+    """Submenú de consultas especiales de toda la cadena (modo multisucursal)."""
+    include_archive = REPORTS_INCLUDE_ARCHIVE
     while True:
-        print("\n--- MENÚ DE CONSULTAS ESPECIALES ---")
+        print(f"\n--- CONSULTAS DE TODAS LAS SUCURSALES ({', '.join(branches.names)}) ---")
         print("1. Top 3 Clientes con más pedidos")
         print("2. Pizzas más populares (ordenadas por demanda)")
         print("3. Pedidos realizados en uno o varios meses")
         print("4. Ingredientes extra más populares")
-        print("5. Volver al menú principal")
-        
-        choice = input("Selecciona una consulta (1-5): ")
+        print("5. Consultas solo de esta sucursal")
+        print(f"6. Incluir pedidos archivados: {'Sí' if include_archive else 'No'} (cambiar)")
+        print("7. Volver al menú principal")
 
-        if choice == '1':
-            sql = "SELECT TOP 3 C.ID_Cliente, C.Nombre, C.Apellido, COUNT(P.ID_Pedido) AS TotalPedidos FROM Cliente AS C JOIN Pedido AS P ON C.ID_Cliente = P.ID_Cliente GROUP BY C.ID_Cliente, C.Nombre, C.Apellido ORDER BY TotalPedidos DESC;"
-            cursor.execute(sql)
-            print_results(cursor, "Top 3 Clientes con más pedidos")
-        elif choice == '2':
-            sql = "SELECT P.Nombre_Pizza, COUNT(DP.ID_Pizza_Menu) AS VecesPedida FROM DetallePedido AS DP JOIN Pizza AS P ON DP.ID_Pizza_Menu = P.ID_Pizza GROUP BY P.Nombre_Pizza ORDER BY VecesPedida DESC;"
-            cursor.execute(sql)
-            print_results(cursor, "Pizzas ordenadas por demanda")
+        choice = input("Selecciona una consulta (1-7): ")
+        if choice in ('1', '2', '4'):
+            run_branch_query(branches, {'1': 'top_clientes', '2': 'pizzas_populares', '4': 'extras_populares'}[choice],
+                             include_archive=include_archive)
         elif choice == '3':
-            selected_months = []
-            while True:
-                try:
-                    print("\nSelecciona un mes para agregar a tu consulta:")
-                    for i, mes in enumerate(meses):
-                        print(f"{i+1}. {mes}")
-                    
-                    num_mes = int(input("Ingresa el número del mes (1-12): "))
-                    
-                    if 1 <= num_mes <= 12:
-                        if num_mes not in selected_months:
-                            selected_months.append(num_mes)
-                            print(f"✅ '{meses[num_mes-1]}' ha sido agregado a la consulta.")
-                        else:
-                            print(f"'{meses[num_mes-1]}' ya estaba en la lista.")
-                    else:
-                        print("Número de mes no válido.")
-
-                except ValueError:
-                    print("Debes ingresar un número.")
-
-                another_month = input("\n¿Deseas agregar otro mes a la consulta? (s/n): ").lower()
-                if another_month != 's':
-                    break
-
-            if selected_months:
-                placeholders = ','.join(['?'] * len(selected_months))
-                sql = f"SELECT ID_Pedido, ID_Cliente, Fecha_Hora_Pedido, Total_Pedido FROM Pedido WHERE MONTH(Fecha_Hora_Pedido) IN ({placeholders});"
-                
-                month_names = [meses[m-1] for m in sorted(selected_months)]
-                description = f"Pedidos en los meses de {', '.join(month_names)}"
-                
-                cursor.execute(sql, selected_months)
-                print_results(cursor, description)
-            else:
+            selected_months = prompt_months()
+            if not selected_months:
                 print("\nNo se seleccionó ningún mes para la consulta.")
-
-        elif choice == '4':
-            sql = "SELECT TOP 5 I.Nombre_Ingrediente, COUNT(PIP.ID_Ingrediente) AS Frecuencia FROM Pizza_Ingrediente_Personalizado AS PIP JOIN Ingrediente AS I ON PIP.ID_Ingrediente = I.ID_Ingrediente GROUP BY I.Nombre_Ingrediente ORDER BY Frecuencia DESC;"
-            cursor.execute(sql)
-            print_results(cursor, "Ingredientes extra más populares")
+                continue
+            year_text = input("Año o rango de años (ej: 2024 o 2023-2025; Enter para todos): ")
+            try:
+                order_years(cursor, year_text)  # Valida el texto antes de consultar las sucursales
+            except ValueError:
+                print("Año no válido.")
+                continue
+            run_branch_query(branches, 'pedidos_por_mes', selected_months, year_text, include_archive)
         elif choice == '5':
+            run_special_queries(cursor)
+            continue
+        elif choice == '6':
+            include_archive = not include_archive
+            continue
+        elif choice == '7':
             break
         else:
             print("Opción no válida.")
-        
-        if choice in ['1', '2', '3', '4']:
-             input("\nPresiona Enter para continuar...")
+            continue
+        input("\nPresiona Enter para continuar...")
 
 
-# --- SECCIÓN DE OPERACIONES ---
+# --- DIARIO LOCAL DE PEDIDOS ---
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Diario_Pedidos (
+    Clave TEXT PRIMARY KEY,
+    Registrado TEXT NOT NULL,
+    Pedido TEXT NOT NULL,
+    Estado TEXT NOT NULL DEFAULT 'pendiente',
+    ID_Pedido INTEGER,
+    Intentos INTEGER NOT NULL DEFAULT 0,
+    Error TEXT
+);
+CREATE INDEX IF NOT EXISTS IX_Diario_Pedidos_Estado ON Diario_Pedidos (Estado, Registrado);
+"""
 
-def create_new_client(cnxn, cursor, show_title=True):
-    """Guía la creación de un nuevo cliente y devuelve su ID si tiene éxito."""
-    if show_title:
-        print("\n--- Creación de Nuevo Cliente ---")
-    try:
-        # MEJORA: Permitir cancelar en cualquier paso
-        nombre = input("Nombre del cliente (o escriba 'cancelar' para salir): ")
-        if nombre.lower() == 'cancelar': return None
-        apellido = input("Apellido del cliente (o escriba 'cancelar' para salir): ")
-        if apellido.lower() == 'cancelar': return None
-        telefono = input("Teléfono (único) (o escriba 'cancelar' para salir): ")
-        if telefono.lower() == 'cancelar': return None
-        email = input("Email (único, opcional) (o escriba 'cancelar' para salir): ")
-        if email.lower() == 'cancelar': return None
-        direccion = input("Dirección (o escriba 'cancelar' para salir): ")
-        if direccion.lower() == 'cancelar': return None
-        
-        sql = "INSERT INTO Cliente (Nombre, Apellido, Telefono, Email, Direccion_Completa) OUTPUT INSERTED.ID_Cliente VALUES (?, ?, ?, ?, ?)"
-        params = (nombre, apellido, telefono, email if email else None, direccion)
-        
-        new_client_id = cursor.execute(sql, params).fetchval()
-        cnxn.commit()
-        
-        print(f"\n✅ ¡Cliente '{nombre} {apellido}' creado con éxito! (ID: {new_client_id})")
-        return new_client_id
-        
-    except pyodbc.IntegrityError:
-        print("\nERROR: No se pudo crear el cliente. El teléfono o email ya existen.")
-        return None
-    except pyodbc.Error as ex:
-        print(f"\nOcurrió un error inesperado: {ex}")
-        return None
 
-def create_new_order(cnxn, cursor):
-    """Guía al usuario para crear un pedido completo."""
-    print("\n--- Creación de un Nuevo Pedido ---")
-    
-    id_cliente = None
-    while True:
-        is_new_client = input("¿El pedido es para un cliente nuevo? (s/n): ").lower()
-        if is_new_client == 's':
-            id_cliente = create_new_client(cnxn, cursor, show_title=False)
-            if id_cliente is not None:
-                break
-            else:
-                print("Creación de cliente cancelada.")
-                return # Salir si la creación del cliente se cancela
-        elif is_new_client == 'n':
-            if not print_results(cursor.execute("SELECT ID_Cliente, Nombre, Apellido FROM Cliente"), "Clientes Disponibles"):
-                return
+class OrderJournal:
+    """Diario de pedidos en un archivo SQLite local que sobrevive a cortes de la base principal.
+
+    Cada pedido recibe una clave única (su clave de idempotencia) y queda 'pendiente'
+    hasta que JournalFlusher lo guarda; después pasa a 'aplicado' o, si la base lo
+    rechaza por integridad, a 'rechazado' con el error.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or JOURNAL_PATH
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = FULL")  # El pedido está en disco antes de confirmar al operador
+        self._db.executescript(JOURNAL_SCHEMA)
+        self._lock = threading.Lock()
+        self.appended = threading.Event()
+
+    def append(self, id_cliente, fecha, direccion, total, carrito):
+        """Registra un pedido terminado y devuelve su clave."""
+        clave = uuid.uuid4().hex
+        pedido = json.dumps({'id_cliente': id_cliente, 'fecha': fecha.isoformat(), 'direccion': direccion,
+                             'total': total, 'carrito': carrito})
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO Diario_Pedidos (Clave, Registrado, Pedido) VALUES (?, ?, ?)",
+                             (clave, datetime.now().isoformat(' '), pedido))
+        self.appended.set()
+        return clave
+
+    def pending(self, limit):
+        """Pedidos pendientes más antiguos como [(clave, pedido)]."""
+        with self._lock:
+            rows = self._db.execute("SELECT Clave, Pedido FROM Diario_Pedidos WHERE Estado = 'pendiente' "
+                                    "ORDER BY Registrado LIMIT ?", (limit,)).fetchall()
+        orders = []
+        for clave, pedido in rows:
+            order = json.loads(pedido)
+            order['fecha'] = datetime.fromisoformat(order['fecha'])
+            orders.append((clave, order))
+        return orders
+
+    def mark_applied(self, applied):
+        """applied: [(clave, ID_Pedido)] ya confirmados en la base principal."""
+        with self._lock, self._db:
+            self._db.executemany("UPDATE Diario_Pedidos SET Estado = 'aplicado', ID_Pedido = ?, Error = NULL WHERE Clave = ?",
+                                 [(id_pedido, clave) for clave, id_pedido in applied])
+
+    def mark_failed(self, claves, error, rejected=False):
+        """Anota un intento fallido; los rechazados ya no se reintentan."""
+        with self._lock, self._db:
+            self._db.executemany("UPDATE Diario_Pedidos SET Intentos = Intentos + 1, Error = ?, Estado = ? WHERE Clave = ?",
+                                 [(str(error), 'rechazado' if rejected else 'pendiente', clave) for clave in claves])
+
+    def purge(self, days=None):
+        """Borra los pedidos aplicados hace más de `days` días."""
+        limit = datetime.now() - timedelta(days=JOURNAL_RETENTION_DAYS if days is None else days)
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM Diario_Pedidos WHERE Estado = 'aplicado' AND Registrado < ?",
+                                    (limit.isoformat(' '),)).rowcount
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT Estado, COUNT(*) FROM Diario_Pedidos GROUP BY Estado").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class JournalFlusher:
+    """Hilo que envía los pedidos pendientes del diario a la base principal por lotes.
+
+    Antes de insertar un lote consulta Pedido_Clave: los pedidos cuya clave ya existe se
+    guardaron en un intento anterior (por ejemplo, si el programa se cerró entre el commit y
+    la marca en el diario) y solo se marcan como aplicados. La clave se inserta en la misma
+    transacción que el pedido, así que un reintento nunca crea duplicados.
+    """
+
+    def __init__(self, journal, backend, batch_size=None, interval=None):
+        self.journal = journal
+        self.pool = ConnectionPool(backend, size=1, retries=0)
+        self.batch_size = batch_size or JOURNAL_BATCH_SIZE
+        self.interval = JOURNAL_FLUSH_SECONDS if interval is None else interval
+        self.last_error = None
+        self._keys_ready = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _insert(self, cursor, backend, entries):
+        ids = backend.insert_orders(cursor, [order for _, order in entries])
+        applied = [(clave, id_pedido) for (clave, _), id_pedido in zip(entries, ids)]
+        cursor.executemany("INSERT INTO Pedido_Clave (Clave, ID_Pedido) VALUES (?, ?)", applied)
+        return applied
+
+    def flush_batch(self, entries):
+        """Guarda un lote del diario; devuelve cuántos pedidos quedaron aplicados."""
+        with self.pool.connection() as cnxn:
+            cursor = cnxn.cursor()
+            backend = backend_for(cursor)
+            if not self._keys_ready:
+                backend.ensure_order_keys(cursor)
+                cnxn.commit()
+                self._keys_ready = True
+            claves = [clave for clave, _ in entries]
+            cursor.execute(f"SELECT Clave, ID_Pedido FROM Pedido_Clave WHERE Clave IN ({', '.join('?' * len(claves))})", *claves)
+            existing = {clave: id_pedido for clave, id_pedido in cursor.fetchall()}
+            applied = list(existing.items())
+            new = [entry for entry in entries if entry[0] not in existing]
             try:
-                id_cliente_str = input("Ingresa el ID del cliente que realiza el pedido (o 0 para cancelar): ")
-                id_cliente = int(id_cliente_str)
-                if id_cliente == 0:
-                    print("Selección de cliente cancelada.")
-                    return
-                if cursor.execute("SELECT 1 FROM Cliente WHERE ID_Cliente = ?", id_cliente).fetchone():
+                if new:
+                    applied += self._insert(cursor, backend, new)
+                cnxn.commit()
+            except DB_INTEGRITY_ERRORS:
+                # Un pedido inválido (cliente o pizza borrados) no debe frenar al resto del lote
+                cnxn.rollback()
+                applied = list(existing.items())
+                for entry in new:
+                    try:
+                        applied += self._insert(cursor, backend, [entry])
+                        cnxn.commit()
+                    except DB_INTEGRITY_ERRORS as ex:
+                        cnxn.rollback()
+                        self.journal.mark_failed([entry[0]], ex, rejected=True)
+        self.journal.mark_applied(applied)
+        return len(applied)
+
+    def flush(self):
+        """Envía todos los pedidos pendientes; devuelve cuántos se aplicaron."""
+        total = 0
+        while True:
+            entries = self.journal.pending(self.batch_size)
+            if not entries:
+                return total
+            try:
+                total += self.flush_batch(entries)
+            except (RuntimeError,) + DB_ERRORS as ex:
+                self.journal.mark_failed([clave for clave, _ in entries], ex)
+                raise
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.is_set():
+            try:
+                self.flush()
+                self.journal.purge()
+                self.last_error = None
+                delay = self.interval
+            except (RuntimeError,) + DB_ERRORS as ex:
+                self.last_error = str(ex)
+                delay = min(max(delay, 0.5) * 2, 60.0)  # La base no responde: espera creciente
+            self.journal.appended.wait(delay)
+            self.journal.appended.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='journal-flusher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Detiene el hilo tras un último intento de envío."""
+        self._stop.set()
+        self.journal.appended.set()
+        if self._thread:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except (RuntimeError,) + DB_ERRORS as ex:
+            self.last_error = str(ex)
+        self.pool.close()
+
+
+def show_journal_status(journal, flusher=None):
+    counts = journal.counts()
+    rows = [(estado, counts.get(estado, 0)) for estado in ('pendiente', 'aplicado', 'rechazado')]
+    print_rows(["Estado", "Pedidos"], rows, f"Diario de pedidos ({journal.path})")
+    if flusher is not None and flusher.last_error:
+        print(f"Último error al enviar pedidos: {flusher.last_error}")
+
+
+# --- API HTTP LOCAL ---
+# Rutas:
+#   GET  /menu                               GET  /clientes?q=<búsqueda>
+#   POST /clientes  {nombre, apellido, telefono, email, direccion}
+#   POST /pedidos   {id_cliente, items: [{id_pizza, cantidad, extras}], direccion, fecha}
+#   GET  /consultas/top-clientes | /consultas/pizzas-populares | /consultas/extras-populares
+#   GET  /consultas/pedidos-por-mes?meses=1,2&anios=2024
+#   (las consultas aceptan archivo=1 para incluir los pedidos archivados)
+HTTP_STATUS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class OrderBatcher:
+    """Agrupa los pedidos que llegan a la vez y los guarda en una sola transacción.
+
+    Cada consumidor toma un pedido de la cola y, sin esperar más de max_delay, junta los
+    que ya estén esperando (hasta max_batch) antes de enviarlos al ThreadPoolExecutor.
+    """
+
+    def __init__(self, service, executor, consumers=4, max_batch=50, max_delay=0.005):
+        self.service = service
+        self.executor = executor
+        self.consumers = consumers
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = None
+        self._tasks = []
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.consumers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, id_cliente, items, direccion='', fecha=None):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((id_cliente, items, direccion, fecha), future))
+        return await future
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                # Lo que ya está en la cola entra siempre; solo se espera mientras quede tiempo
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
                     break
+            try:
+                results = await loop.run_in_executor(self.executor, self.service.create_orders, [order for order, _ in batch])
+            except Exception as ex:
+                results = [ex] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
                 else:
-                    print("ID de cliente no existe. Inténtalo de nuevo.")
-            except ValueError:
-                print("ID de cliente no válido.")
-        else:
-            print("Opción no válida. Por favor, responde 's' o 'n'.")
-            
-    if id_cliente is None:
-        print("No se pudo definir un cliente. Pedido cancelado.")
-        return
+                    future.set_result(result)
 
-    carrito = []
-    total_pedido = 0.0
-    while True:
-        if not print_results(cursor.execute("SELECT ID_Pizza, Nombre_Pizza, Precio_Base_Pizza FROM Pizza WHERE Disponible = 1"), "Menú de Pizzas"):
-            return
-        try:
-            id_pizza = int(input("Ingresa el ID de la pizza a agregar (o 0 para terminar): "))
-            if id_pizza == 0: break
-            
-            cursor.execute("SELECT Precio_Base_Pizza FROM Pizza WHERE ID_Pizza=?", id_pizza)
-            row = cursor.fetchone()
-            if not row:
-                print("ID de pizza no válido.")
-                continue
-            
-            precio_unitario = float(row[0])
-            cantidad = int(input(f"Cantidad de esta pizza: "))
 
-            extras = []
+class OrderAPI:
+    """Servidor HTTP/JSON mínimo sobre asyncio; el trabajo de base de datos va a un pool de hilos."""
+
+    def __init__(self, backend, workers=8, max_batch=50, max_delay_ms=5):
+        self.pool = ConnectionPool(backend, size=workers)
+        self.reports_pool = ConnectionPool(backend.reporting_backend(), size=workers)
+        self.service = OrderService(self.pool, self.reports_pool)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batcher = OrderBatcher(self.service, self.executor, workers, max_batch, max_delay_ms / 1000.0)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, host, port, backlog=4096)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+        self.reports_pool.close()
+
+    async def _blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _handle_connection(self, reader, writer):
+        try:
             while True:
-                add_extra = input("¿Deseas agregar un ingrediente extra a esta pizza? (s/n): ").lower()
-                if add_extra == 'n': break
-                if add_extra == 's':
-                    if not print_results(cursor.execute("SELECT ID_Ingrediente, Nombre_Ingrediente, Precio_Adicional_Ingrediente FROM Ingrediente WHERE Precio_Adicional_Ingrediente > 0"), "Ingredientes Extra Disponibles"):
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
                         break
-                    try:
-                        id_ingrediente = int(input("Ingresa el ID del ingrediente extra (o 0 para terminar con esta pizza): "))
-                        if id_ingrediente == 0: break
-                        cursor.execute("SELECT Precio_Adicional_Ingrediente FROM Ingrediente WHERE ID_Ingrediente=?", id_ingrediente)
-                        extra_row = cursor.fetchone()
-                        if extra_row:
-                            precio_unitario += float(extra_row[0])
-                            extras.append(id_ingrediente)
-                            print("Ingrediente añadido.")
-                        else:
-                            print("ID de ingrediente no válido.")
-                    except ValueError:
-                        print("Entrada no válida.")
-            
-            subtotal = precio_unitario * cantidad
-            carrito.append({'id_pizza': id_pizza, 'cantidad': cantidad, 'precio_unitario': precio_unitario, 'subtotal': subtotal, 'extras': extras})
-            total_pedido += subtotal
-            print(f"\nSubtotal actual del pedido: ${total_pedido:.2f}")
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {'error': "Cuerpo demasiado grande"}
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self._dispatch(method, target, body)
+                data = json.dumps(payload, default=str, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close' and version.strip() == 'HTTP/1.1'
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_STATUS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
 
-        except ValueError:
-            print("Entrada no válida. Por favor, ingresa números.")
-    
-    if not carrito:
-        print("No se agregaron pizzas. Pedido cancelado.")
-        return
-        
-    direccion_entrega = input("Ingresa la dirección de entrega: ")
-    meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
-    for i, mes in enumerate(meses):
-        print(f"{i+1}. {mes}")
-    try:
-        num_mes = int(input("Selecciona el mes del pedido (1-12): "))
-        if not 1 <= num_mes <= 12: raise ValueError()
-        
-        now = datetime.now()
-        fecha_pedido = datetime(now.year, num_mes, now.day, now.hour, now.minute, now.second)
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise HTTPError(400, "Se esperaba un objeto JSON")
+            return await self._route(method, url.path.rstrip('/') or '/', query, data)
+        except HTTPError as ex:
+            return ex.status, {'error': str(ex)}
+        except (ValueError, KeyError, TypeError) as ex:
+            return 400, {'error': f"Solicitud no válida: {ex}"}
+        except DB_INTEGRITY_ERRORS as ex:
+            return 409, {'error': f"Conflicto con datos existentes: {ex}"}
+        except (RuntimeError,) + DB_ERRORS as ex:
+            return 503, {'error': f"Base de datos no disponible: {ex}"}
+
+    async def _route(self, method, path, query, data):
+        if path == '/menu' and method == 'GET':
+            rows = await self._blocking(self.service.menu)
+            return 200, [{'id_pizza': pid, 'nombre': nombre, 'precio': precio} for pid, nombre, precio in rows]
+        if path == '/clientes' and method == 'GET':
+            rows = await self._blocking(self.service.search_clients, query.get('q', ''))
+            return 200, [dict(zip(CLIENT_COLUMNS, row)) for row in rows]
+        if path == '/clientes' and method == 'POST':
+            id_cliente = await self._blocking(self.service.create_client, data['nombre'], data['apellido'], data['telefono'],
+                                              data.get('email'), data.get('direccion'))
+            return 201, {'id_cliente': id_cliente}
+        if path == '/pedidos' and method == 'POST':
+            fecha = datetime.fromisoformat(data['fecha']) if data.get('fecha') else None
+            id_pedido, total = await self.batcher.submit(int(data['id_cliente']), data['items'], data.get('direccion', ''), fecha)
+            return 201, {'id_pedido': id_pedido, 'total': total}
+        if path.startswith('/consultas/') and method == 'GET':
+            name = path[len('/consultas/'):].replace('-', '_')
+            include_archive = query.get('archivo', '1' if REPORTS_INCLUDE_ARCHIVE else '0') == '1'
+            if name == 'pedidos_por_mes':
+                months = [int(m) for m in query.get('meses', '').split(',') if m]
+                if not months or not all(1 <= m <= 12 for m in months):
+                    raise HTTPError(400, "Indica los meses como meses=1,2,...")
+                columns, rows = await self._blocking(self.service.orders_by_month, months, query.get('anios', ''), include_archive)
+            elif name in SPECIAL_QUERIES:
+                columns, rows = await self._blocking(self.service.special_query, name, include_archive)
+            else:
+                raise HTTPError(404, f"Consulta desconocida: {name}")
+            return 200, [dict(zip(columns, row)) for row in rows]
+        if path in ('/menu', '/clientes', '/pedidos'):
+            raise HTTPError(405, f"Método {method} no permitido en {path}")
+        raise HTTPError(404, f"Ruta desconocida: {path}")
 
-    except ValueError:
-        print("Mes no válido. Pedido cancelado.")
-        return
 
+def serve_api(backend, host='127.0.0.1', port=8080, workers=8, max_batch=50, max_delay_ms=5):
+    """Levanta la API HTTP local hasta que se interrumpa con Ctrl+C."""
+    async def run():
+        api = OrderAPI(backend, workers, max_batch, max_delay_ms)
+        bound_port = await api.start(host, port)
+        print(f"API de PizzeriaDB escuchando en http://{host}:{bound_port} (Ctrl+C para detener)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await api.stop()
     try:
-        sql_pedido = "INSERT INTO Pedido (ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido) VALUES (?, ?, ?, ?);"
-        cursor.execute(sql_pedido, id_cliente, fecha_pedido, direccion_entrega, total_pedido)
-        id_pedido_nuevo = cursor.execute("SELECT @@IDENTITY AS NewID;").fetchval()
-        
-        for item in carrito:
-            sql_detalle = "INSERT INTO DetallePedido (ID_Pedido, ID_Pizza_Menu, Cantidad, Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle) VALUES (?, ?, ?, ?, ?);"
-            cursor.execute(sql_detalle, id_pedido_nuevo, item['id_pizza'], item['cantidad'], item['precio_unitario'], item['subtotal'])
-            id_detalle_nuevo = cursor.execute("SELECT @@IDENTITY AS NewID;").fetchval()
-            
-            for extra_id in item['extras']:
-                sql_extra = "INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente) VALUES (?, ?);"
-                cursor.execute(sql_extra, id_detalle_nuevo, extra_id)
-        
-        cnxn.commit()
-        print("\n✅ ¡Pedido creado exitosamente en la base de datos!")
-        print(f"ID del nuevo pedido: {id_pedido_nuevo}, Total: ${total_pedido:.2f}")
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nAPI detenida.")
 
-    except pyodbc.Error as ex:
-        cnxn.rollback()
-        print(f"\n❌ Ocurrió un error al guardar el pedido. Se revirtieron los cambios. Error: {ex}")
 
-# --- SECCIÓN DE MANTENIMIENTO ---
+# --- DATOS SINTÉTICOS Y BENCHMARKS ---
+SAMPLE_PIZZAS = [
+    ('Margarita', 'Tomate, mozzarella y albahaca', 8.5), ('Pepperoni', 'Pepperoni y mozzarella', 10.0),
+    ('Hawaiana', 'Jamón y piña', 10.5), ('Cuatro Quesos', 'Mozzarella, gorgonzola, parmesano y provolone', 12.0),
+    ('Mexicana', 'Chorizo, jalapeño y cebolla', 11.5), ('Vegetariana', 'Pimiento, champiñones y aceitunas', 10.0),
+    ('Napolitana', 'Anchoas, alcaparras y orégano', 11.0), ('BBQ Pollo', 'Pollo, salsa BBQ y cebolla morada', 12.5),
+    ('Suprema', 'Pepperoni, salchicha, pimiento y champiñones', 13.5), ('Carnes Frías', 'Jamón, salami y tocino', 13.0),
+    ('Marinara', 'Tomate, ajo y orégano', 7.5), ('Champiñones', 'Champiñones y mozzarella', 9.5),
+]
+SAMPLE_INGREDIENTS = [
+    ('Salsa de Tomate', 0.0, 'Base'), ('Masa Tradicional', 0.0, 'Base'), ('Extra Queso', 1.5, 'Extra Queso'),
+    ('Champiñón Extra', 1.0, 'Vegetal'), ('Jalapeño', 0.75, 'Vegetal'), ('Tocino', 2.0, 'Carne'),
+    ('Aceitunas', 1.0, 'Vegetal'), ('Piña', 1.0, 'Fruta'), ('Pepperoni Extra', 1.5, 'Carne'),
+    ('Cebolla Caramelizada', 0.75, 'Vegetal'), ('Orilla Rellena', 2.5, 'Masa'),
+]
+FIRST_NAMES = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Pedro', 'Sofía', 'Diego', 'Valeria', 'Miguel']
+LAST_NAMES = ['García', 'López', 'Martínez', 'Hernández', 'González', 'Pérez', 'Sánchez', 'Ramírez', 'Torres', 'Flores']
+# Peso relativo de cada hora del día (más pedidos a mediodía y en la noche)
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 6, 10, 12, 9, 5, 4, 6, 10, 14, 15, 12, 7, 3]
 
-def add_new_pizza(cnxn, cursor):
-    """Guía la creación de una nueva pizza."""
-    print("\n--- Agregar Nueva Pizza ---")
-    try:
-        nombre = input("Nombre de la pizza (o escriba 'cancelar' para salir): ")
-        if nombre.lower() == 'cancelar': return
-        desc = input("Descripción (o escriba 'cancelar' para salir): ")
-        if desc.lower() == 'cancelar': return
-        precio_str = input("Precio base (o escriba 'cancelar' para salir): ")
-        if precio_str.lower() == 'cancelar': return
-        precio = float(precio_str)
-        
-        sql = "INSERT INTO Pizza (Nombre_Pizza, Descripcion_Pizza, Precio_Base_Pizza) VALUES (?, ?, ?)"
-        cursor.execute(sql, nombre, desc, precio)
+def _zipf_cum_weights(n, exponent=1.1):
+    """Pesos acumulados de una distribución de Zipf para random.choices."""
+    total = 0.0
+    cum_weights = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** exponent
+        cum_weights.append(total)
+    return cum_weights
+
+def seed_catalog(cnxn, cursor):
+    """Carga un menú de ejemplo si las tablas Pizza e Ingrediente están vacías."""
+    if not cursor.execute("SELECT COUNT(*) FROM Pizza").fetchval():
+        cursor.executemany("INSERT INTO Pizza (Nombre_Pizza, Descripcion_Pizza, Precio_Base_Pizza) VALUES (?, ?, ?)", SAMPLE_PIZZAS)
+    if not cursor.execute("SELECT COUNT(*) FROM Ingrediente").fetchval():
+        cursor.executemany("INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente, Tipo_Ingrediente) VALUES (?, ?, ?)", SAMPLE_INGREDIENTS)
+    cnxn.commit()
+    catalog.invalidate()
+
+def generate_synthetic_data(cnxn, cursor, orders=1000, clients=None, seed=42, years=2, batch_size=5000):
+    """Llena las seis tablas con datos sintéticos con sesgo realista.
+
+    La popularidad de clientes, pizzas y extras sigue una distribución de Zipf y las
+    horas de los pedidos se concentran en comida y cena. Los pedidos se insertan en
+    lotes de batch_size con IDs explícitos, haciendo commit por lote.
+    """
+    rng = random.Random(seed)
+    backend = backend_for(cursor)
+    clients = clients or max(100, orders // 10)
+    cursor.fast_executemany = True
+
+    seed_catalog(cnxn, cursor)
+    pizzas = [(pid, precio) for pid, _, precio in catalog.available_pizzas(cursor)]
+    extras = [(iid, precio) for iid, _, precio in catalog.extra_ingredients(cursor)]
+    rng.shuffle(pizzas)
+    rng.shuffle(extras)
+    pizza_weights = _zipf_cum_weights(len(pizzas))
+    extra_weights = _zipf_cum_weights(len(extras))
+
+    first_client = cursor.execute("SELECT COALESCE(MAX(ID_Cliente), 0) FROM Cliente").fetchval() + 1
+    for start in range(0, clients, batch_size):
+        rows = []
+        for n in range(first_client + start, first_client + min(start + batch_size, clients)):
+            rows.append((rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f"9{n:09d}",
+                         f"cliente{n}@ejemplo.com", f"Calle {rng.randint(1, 300)} #{rng.randint(1, 999)}"))
+        cursor.executemany("INSERT INTO Cliente (Nombre, Apellido, Telefono, Email, Direccion_Completa) VALUES (?, ?, ?, ?, ?)", rows)
         cnxn.commit()
-        print(f"\n✅ ¡Pizza '{nombre}' agregada con éxito!")
-    except pyodbc.IntegrityError:
-        print("\nERROR: Ya existe una pizza con ese nombre.")
-    except (ValueError, TypeError):
-        print("\nError: El precio debe ser un número válido.")
-    except pyodbc.Error as ex:
-        print(f"\nOcurrió un error: {ex}")
+    client_ids = [row[0] for row in cursor.execute("SELECT ID_Cliente FROM Cliente").fetchall()]
+    rng.shuffle(client_ids)
+    client_weights = _zipf_cum_weights(len(client_ids))
 
-def add_new_ingredient(cnxn, cursor):
-    """Guía la creación de un nuevo ingrediente."""
-    print("\n--- Agregar Nuevo Ingrediente ---")
-    try:
-        nombre = input("Nombre del ingrediente (o escriba 'cancelar' para salir): ")
-        if nombre.lower() == 'cancelar': return
-        precio_str = input("Precio adicional (o escriba 'cancelar' para salir): ")
-        if precio_str.lower() == 'cancelar': return
-        precio = float(precio_str)
-        tipo = input("Tipo de ingrediente (Ej: Extra Queso) (o escriba 'cancelar' para salir): ")
-        if tipo.lower() == 'cancelar': return
-        
-        sql = "INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente, Tipo_Ingrediente) VALUES (?, ?, ?)"
-        cursor.execute(sql, nombre, precio, tipo)
+    next_pedido = cursor.execute("SELECT COALESCE(MAX(ID_Pedido), 0) FROM Pedido").fetchval() + 1
+    next_detalle = cursor.execute("SELECT COALESCE(MAX(ID_DetallePedido), 0) FROM DetallePedido").fetchval() + 1
+    first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=365 * years)
+    days = 365 * years
+
+    for start in range(0, orders, batch_size):
+        pedidos, detalles, personalizados = [], [], []
+        for _ in range(min(batch_size, orders - start)):
+            fecha = first_day + timedelta(days=rng.randrange(days), hours=rng.choices(range(24), HOUR_WEIGHTS)[0],
+                                          seconds=rng.randrange(3600))
+            total = 0.0
+            for _ in range(rng.choices((1, 2, 3, 4), (50, 30, 15, 5))[0]):
+                id_pizza, precio = rng.choices(pizzas, cum_weights=pizza_weights)[0]
+                linea_extras = rng.choices(extras, cum_weights=extra_weights, k=rng.choices((0, 1, 2), (70, 22, 8))[0]) if extras else []
+                precio_unitario = precio + sum(p for _, p in linea_extras)
+                cantidad = rng.choices((1, 2, 3), (75, 20, 5))[0]
+                detalles.append((next_detalle, next_pedido, id_pizza, cantidad, precio_unitario, precio_unitario * cantidad))
+                personalizados.extend((next_detalle, iid) for iid, _ in linea_extras)
+                total += precio_unitario * cantidad
+                next_detalle += 1
+            pedidos.append((next_pedido, rng.choices(client_ids, cum_weights=client_weights)[0], fecha,
+                            f"Calle {rng.randint(1, 300)} #{rng.randint(1, 999)}", total))
+            next_pedido += 1
+
+        backend.identity_insert(cursor, 'Pedido', True)
+        cursor.executemany("INSERT INTO Pedido (ID_Pedido, ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido) VALUES (?, ?, ?, ?, ?)", pedidos)
+        backend.identity_insert(cursor, 'Pedido', False)
+        backend.identity_insert(cursor, 'DetallePedido', True)
+        cursor.executemany("INSERT INTO DetallePedido (ID_DetallePedido, ID_Pedido, ID_Pizza_Menu, Cantidad, Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle) VALUES (?, ?, ?, ?, ?, ?)", detalles)
+        backend.identity_insert(cursor, 'DetallePedido', False)
+        if personalizados:
+            cursor.executemany("INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente) VALUES (?, ?)", personalizados)
         cnxn.commit()
-        print(f"\n✅ ¡Ingrediente '{nombre}' agregado con éxito!")
-    except pyodbc.IntegrityError:
-        print("\nERROR: Ya existe un ingrediente con ese nombre.")
-    except (ValueError, TypeError):
-        print("\nError: El precio debe ser un número válido.")
-    except pyodbc.Error as ex:
-        print(f"\nOcurrió un error: {ex}")
+        print(f"  {start + len(pedidos)}/{orders} pedidos generados")
 
-def handle_maintenance(cnxn, cursor):
-    """Submenú para elegir qué tabla modificar."""
-    while True:
-        print("\n--- Mantenimiento de Registros ---")
-        print("¿Qué tabla deseas modificar?")
-        print("1. Cliente")
-        print("2. Pizza")
-        print("3. Ingrediente")
-        print("4. Volver al Menú Principal")
-        
-        choice = input("Selecciona una tabla (1-4): ")
-        
-        if choice == '1':
-            update_delete_menu(cnxn, cursor, 'Cliente', 'ID_Cliente')
-        elif choice == '2':
-            update_delete_menu(cnxn, cursor, 'Pizza', 'ID_Pizza')
-        elif choice == '3':
-            update_delete_menu(cnxn, cursor, 'Ingrediente', 'ID_Ingrediente')
-        elif choice == '4':
-            break
-        else:
-            print("Opción no válida.")
+    rebuild_summaries(cnxn, cursor)
 
-def update_delete_menu(cnxn, cursor, table_name, pk_name):
-    """Menú genérico para CRUD en una tabla específica."""
-    while True:
-        print(f"\n--- Modificando tabla: {table_name} ---")
-        print("1. Agregar nuevo registro")
-        print("2. Actualizar un registro existente")
-        print("3. Borrar un registro existente")
-        print("4. Volver al menú de mantenimiento")
 
-        choice = input("Selecciona una operación (1-4): ")
+class ScriptedInput:
+    """Sustituye input() por respuestas predefinidas y descarta lo que se imprime."""
 
-        if choice == '1': # AGREGAR
-            if table_name == 'Cliente':
-                create_new_client(cnxn, cursor)
-            elif table_name == 'Pizza':
-                add_new_pizza(cnxn, cursor)
-            elif table_name == 'Ingrediente':
-                add_new_ingredient(cnxn, cursor)
-        
-        elif choice == '2': # ACTUALIZAR
-            print(f"\n--- Actualizar en '{table_name}' ---")
-            if not print_results(cursor.execute(f"SELECT * FROM {table_name}"), f"Registros en {table_name}"):
-                continue
-            try:
-                pk_value_str = input(f"Ingresa el {pk_name} del registro a actualizar (o 0 para cancelar): ")
-                pk_value = int(pk_value_str)
-                if pk_value == 0: continue
+    def __init__(self, answers):
+        self._answers = iter(answers)
 
-                if table_name == 'Cliente':
-                    while True:
-                        print("\n¿Qué campo del cliente deseas actualizar?")
-                        print("1. Nombre | 2. Apellido | 3. Teléfono | 4. Email | 5. Dirección | 6. Cancelar")
-                        field_choice = input("Selecciona un campo: ")
-                        if field_choice == '1': field_to_update = 'Nombre'
-                        elif field_choice == '2': field_to_update = 'Apellido'
-                        elif field_choice == '3': field_to_update = 'Telefono'
-                        elif field_choice == '4': field_to_update = 'Email'
-                        elif field_choice == '5': field_to_update = 'Direccion_Completa'
-                        elif field_choice == '6': break
-                        else:
-                            print("Opción no válida.")
-                            continue
-                        
-                        new_value = input(f"Ingresa el nuevo valor para '{field_to_update}' (o escriba 'cancelar'): ")
-                        if new_value.lower() == 'cancelar': break
-                        sql = f"UPDATE Cliente SET {field_to_update} = ? WHERE ID_Cliente = ?"
-                        params = (new_value, pk_value)
-                        break
-                else: # Lógica para Pizza e Ingrediente
-                    if table_name == 'Pizza':
-                        new_value_str = input("Ingresa el nuevo precio base (o escriba 'cancelar'): ")
-                        if new_value_str.lower() == 'cancelar': continue
-                        new_value = float(new_value_str)
-                        sql = f"UPDATE Pizza SET Precio_Base_Pizza = ? WHERE ID_Pizza = ?"
-                    elif table_name == 'Ingrediente':
-                        new_value_str = input("Ingresa el nuevo precio adicional (o escriba 'cancelar'): ")
-                        if new_value_str.lower() == 'cancelar': continue
-                        new_value = float(new_value_str)
-                        sql = f"UPDATE Ingrediente SET Precio_Adicional_Ingrediente = ? WHERE ID_Ingrediente = ?"
-                    params = (new_value, pk_value)
-                
-                if 'sql' in locals() and 'params' in locals():
-                    print(f"\nTabla '{table_name}' ANTES de la actualización:")
-                    print_results(cursor.execute(f"SELECT * FROM {table_name} WHERE {pk_name} = ?", pk_value))
-                    cursor.execute(sql, params)
-                    if cursor.rowcount > 0:
-                        cnxn.commit()
-                        print("\n¡Actualización completada!")
-                    else:
-                        print("\nNo se encontró ningún registro con ese ID.")
-                    print(f"Tabla '{table_name}' DESPUÉS de la actualización:")
-                    print_results(cursor.execute(f"SELECT * FROM {table_name} WHERE {pk_name} = ?", pk_value))
+    def _input(self, prompt=''):
+        try:
+            return next(self._answers)
+        except StopIteration:
+            raise RuntimeError(f"El guion se quedó sin respuestas en: {prompt!r}") from None
 
-            except (ValueError, TypeError):
-                print("\nError: Entrada no válida.")
-            except pyodbc.Error as ex:
-                print(f"\nOcurrió un error: {ex}")
-        
-        elif choice == '3': # BORRAR
-            print(f"\n--- Borrar en '{table_name}' ---")
-            if not print_results(cursor.execute(f"SELECT * FROM {table_name}"), f"Registros en {table_name}"):
-                continue
-            try:
-                pk_value_str = input(f"Ingresa el {pk_name} del registro a borrar (o 0 para cancelar): ")
-                pk_value = int(pk_value_str)
-                if pk_value == 0: continue
+    def __enter__(self):
+        self._saved = builtins.input, sys.stdout
+        self._devnull = open(os.devnull, 'w', encoding='utf-8')
+        builtins.input, sys.stdout = self._input, self._devnull
+        return self
 
-                print(f"\nTabla '{table_name}' ANTES del intento de borrado:")
-                print_results(cursor.execute(f"SELECT * FROM {table_name}"))
+    def __exit__(self, *exc):
+        builtins.input, sys.stdout = self._saved
+        self._devnull.close()
+        return False
 
-                sql = f"DELETE FROM {table_name} WHERE {pk_name} = ?"
-                cursor.execute(sql, pk_value)
-                
-                if cursor.rowcount > 0:
+
+def _order_script(rng, ids):
+    id_cliente = str(rng.choice(ids['clientes']))
+    answers = ['n', f"#{id_cliente}", id_cliente]
+    for _ in range(rng.choices((1, 2, 3, 4), (50, 30, 15, 5))[0]):
+        answers += [str(rng.choice(ids['pizzas'])), str(rng.choice((1, 1, 1, 2, 3)))]
+        for _ in range(rng.choices((0, 1, 2), (70, 22, 8))[0] if ids['extras'] else 0):
+            answers += ['s', str(rng.choice(ids['extras']))]
+        answers.append('n')
+    return answers + ['0', f"Calle {rng.randint(1, 300)}", str(rng.randint(1, 12))]
+
+def _price_update_script(rng, ids):
+    id_pizza, precio = rng.choice(ids['precios'])
+    return ['2', str(id_pizza), str(precio), '', '5']
+
+# Operación -> (función del programa que se ejecuta, generador de respuestas a sus input())
+WORKLOAD_OPERATIONS = {
+    'pedido': (create_new_order, _order_script),
+    'top_clientes': (lambda cnxn, cursor: run_special_queries(cursor), lambda rng, ids: ['1', '', '7']),
+    'pizzas_populares': (lambda cnxn, cursor: run_special_queries(cursor), lambda rng, ids: ['2', '', '7']),
+    'pedidos_por_mes': (lambda cnxn, cursor: run_special_queries(cursor),
+                        lambda rng, ids: ['3', str(rng.randint(1, 12)), 'n', '', '', '7']),
+    'extras_populares': (lambda cnxn, cursor: run_special_queries(cursor), lambda rng, ids: ['4', '', '7']),
+    'precio_pizza': (lambda cnxn, cursor: update_delete_menu(cnxn, cursor, 'Pizza', 'ID_Pizza'), _price_update_script),
+}
+DEFAULT_WORKLOAD_MIX = {'pedido': 80, 'top_clientes': 4, 'pizzas_populares': 4, 'pedidos_por_mes': 4,
+                        'extras_populares': 4, 'precio_pizza': 4}
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    # Rango ceil(p/100 * n), base 1; se multiplica antes de dividir para que p95 de 20 valores sea exactamente 19
+    rank = math.ceil(pct * len(sorted_values) / 100.0)
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+def workload_ids(cursor):
+    """IDs reales que usan los guiones del benchmark."""
+    return {
+        'clientes': [row[0] for row in cursor.execute("SELECT TOP 1000 ID_Cliente FROM Cliente").fetchall()],
+        'pizzas': [row[0] for row in catalog.available_pizzas(cursor)],
+        'extras': [row[0] for row in catalog.extra_ingredients(cursor)],
+        'precios': [(row[0], row[2]) for row in catalog.available_pizzas(cursor)],
+    }
+
+def run_workload(cnxn, cursor, operations=1000, mix=None, seed=7):
+    """Reproduce los flujos interactivos con guiones aleatorios y mide cada operación.
+
+    Devuelve {operación: {'count', 'errors', 'ops_per_s', 'p50_ms', 'p95_ms', 'p99_ms'}}
+    y una entrada '_total' con el rendimiento global.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_WORKLOAD_MIX
+    ids = workload_ids(cursor)
+    if not (ids['clientes'] and ids['pizzas']):
+        raise RuntimeError("La base no tiene clientes o pizzas; ejecuta primero el comando 'generate'.")
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    timings = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+
+    started = time.perf_counter()
+    for _ in range(operations):
+        name = rng.choices(names, weights)[0]
+        function, script = WORKLOAD_OPERATIONS[name]
+        answers = script(rng, ids)
+        op_start = time.perf_counter()
+        try:
+            with ScriptedInput(answers):
+                function(cnxn, cursor)
+        except (RuntimeError,) + DB_ERRORS:
+            errors[name] += 1
+        timings[name].append(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name, values in timings.items():
+        if not values:
+            continue
+        values.sort()
+        results[name] = {
+            'count': len(values),
+            'errors': errors[name],
+            'ops_per_s': len(values) / sum(values),
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+        }
+    results['_total'] = {'count': operations, 'errors': sum(errors.values()), 'seconds': elapsed,
+                         'ops_per_s': operations / elapsed if elapsed else 0.0}
+    return results
+
+def print_workload_results(results, baseline=None, tolerance=0.10):
+    """Muestra los resultados y, si hay línea base, las operaciones cuyo p95 empeoró más que tolerance."""
+    rows = [(name, r['count'], r['errors'], f"{r['ops_per_s']:.1f}", f"{r['p50_ms']:.2f}", f"{r['p95_ms']:.2f}", f"{r['p99_ms']:.2f}")
+            for name, r in results.items() if name != '_total']
+    print_rows(["Operación", "N", "Errores", "ops/s", "p50 ms", "p95 ms", "p99 ms"], rows, "Resultados del benchmark")
+    total = results['_total']
+    print(f"Total: {total['count']} operaciones en {total['seconds']:.2f} s ({total['ops_per_s']:.1f} ops/s), {total['errors']} errores")
+    regressions = []
+    for name, r in (baseline or {}).items():
+        if name != '_total' and name in results and results[name]['p95_ms'] > r['p95_ms'] * (1 + tolerance):
+            regressions.append(name)
+            print(f"❌ Regresión en {name}: p95 {r['p95_ms']:.2f} ms -> {results[name]['p95_ms']:.2f} ms")
+    return regressions
+
+
+def run_concurrency_benchmark(backend, workers_list=(1, 2, 4, 8), operations=500, seed=11):
+    """Repite el flujo del operador (buscar al cliente por teléfono y crear su pedido) con
+    OrderService desde un ThreadPoolExecutor para cada número de hilos.
+
+    Devuelve [(hilos, segundos, pedidos por segundo, errores)]. Con latencia simulada en
+    SQLite cada hilo pasa la mayor parte del tiempo esperando la red sin bloqueos (búsqueda,
+    ida del lote del pedido y vuelta del commit); solo la vuelta del lote y la ida del commit
+    retienen el único escritor. El techo es de unas 3x y se alcanza con pocos hilos; contra
+    SQL Server, sin escritor único, sigue escalando con el tamaño del pool.
+    """
+    setup_pool = ConnectionPool(backend, size=1)
+    with setup_pool.connection() as cnxn:
+        cursor = cnxn.cursor()
+        ids = workload_ids(cursor)
+        phones = [row[0] for row in cursor.execute("SELECT TOP 1000 Telefono FROM Cliente").fetchall()]
+    setup_pool.close()
+    if not (phones and ids['pizzas']):
+        raise RuntimeError("La base no tiene clientes o pizzas; ejecuta primero el comando 'generate'.")
+    rng = random.Random(seed)
+    jobs = [(rng.choice(phones),
+             [{'id_pizza': rng.choice(ids['pizzas']), 'cantidad': rng.randint(1, 3),
+               'extras': rng.sample(ids['extras'], k=min(len(ids['extras']), rng.choice((0, 0, 1))))}
+              for _ in range(rng.randint(1, 3))])
+            for _ in range(operations)]
+
+    def operator_flow(service, telefono, items):
+        clients = service.search_clients(telefono)
+        if not clients:
+            raise ValueError(f"No se encontró el cliente {telefono}")
+        return service.create_order(clients[0][0], items, "Benchmark")
+
+    results = []
+    for workers in workers_list:
+        pool = ConnectionPool(backend, size=workers)
+        service = OrderService(pool)
+        errors = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(operator_flow, service, telefono, items) for telefono, items in jobs]
+            for future in futures:
+                try:
+                    future.result()
+                except (ValueError, RuntimeError) + DB_ERRORS:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+        pool.close()
+        results.append((workers, elapsed, operations / elapsed, errors))
+    return results
+
+
+# --- IMPORTACIÓN MASIVA DE PEDIDOS ---
+# Formato CSV: una fila por pizza; las filas consecutivas con el mismo valor en "pedido" forman un pedido.
+#   pedido,id_cliente,fecha,direccion,id_pizza,cantidad,extras      (extras separados por ';')
+# Formato JSON Lines: un pedido por línea.
+#   {"id_cliente": 1, "fecha": "2024-05-01 20:15:00", "direccion": "...",
+#    "items": [{"id_pizza": 3, "cantidad": 2, "extras": [4, 7]}]}
+
+def read_order_records(path, fmt=None):
+    """Genera (número de registro, registro) desde un archivo CSV o JSON Lines sin cargarlo entero."""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+    with open(path, encoding='utf-8', newline='') as source:
+        if fmt == 'jsonl':
+            for number, line in enumerate(source, 1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        yield number, {'_error': "JSON no válido", '_raw': line.rstrip('\n')}
+                        continue
+                    if not isinstance(record, dict):  # JSON válido pero no un pedido (5, null, [...])
+                        record = {'_error': "El registro no es un objeto JSON", '_raw': line.rstrip('\n')}
+                    yield number, record
+            return
+        current_key, current, first_line = None, None, None
+        for number, row in enumerate(csv.DictReader(source), 2):
+            key = row.get('pedido') or f"linea-{number}"
+            if key != current_key:
+                if current is not None:
+                    yield first_line, current
+                current_key, first_line = key, number
+                current = {'pedido': key, 'id_cliente': row.get('id_cliente'), 'fecha': row.get('fecha'),
+                           'direccion': row.get('direccion'), 'items': []}
+            extras = [extra for extra in (row.get('extras') or '').split(';') if extra.strip()]
+            current['items'].append({'id_pizza': row.get('id_pizza'), 'cantidad': row.get('cantidad'), 'extras': extras})
+        if current is not None:
+            yield first_line, current
+
+class ImportLookup:
+    """IDs y precios precargados para validar pedidos sin consultar la base por cada registro."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.clients = set()
+        cursor.execute("SELECT ID_Cliente FROM Cliente")
+        for batch in iter(lambda: cursor.fetchmany(FETCH_SIZE), []):
+            self.clients.update(row[0] for row in batch)
+
+    def price_order(self, record):
+        """Valida y calcula precios igual que create_new_order; lanza ValueError con el motivo."""
+        if '_error' in record:
+            raise ValueError(record['_error'])
+        try:
+            id_cliente = int(record['id_cliente'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("id_cliente ausente o no numérico") from None
+        if id_cliente not in self.clients:
+            raise ValueError(f"El cliente {id_cliente} no existe")
+        fecha = record.get('fecha')
+        try:
+            fecha = datetime.fromisoformat(fecha) if fecha else datetime.now()
+        except (TypeError, ValueError):
+            raise ValueError(f"Fecha no válida: {fecha}") from None
+        items = record.get('items') or []
+        if not items:
+            raise ValueError("El pedido no tiene pizzas")
+
+        carrito, total_pedido = price_cart(self.cursor, items)
+        return {'id_cliente': id_cliente, 'fecha': fecha, 'direccion': record.get('direccion') or '',
+                'total': total_pedido, 'carrito': carrito}
+
+def import_orders(cnxn, cursor, path, fmt=None, commit_size=1000, rejects_path=None):
+    """Importa pedidos desde un archivo haciendo commit cada commit_size pedidos.
+
+    Los registros inválidos (o que la base rechaza) se escriben en rejects_path como
+    JSON Lines con el motivo, sin detener la importación. Devuelve (importados, rechazados).
+    """
+    backend = backend_for(cursor)
+    lookup = ImportLookup(cursor)
+    rejects_path = rejects_path or f"{path}.rechazos.jsonl"
+    imported = rejected = 0
+    started = time.perf_counter()
+
+    with open(rejects_path, 'w', encoding='utf-8') as rejects:
+        def reject(number, record, reason):
+            rejects.write(json.dumps({'registro': number, 'motivo': reason, 'datos': record}, default=str, ensure_ascii=False) + "\n")
+
+        def flush(chunk):
+            try:
+                count = len(backend.insert_orders(cursor, [order for _, _, order in chunk]))
+                cnxn.commit()
+                return count, 0
+            except DB_ERRORS:
+                cnxn.rollback()
+            # El bloque falló: se reintenta pedido por pedido para aislar los registros problemáticos
+            ok = failed = 0
+            for number, record, order in chunk:
+                try:
+                    backend.insert_orders(cursor, [order])
                     cnxn.commit()
-                    print("\n¡Registro eliminado exitosamente!")
-                else:
-                    print("\nNo se encontró ningún registro con ese ID.")
-                
-                print(f"Tabla '{table_name}' DESPUÉS del intento de borrado:")
-                print_results(cursor.execute(f"SELECT * FROM {table_name}"))
+                    ok += 1
+                except DB_ERRORS as ex:
+                    cnxn.rollback()
+                    reject(number, record, f"Error de base de datos: {ex}")
+                    failed += 1
+            return ok, failed
 
-            except pyodbc.IntegrityError:
-                print("\n❌ ERROR DE ELIMINACIÓN: No se puede eliminar este registro.")
-                print("Motivo: Otros datos en la base de datos dependen de él (ej: un cliente con pedidos, una pizza en un pedido).")
-            except ValueError:
-                print("\nError: El ID debe ser un número.")
-            except pyodbc.Error as ex:
-                print(f"\nOcurrió un error inesperado: {ex}")
-        
-        elif choice == '4':
-            break
-        else:
-            print("Opción no válida.")
-        input("\nPresiona Enter para continuar...")
+        chunk = []
+        for number, record in read_order_records(path, fmt):
+            try:
+                chunk.append((number, record, lookup.price_order(record)))
+            except (TypeError, ValueError) as ex:
+                reject(number, record, str(ex))
+                rejected += 1
+                continue
+            if len(chunk) >= commit_size:
+                ok, failed = flush(chunk)
+                imported, rejected = imported + ok, rejected + failed
+                chunk = []
+                print(f"  {imported} pedidos importados, {rejected} rechazados")
+        if chunk:
+            ok, failed = flush(chunk)
+            imported, rejected = imported + ok, rejected + failed
+
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed * 60 if elapsed else 0.0
+    print(f"✅ Importación terminada: {imported} pedidos en {elapsed:.1f} s ({rate:.0f} pedidos/min), {rejected} rechazados.")
+    if rejected:
+        print(f"Los registros rechazados están en {rejects_path}")
+    return imported, rejected
 
 
 # --- FUNCIÓN PRINCIPAL ---
-def main():
-    """Función principal que maneja la conexión y el menú principal."""
-    cnxn = None
+def main(backend=None):
+    """Función principal que maneja la conexión y el menú principal.
+
+    Cada opción del menú toma una conexión del pool y la devuelve al terminar, de modo
+    que una conexión caída se reemplaza en la siguiente operación sin cerrar la sesión.
+    """
+    backend = backend or get_backend()
+    pool = ConnectionPool(backend, size=1)
+    reports_pool = ConnectionPool(backend.reporting_backend(), size=1)
+    journal = flusher = None
+    if JOURNAL_ENABLED:
+        journal = OrderJournal()
+        flusher = JournalFlusher(journal, backend).start()
+    dashboard = LiveDashboard()
+    order_listeners.append(dashboard.record)
+    branches = None
     try:
-        cnxn = pyodbc.connect(conn_str)
-        cursor = cnxn.cursor()
-        print("¡Conexión a la base de datos PizzeriaDB establecida con éxito! ✅")
+        if BRANCHES:
+            branches = BranchSet(parse_branches(BRANCHES, backend.name))
+        with pool.connection() as cnxn:
+            print(f"¡Conexión a la base de datos PizzeriaDB ({backend.name}) establecida con éxito! ✅")
+            dashboard.poll(cnxn.cursor())  # Fija la marca de agua: el tablero cuenta desde ahora
 
         while True:
             print("\n============ MENÚ PRINCIPAL ============")
@@ -472,42 +4335,305 @@ def main():
             print("2. Crear un nuevo Pedido completo")
             print("3. Consultas Especiales")
             print("4. Mantenimiento de Registros")
-            print("5. Salir")
+            print("5. Estadísticas de consultas")
+            print("6. Tablero de ventas en vivo")
+            print("7. Salir")
             
-            choice = input("Selecciona una opción (1-5): ")
-
-            if choice == '1':
-                print("\nCargando todas las tablas...")
-                tables = ['Cliente', 'Pizza', 'Ingrediente', 'Pedido', 'DetallePedido', 'Pizza_Ingrediente_Personalizado']
-                for table in tables:
-                    cursor.execute(f"SELECT * FROM {table}")
-                    if print_results(cursor, f"Contenido de la tabla: {table}"):
-                        input("Presiona Enter para ver la siguiente tabla...")
-                    else:
-                        print(f"No hay datos en la tabla {table}.")
-                        input("Presiona Enter para continuar...")
-                        
-            elif choice == '2':
-                create_new_order(cnxn, cursor)
-            elif choice == '3':
-                run_special_queries(cursor)
-            elif choice == '4':
-                handle_maintenance(cnxn, cursor)
-            elif choice == '5':
+            choice = input("Selecciona una opción (1-7): ")
+            if choice == '7':
                 print("Cerrando conexión. ¡Hasta luego! 👋")
                 break
-            else:
-                print("Opción no válida. Por favor, elige una opción del 1 al 5.")
+            if choice == '6':
+                run_dashboard(reports_pool, dashboard)
+                continue
+            if choice not in ('1', '2', '3', '4', '5'):
+                print("Opción no válida. Por favor, elige una opción del 1 al 7.")
+                continue
+
+            try:
+                # Ver tablas y consultas solo leen: van por la conexión de reportes
+                with (reports_pool if choice in ('1', '3') else pool).connection() as cnxn:
+                    cursor = cnxn.cursor()
+                    if choice == '1':
+                        fmt = {'2': 'csv', '3': 'jsonl', '4': 'parquet', '5': 'arrow'}.get(
+                            input("Formato de salida (1. Tabla | 2. CSV | 3. JSON Lines | 4. Parquet | 5. Arrow) [1]: "), 'table')
+                        if fmt in EXPORT_FORMATS:
+                            try:
+                                export_tables(cursor, input("Carpeta de destino [exportacion]: ") or 'exportacion', fmt)
+                            except RuntimeError as ex:
+                                print(f"\n{ex}")
+                            continue
+                        if fmt != 'table':
+                            dump_tables(cursor, fmt, input("Carpeta de destino [.]: ") or '.')
+                            continue
+                        print("\nCargando todas las tablas...")
+                        tables = ['Cliente', 'Pizza', 'Ingrediente', 'Pedido', 'DetallePedido', 'Pizza_Ingrediente_Personalizado']
+                        for table in tables:
+                            cursor.execute(f"SELECT * FROM {table}")
+                            if print_results(cursor, f"Contenido de la tabla: {table}", page_size=PAGE_SIZE):
+                                input("Presiona Enter para ver la siguiente tabla...")
+                            else:
+                                print(f"No hay datos en la tabla {table}.")
+                                input("Presiona Enter para continuar...")
+                                
+                    elif choice == '2':
+                        create_new_order(cnxn, cursor, journal)
+                    elif choice == '3':
+                        if branches is not None:
+                            run_branch_queries(branches, cursor)
+                        else:
+                            run_special_queries(cursor)
+                    elif choice == '4':
+                        handle_maintenance(cnxn, cursor)
+                    elif choice == '5':
+                        show_query_stats()
+                        if journal is not None:
+                            show_journal_status(journal, flusher)
+            except DB_ERRORS as ex:
+                print(f"\n❌ Se perdió la conexión con la base de datos; se reconectará en la siguiente operación. Error: {ex}")
     
-    except pyodbc.Error as ex:
+    except DB_ERRORS as ex:
         print("\n*** ERROR DE CONEXIÓN A LA BASE DE DATOS *** ❌")
-        print(f"No se pudo conectar a '{SERVER_NAME}'. Verifica la configuración.")
+        print(f"No se pudo conectar a '{backend.describe()}'. Verifica la configuración.")
         print(ex)
+    except (RuntimeError, ValueError) as ex:
+        print(f"\n*** ERROR DE CONFIGURACIÓN *** ❌\n{ex}")
 
     finally:
-        if cnxn:
-            cnxn.close()
+        order_listeners.remove(dashboard.record)
+        pool.close()
+        reports_pool.close()
+        if branches is not None:
+            branches.close()
+        if flusher is not None:
+            flusher.stop()
+            pending = journal.counts().get('pendiente', 0)
+            if pending:
+                print(f"Quedan {pending} pedidos pendientes en {journal.path}; se enviarán al volver a abrir el programa.")
+            journal.close()
+        if QUERY_STATS_ENABLED and query_stats.snapshot():
+            try:
+                query_stats.dump()
+            except OSError as ex:
+                print(f"No se pudieron guardar las estadísticas de consultas: {ex}")
+
+# --- LÍNEA DE COMANDOS ---
+def cli(argv=None):
+    """Sin argumentos abre el menú interactivo; los subcomandos permiten uso no interactivo."""
+    parser = argparse.ArgumentParser(description="PizzeriaDB")
+    parser.add_argument('--backend', choices=['sqlserver', 'sqlite'], default=None, help="Backend de base de datos")
+    parser.add_argument('--sqlite-path', default=None, help="Archivo de la base SQLite")
+    commands = parser.add_subparsers(dest='command')
+
+    generate = commands.add_parser('generate', help="Genera datos sintéticos")
+    generate.add_argument('--orders', type=int, default=1000)
+    generate.add_argument('--clients', type=int, default=None)
+    generate.add_argument('--years', type=int, default=2)
+    generate.add_argument('--seed', type=int, default=42)
+    generate.add_argument('--batch-size', type=int, default=5000)
+
+    bench = commands.add_parser('bench', help="Ejecuta el benchmark de flujos guionizados")
+    bench.add_argument('--operations', type=int, default=1000)
+    bench.add_argument('--seed', type=int, default=7)
+    bench.add_argument('--mix', default=None, help="Pesos por operación, ej: pedido=80,top_clientes=5")
+    bench.add_argument('--json', dest='json_path', default=None, help="Guarda los resultados en este archivo")
+    bench.add_argument('--baseline', default=None, help="Resultados previos con los que comparar")
+    bench.add_argument('--tolerance', type=float, default=0.10, help="Empeoramiento de p95 tolerado (0.10 = 10%%)")
+
+    concurrency = commands.add_parser('bench-concurrency', help="Mide cómo escala la creación de pedidos con el número de hilos")
+    concurrency.add_argument('--workers', default='1,2,4,8', help="Números de hilos a probar, ej: 1,2,4,8")
+    concurrency.add_argument('--operations', type=int, default=500)
+    concurrency.add_argument('--latency-ms', type=float, default=None, help="Latencia simulada por viaje (solo SQLite)")
+
+    server = commands.add_parser('serve', help="Levanta la API HTTP/JSON local")
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=8080)
+    server.add_argument('--workers', type=int, default=8, help="Hilos y conexiones para la base de datos")
+    server.add_argument('--batch-size', type=int, default=50, help="Máximo de pedidos por transacción agrupada")
+    server.add_argument('--batch-delay-ms', type=float, default=5, help="Espera máxima para agrupar pedidos")
+
+    journal_cmd = commands.add_parser('journal', help="Envía los pedidos pendientes del diario local y muestra su estado")
+    journal_cmd.add_argument('--path', default=None, help="Archivo del diario (por defecto, PIZZERIA_JOURNAL_PATH)")
+
+    bulk = commands.add_parser('bulk', help="Cambios masivos de precios, disponibilidad o borrado")
+    bulk.add_argument('table', choices=sorted(BULK_TABLES))
+    bulk_action = bulk.add_mutually_exclusive_group(required=True)
+    bulk_action.add_argument('--porcentaje', type=float, help="Cambio de precio en porcentaje (ej: 8 o -5)")
+    bulk_action.add_argument('--monto', type=float, help="Monto a sumar al precio (negativo para restar)")
+    bulk_action.add_argument('--disponible', choices=['si', 'no'], help="Marca las pizzas como disponibles o no")
+    bulk_action.add_argument('--borrar', action='store_true', help="Borra los registros que no estén en pedidos")
+    bulk.add_argument('--ids', default=None, help="Claves separadas por coma")
+    bulk.add_argument('--nombre', default=None, help="El nombre contiene este texto")
+    bulk.add_argument('--tipo', default=None, help="Tipo de ingrediente")
+    bulk.add_argument('--solo-disponibles', choices=['si', 'no'], default=None, help="Filtra pizzas por disponibilidad")
+    bulk.add_argument('--dry-run', action='store_true', help="Solo muestra la vista previa")
+
+    exporter = commands.add_parser('export', help="Exporta las tablas a Parquet o Arrow IPC (requiere pyarrow)")
+    exporter.add_argument('--folder', default='exportacion')
+    exporter.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='parquet')
+    exporter.add_argument('--full', action='store_true', help="Ignora la marca de agua y exporta todo de nuevo")
+    exporter.add_argument('--since', type=datetime.fromisoformat, default=None,
+                          help="Solo pedidos desde esta fecha (AAAA-MM-DD), sin modificar el estado incremental")
+
+    report = commands.add_parser('analytics', help="Reportes del historial calculados en memoria (requiere numpy)")
+    report.add_argument('--report', choices=['all'] + list(ANALYTICS_REPORTS), default='all')
+
+    archiver = commands.add_parser('archive', help="Mueve los pedidos antiguos a las tablas de archivo por lotes")
+    archiver.add_argument('--before', type=datetime.fromisoformat, default=None, help="Fecha de corte (AAAA-MM-DD)")
+    archiver.add_argument('--older-than-days', type=int, default=ARCHIVE_RETENTION_DAYS)
+    archiver.add_argument('--batch-size', type=int, default=500)
+    archiver.add_argument('--pause-ms', type=float, default=50, help="Pausa entre lotes")
+    archiver.add_argument('--max-batches', type=int, default=None)
+    archiver.add_argument('--dry-run', action='store_true', help="Solo cuenta los pedidos a archivar")
+
+    board = commands.add_parser('dashboard', help="Tablero de ventas en vivo (pedidos desde que se abre)")
+    board.add_argument('--interval', type=float, default=2.0, help="Segundos entre actualizaciones")
+
+    chain = commands.add_parser('branches', help="Consultas especiales de todas las sucursales en paralelo")
+    chain.add_argument('--branches', default=None, help="Sucursales nombre=destino separadas por coma (por defecto, PIZZERIA_BRANCHES)")
+    chain.add_argument('--query', choices=['all', 'pedidos_por_mes'] + list(BRANCH_QUERIES), default='all')
+    chain.add_argument('--months', default='', help="Meses para pedidos_por_mes, ej: 1,2,12")
+    chain.add_argument('--years', default='', help="Año o rango de años para pedidos_por_mes, ej: 2024 o 2023-2025")
+    chain.add_argument('--archive', action='store_true', help="Incluye los pedidos archivados")
+    chain.add_argument('--timeout', type=float, default=None, help="Segundos de espera por sucursal")
+    chain.add_argument('--sequential', action='store_true', help="Consulta las sucursales una tras otra (para comparar)")
+
+    importer = commands.add_parser('import', help="Importa pedidos desde CSV o JSON Lines")
+    importer.add_argument('path')
+    importer.add_argument('--format', choices=['csv', 'jsonl'], default=None)
+    importer.add_argument('--commit-size', type=int, default=1000)
+    importer.add_argument('--rejects', default=None, help="Archivo de registros rechazados")
+
+    args = parser.parse_args(argv)
+    options = {'path': args.sqlite_path} if args.sqlite_path else {}
+    if getattr(args, 'latency_ms', None) is not None:
+        options['latency_ms'] = args.latency_ms
+    backend = get_backend(args.backend or (None if not options else 'sqlite'), **options)
+    if args.command is None:
+        return main(backend)
+    if args.command == 'journal':
+        journal = OrderJournal(args.path)
+        flusher = JournalFlusher(journal, backend)
+        try:
+            print(f"Pedidos enviados: {flusher.flush()}")
+        except (RuntimeError,) + DB_ERRORS as ex:
+            print(f"❌ No se pudieron enviar los pedidos pendientes: {ex}")
+        finally:
+            flusher.pool.close()
+        show_journal_status(journal)
+        pending = journal.counts().get('pendiente', 0)
+        journal.close()
+        return 1 if pending else 0
+    if args.command == 'serve':
+        return serve_api(backend, args.host, args.port, args.workers, args.batch_size, args.batch_delay_ms)
+    if args.command == 'bench-concurrency':
+        results = run_concurrency_benchmark(backend, [int(n) for n in args.workers.split(',')], args.operations)
+        base = results[0][2]
+        print_rows(["Hilos", "Segundos", "Pedidos/s", "Aceleración", "Errores"],
+                   [(w, f"{t:.2f}", f"{rate:.1f}", f"{rate / base:.2f}x", e) for w, t, rate, e in results],
+                   "Escalabilidad de creación de pedidos")
+        return 1 if any(e for *_, e in results) else 0
+
+    if args.command == 'dashboard':
+        pool = ConnectionPool(backend.reporting_backend(), size=1)
+        try:
+            run_dashboard(pool, LiveDashboard(), args.interval)
+        finally:
+            pool.close()
+        return 0
+    if args.command == 'branches':
+        try:
+            months = [int(month) for month in args.months.split(',') if month.strip()]
+            if args.years.strip():
+                order_years(None, args.years)  # Valida el texto antes de consultar las sucursales
+        except ValueError:
+            print(f"Error: meses o años no válidos ('{args.months}', '{args.years}').")
+            return 1
+        if args.query == 'pedidos_por_mes' and not all(1 <= month <= 12 for month in months or [0]):
+            print("Error: indica los meses (1-12) con --months, ej: 1,2.")
+            return 1
+        try:
+            branches = BranchSet(parse_branches(args.branches or BRANCHES, backend.name), args.timeout)
+        except ValueError as ex:
+            print(f"Error: {ex}")
+            return 1
+        try:
+            failed = False
+            for name in (list(BRANCH_QUERIES) if args.query == 'all' else [args.query]):
+                failed |= bool(run_branch_query(branches, name, months, args.years, args.archive, not args.sequential))
+        finally:
+            branches.close()
+        return 1 if failed else 0
+
+    if args.command in ('export', 'analytics'):
+        backend = backend.reporting_backend()
+    cnxn = instrument(backend.connect())
+    cursor = cnxn.cursor()
+    try:
+        if args.command == 'generate':
+            generate_synthetic_data(cnxn, cursor, args.orders, args.clients, args.seed, args.years, args.batch_size)
+            print("✅ Datos sintéticos generados.")
+        elif args.command == 'bench':
+            mix = None
+            if args.mix:
+                mix = {name: float(weight) for name, weight in (item.split('=') for item in args.mix.split(','))}
+            results = run_workload(cnxn, cursor, args.operations, mix, args.seed)
+            baseline = None
+            if args.baseline:
+                with open(args.baseline, encoding='utf-8') as source:
+                    baseline = json.load(source)
+            regressions = print_workload_results(results, baseline, args.tolerance)
+            if args.json_path:
+                with open(args.json_path, 'w', encoding='utf-8') as out:
+                    json.dump(results, out, indent=2)
+            return 1 if regressions else 0
+        elif args.command == 'bulk':
+            for action in ('porcentaje', 'monto', 'disponible'):
+                if getattr(args, action) is not None:
+                    value = getattr(args, action)
+                    break
+            else:
+                action, value = 'borrar', None
+            if action == 'disponible':
+                value = value == 'si'
+            filters = {'ids': args.ids.split(',') if args.ids else None, 'nombre': args.nombre}
+            if args.table == 'Pizza' and args.solo_disponibles:
+                filters['disponible'] = args.solo_disponibles == 'si'
+            if args.table == 'Ingrediente':
+                filters['tipo'] = args.tipo
+            try:
+                columns, preview = bulk_maintenance(cnxn, cursor, args.table, action, value, filters, args.dry_run)
+            except ValueError as ex:
+                print(f"Error: {ex}")
+                return 1
+            if print_rows(columns, preview, "Vista previa de los cambios" if args.dry_run else "Cambios aplicados"):
+                print(f"{bulk_affected(action, preview)} registros {'cambiarían (sin aplicar)' if args.dry_run else 'modificados'}.")
+        elif args.command == 'archive':
+            cutoff = args.before or datetime.now() - timedelta(days=args.older_than_days)
+            count = archive_orders(cnxn, cursor, cutoff, args.batch_size, args.pause_ms / 1000.0, args.max_batches, args.dry_run)
+            print(f"{'Pedidos por archivar' if args.dry_run else '✅ Pedidos archivados'} (anteriores a {cutoff:%Y-%m-%d}): {count}")
+        elif args.command == 'export':
+            try:
+                export_tables(cursor, args.folder, args.format, args.full, args.since)
+            except RuntimeError as ex:
+                print(ex)
+                return 1
+        elif args.command == 'analytics':
+            try:
+                analytics.refresh(cursor)
+            except RuntimeError as ex:
+                print(ex)
+                return 1
+            for name in (ANALYTICS_REPORTS if args.report == 'all' else [args.report]):
+                description, report = ANALYTICS_REPORTS[name]
+                print_rows(*report(analytics), description)
+        elif args.command == 'import':
+            _, rejected = import_orders(cnxn, cursor, args.path, args.format, args.commit_size, args.rejects)
+            return 1 if rejected else 0
+    finally:
+        cnxn.close()
+    return 0
 
 # Ejecutar el programa
 if __name__ == '__main__':
-    main()
+    sys.exit(cli())
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# Las pruebas no deben escribir el log de consultas lentas en la carpeta del proyecto
+os.environ.setdefault('PIZZERIA_SLOW_QUERY_LOG', '')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """Base SQLite desechable con el esquema completo."""
+    return pizzeria.SQLiteBackend(str(tmp_path / 'prueba.sqlite3'), latency_ms=0)
+
+
+@pytest.fixture
+def seeded(backend):
+    """Base desechable con datos sintéticos; devuelve (backend, conexión, cursor)."""
+    cnxn = pizzeria.instrument(backend.connect())
+    cursor = cnxn.cursor()
+    pizzeria.generate_synthetic_data(cnxn, cursor, orders=300, clients=60, seed=3)
+    yield backend, cnxn, cursor
+    cnxn.close()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+np = pytest.importorskip('numpy')
+
+
+def _insert_order(cursor, id_pedido, id_detalle, pizza, extras):
+    """Pedido con ID explícito, como uno cuyo IDENTITY se confirma fuera de orden."""
+    cursor.execute("INSERT INTO Pedido (ID_Pedido, ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido) "
+                   "VALUES (?, (SELECT MIN(ID_Cliente) FROM Cliente), '2025-02-03 12:30:00', 'Calle 1', 25.5)", id_pedido)
+    cursor.execute("INSERT INTO DetallePedido (ID_DetallePedido, ID_Pedido, ID_Pizza_Menu, Cantidad, "
+                   "Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle) VALUES (?, ?, ?, 2, 12.75, 25.5)",
+                   id_detalle, id_pedido, pizza)
+    cursor.executemany("INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente) VALUES (?, ?)",
+                       [(id_detalle, extra) for extra in extras])
+
+
+def _reports(analytics):
+    return {name: report(analytics) for name, (_, report) in pizzeria.ANALYTICS_REPORTS.items()}
+
+
+def test_incremental_refresh_matches_full_reload(seeded):
+    _, cnxn, cursor = seeded
+    analytics = pizzeria.OrderAnalytics()
+    assert analytics.refresh(cursor) == cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    top_order = cursor.execute("SELECT MAX(ID_Pedido) FROM Pedido").fetchval()
+    top_line = cursor.execute("SELECT MAX(ID_DetallePedido) FROM DetallePedido").fetchval()
+    pizzas = [row[0] for row in cursor.execute("SELECT ID_Pizza FROM Pizza").fetchall()]
+    extras = [row[0] for row in cursor.execute("SELECT ID_Ingrediente FROM Ingrediente").fetchall()]
+
+    # El pedido con el ID mayor se confirma antes que el anterior
+    _insert_order(cursor, top_order + 2, top_line + 2, pizzas[0], extras[:2])
+    cnxn.commit()
+    assert analytics.refresh(cursor) == 1
+    _insert_order(cursor, top_order + 1, top_line + 1, pizzas[1], extras[2:3])
+    cnxn.commit()
+    assert analytics.refresh(cursor) == 1
+    assert analytics.refresh(cursor) == 0
+
+    full = pizzeria.OrderAnalytics()
+    full.refresh(cursor)
+    assert np.array_equal(analytics.order_id, full.order_id)
+    assert sorted(analytics.line_id) == sorted(full.line_id)
+    assert sorted(zip(analytics.extra_line, analytics.extra_ingredient)) == sorted(zip(full.extra_line, full.extra_ingredient))
+    assert _reports(analytics) == _reports(full)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+class RecordingService:
+    """Servicio falso que registra el tamaño de cada lote."""
+
+    def __init__(self):
+        self.batches = []
+
+    def create_orders(self, orders):
+        self.batches.append(len(orders))
+        return [(id_cliente, 0.0) for id_cliente, _, _, _ in orders]
+
+
+def _submit_all(count, max_batch, max_delay):
+    service = RecordingService()
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = pizzeria.OrderBatcher(service, executor, consumers=1, max_batch=max_batch, max_delay=max_delay)
+            batcher.start()
+            results = await asyncio.gather(*(batcher.submit(i, []) for i in range(count)))
+            await batcher.stop()
+        return results
+
+    return asyncio.run(run()), service.batches
+
+
+def test_queued_orders_are_drained_after_deadline():
+    # Con espera 0 los pedidos que ya están en la cola deben ir en el mismo lote
+    results, batches = _submit_all(10, max_batch=50, max_delay=0)
+    assert [id_pedido for id_pedido, _ in results] == list(range(10))
+    assert batches == [10]
+
+
+def test_batches_respect_max_batch():
+    results, batches = _submit_all(25, max_batch=10, max_delay=0)
+    assert len(results) == 25
+    assert batches == [10, 10, 5]
+
+
+async def _request(port, method, path, body=None):
+    """Envía una petición HTTP/1.1 cruda y devuelve (estado, JSON de la respuesta)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8') if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+                 f"Connection: close\r\n\r\n".encode('latin-1') + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1]), json.loads(payload)
+
+
+def test_api_against_local_sqlite(seeded):
+    backend, cnxn, cursor = seeded
+    before = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    cliente, telefono = cursor.execute("SELECT ID_Cliente, Telefono FROM Cliente ORDER BY ID_Cliente").fetchone()
+    pizzas = [row[0] for row in cursor.execute("SELECT ID_Pizza FROM Pizza WHERE Disponible = 1").fetchall()]
+    cnxn.commit()
+    orders = [{'id_cliente': cliente, 'items': [{'id_pizza': pizzas[i % len(pizzas)], 'cantidad': 1 + i % 2}],
+               'direccion': f"Calle {i}"} for i in range(20)]
+
+    batches = []
+
+    async def run():
+        api = pizzeria.OrderAPI(backend, workers=4, max_delay_ms=20)
+        create_orders = api.service.create_orders
+        api.service.create_orders = lambda batch: batches.append(len(batch)) or create_orders(batch)
+        port = await api.start(port=0)
+        try:
+            created = await asyncio.gather(*(_request(port, 'POST', '/pedidos', order) for order in orders))
+            others = await asyncio.gather(
+                _request(port, 'POST', '/pedidos', b'{no es json'),
+                _request(port, 'POST', '/pedidos', {'id_cliente': cliente, 'items': [{'id_pizza': pizzas[0]}]}),
+                _request(port, 'GET', '/no-existe'),
+                _request(port, 'POST', '/clientes', {'nombre': 'Ana', 'apellido': 'Ruiz', 'telefono': telefono}),
+                _request(port, 'GET', '/menu'))
+            api.pool.close()  # Sin conexiones al primario: la API responde 503
+            unavailable = await _request(port, 'GET', '/menu')
+        finally:
+            await api.stop()
+        return created, others, unavailable
+
+    created, others, unavailable = asyncio.run(run())
+    assert [status for status, _ in created] == [201] * 20
+    ids = [payload['id_pedido'] for _, payload in created]
+    assert len(set(ids)) == 20
+    assert len(batches) < 20  # Los pedidos simultáneos se guardaron agrupados
+    assert [status for status, _ in others] == [400, 400, 404, 409, 200]
+    assert unavailable[0] == 503
+
+    assert cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval() == before + 20
+    saved = dict(cursor.execute(f"SELECT ID_Pedido, Total_Pedido FROM Pedido WHERE ID_Pedido IN ({', '.join('?' * 20)})",
+                                *ids).fetchall())
+    assert saved == {payload['id_pedido']: pytest.approx(payload['total']) for _, payload in created}
+    assert set(pizzeria.verify_summaries(cursor).values()) == {0}
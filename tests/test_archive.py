@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+CUTOFF = datetime(2100, 1, 1)  # Archiva todo
+
+
+class FailingCursor:
+    """Cursor que falla una vez en el borrado de Pedido, como una caída tras copiar."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.failed = False
+
+    def execute(self, sql, *params):
+        if not self.failed and sql.startswith("DELETE FROM Pedido WHERE"):
+            self.failed = True
+            raise pizzeria.sqlite3.OperationalError("caída simulada")
+        self._cursor.execute(sql, *params)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _counts(cursor, prefix):
+    tables = ['Pedido', 'DetallePedido', 'Pizza_Ingrediente_Personalizado']
+    hot = [cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchval() for table in tables]
+    archived = [cursor.execute(f"SELECT COUNT(*) FROM {prefix}{table}_Archivo").fetchval() for table in tables]
+    return hot, archived
+
+
+@pytest.mark.parametrize("attached", [False, True])
+def test_archive_rerun_after_failure_is_safe(seeded, tmp_path, monkeypatch, attached):
+    backend, _, _ = seeded
+    if attached:
+        monkeypatch.setattr(pizzeria, 'ARCHIVE_DB', str(tmp_path / 'archivo.sqlite3'))
+    cnxn = pizzeria.instrument(backend.connect())
+    cursor = cnxn.cursor()
+    prefix = backend.archive_prefix(cursor)
+    assert backend.archive_atomic(cursor) is not attached
+    original, _ = _counts(cursor, prefix)
+
+    failing = FailingCursor(cursor)
+    with pytest.raises(pizzeria.DB_ERRORS):
+        pizzeria.archive_orders(cnxn, failing, CUTOFF, batch_size=50, pause=0)
+    hot, archived = _counts(cursor, prefix)
+    if attached:
+        assert archived[0] == 50 and hot == original  # Copia confirmada, borrado pendiente
+    else:
+        assert archived == [0, 0, 0] and hot == original  # Todo el lote se deshizo
+
+    pizzeria.archive_orders(cnxn, cursor, CUTOFF, batch_size=50, pause=0)
+    hot, archived = _counts(cursor, prefix)
+    assert hot == [0, 0, 0]
+    assert archived == original
+    assert set(pizzeria.verify_summaries(cursor).values()) == {0}
+    cnxn.close()
+
+
+def test_archived_columns_match_both_schemas(seeded):
+    backend, cnxn, cursor = seeded
+    backend.ensure_archive_tables(cursor)
+    for table, (key, names, _) in pizzeria.ARCHIVED_TABLES.items():
+        for source in (table, f"{table}_Archivo"):
+            assert [row[1] for row in cursor.execute(f"PRAGMA table_info({source})").fetchall()] == names
+        assert key in names
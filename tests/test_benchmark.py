@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+@pytest.mark.parametrize("values, pct, expected", [
+    (range(1, 21), 95, 19),
+    (range(1, 101), 99, 99),
+    (range(1, 101), 95, 95),
+    (range(1, 11), 50, 5),
+    (range(1, 11), 100, 10),
+    (range(1, 11), 0, 1),
+    ([7], 99, 7),
+    ([], 95, 0.0),
+])
+def test_percentile_nearest_rank(values, pct, expected):
+    assert pizzeria.percentile(list(values), pct) == expected
+
+
+def test_workload_runs_without_errors(seeded):
+    _, cnxn, cursor = seeded
+    results = pizzeria.run_workload(cnxn, cursor, operations=60, seed=1)
+    assert results['_total']['count'] == 60
+    assert results['_total']['errors'] == 0
+
+
+class _EndOfJanuary(datetime):
+    """datetime con now() fijo en el 31 de enero; las fechas que construye son datetime normales."""
+
+    def __new__(cls, *args, **kwargs):
+        return datetime.__new__(datetime, *args, **kwargs)
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2025, 1, 31, 20, 15)
+
+
+def test_scripted_order_on_day_missing_from_month(seeded, monkeypatch):
+    # El 31 de enero, un pedido de febrero debe guardarse el 28 y no cancelarse en silencio
+    _, cnxn, cursor = seeded
+    monkeypatch.setattr(pizzeria, 'datetime', _EndOfJanuary)
+    ids = pizzeria.workload_ids(cursor)
+    answers = pizzeria._order_script(pizzeria.random.Random(1), ids)[:-1] + ['2']
+    last = cursor.execute("SELECT MAX(ID_Pedido) FROM Pedido").fetchval()
+    with pizzeria.ScriptedInput(answers):
+        pizzeria.create_new_order(cnxn, cursor)
+    fecha = cursor.execute("SELECT Fecha_Hora_Pedido FROM Pedido WHERE ID_Pedido > ?", last).fetchval()
+    assert fecha == '2025-02-28 20:15:00'
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+def _branch(tmp_path, name, seed, archive=False):
+    backend = pizzeria.SQLiteBackend(str(tmp_path / f'{name}.sqlite3'), latency_ms=0)
+    cnxn = pizzeria.instrument(backend.connect())
+    cursor = cnxn.cursor()
+    pizzeria.generate_synthetic_data(cnxn, cursor, orders=400, clients=80, seed=seed)
+    if archive:
+        pizzeria.archive_orders(cnxn, cursor, datetime.now() - timedelta(days=365), pause=0)
+    cnxn.close()
+    return name, backend
+
+
+def _full_merge(branches, name, include_archive):
+    """Lo que devolvería traer la tabla completa de cada sucursal y sumar en Python."""
+    columns, top_n, _, live_form = pizzeria.BRANCH_QUERIES[name]
+    partials = {}
+    for branch, backend in branches:
+        cnxn = backend.connect()
+        cursor = cnxn.cursor()
+        sql, params = pizzeria.branch_query_sql(live_form)
+        if include_archive:
+            sql = pizzeria.with_archive(cursor, sql)
+        partials[branch] = [tuple(row) for row in cursor.execute(sql, *params).fetchall()]
+        cnxn.close()
+    return pizzeria.merge_branch_counts(partials, top_n)
+
+
+def _count_transferred(monkeypatch):
+    transferred = []
+    fan_out = pizzeria.BranchSet.fan_out
+
+    def counting(self, function, names=None, parallel=True, timeout=None):
+        results, seconds, failures = fan_out(self, function, names, parallel, timeout)
+        transferred.append(sum(len(rows) for rows in results.values()))
+        return results, seconds, failures
+    monkeypatch.setattr(pizzeria.BranchSet, 'fan_out', counting)
+    return transferred
+
+
+@pytest.fixture
+def branches(tmp_path):
+    return [_branch(tmp_path, 'Centro', 5), _branch(tmp_path, 'Norte', 6, archive=True), _branch(tmp_path, 'Sur', 7)]
+
+
+@pytest.mark.parametrize('include_archive', [False, True])
+@pytest.mark.parametrize('name', ['top_clientes', 'pizzas_populares', 'extras_populares'])
+def test_branch_query_matches_full_merge(branches, name, include_archive):
+    branch_set = pizzeria.BranchSet(branches, timeout=10)
+    try:
+        _, rows, seconds, failures = branch_set.special_query(name, include_archive)
+    finally:
+        branch_set.close()
+    assert failures == {}
+    assert set(seconds) == {'Centro', 'Norte', 'Sur'}
+    assert rows == _full_merge(branches, name, include_archive)
+
+
+def test_top_clients_transfers_less_than_full_tables(branches, monkeypatch):
+    transferred = _count_transferred(monkeypatch)
+    branch_set = pizzeria.BranchSet(branches, timeout=10)
+    try:
+        branch_set.special_query('top_clientes', parallel=False)
+    finally:
+        branch_set.close()
+    assert sum(transferred) < 3 * 80
+
+
+def _client_counts(tmp_path, name, counts):
+    """Sucursal con clientes y su resumen de pedidos ya calculado: {teléfono: pedidos}."""
+    backend = pizzeria.SQLiteBackend(str(tmp_path / f'{name}.sqlite3'), latency_ms=0)
+    cnxn = backend.connect()
+    cursor = cnxn.cursor()
+    for phone, total in counts.items():
+        cursor.execute("INSERT INTO Cliente (Nombre, Apellido, Telefono, Email, Direccion_Completa) VALUES (?, ?, ?, ?, ?)",
+                       'Cliente', phone, phone, f"{phone}@ejemplo.com", 'Calle 1')
+        cursor.execute("INSERT INTO Resumen_Cliente (ID_Cliente, TotalPedidos) VALUES (?, ?)",
+                       cursor.execute("SELECT ID_Cliente FROM Cliente WHERE Telefono = ?", phone).fetchval(), total)
+    cnxn.commit()
+    cnxn.close()
+    return name, backend
+
+
+def test_global_top_client_missing_from_every_local_top(tmp_path, monkeypatch):
+    # El 900 es el primero de la cadena (27) sin estar en el top 3 de ninguna sucursal (9 < 10)
+    filler = {f"8{n:03d}": 1 for n in range(40)}
+    branches = [_client_counts(tmp_path, 'A', {'101': 10, '102': 10, '103': 10, '900': 9, **filler}),
+                _client_counts(tmp_path, 'B', {'201': 10, '202': 10, '203': 10, '900': 9, **filler}),
+                _client_counts(tmp_path, 'C', {'301': 10, '302': 10, '303': 10, '900': 9, **filler})]
+    transferred = _count_transferred(monkeypatch)
+    branch_set = pizzeria.BranchSet(branches, timeout=10)
+    try:
+        _, rows, _, failures = branch_set.special_query('top_clientes')
+    finally:
+        branch_set.close()
+    assert failures == {}
+    assert [(row[0], row[3], row[4]) for row in rows] == [('900', 27, 'A, B, C'), ('101', 10, 'A'), ('102', 10, 'A')]
+    assert sum(transferred) < 3 * 44
+
+
+def test_failed_branch_is_reported_and_left_out(branches, tmp_path):
+    broken = ('Caida', pizzeria.SQLiteBackend(str(tmp_path / 'no_existe' / 'caida.sqlite3'), latency_ms=0))
+    branch_set = pizzeria.BranchSet(branches + [broken], timeout=10)
+    try:
+        _, rows, seconds, failures = branch_set.special_query('top_clientes')
+    finally:
+        branch_set.close()
+    assert set(failures) == {'Caida'}
+    assert 'Caida' not in seconds
+    assert rows == _full_merge(branches, 'top_clientes', False)
+
+
+def test_slow_branch_shares_one_deadline_across_rounds(branches, monkeypatch):
+    run, fan_out = pizzeria.BranchSet._run, pizzeria.BranchSet.fan_out
+    waits = []
+
+    def slow_sur(self, name, function):
+        if name == 'Sur':
+            time.sleep(0.4)  # Cada ronda por separado entra en el plazo, dos seguidas no
+        return run(self, name, function)
+
+    def recording(self, function, names=None, parallel=True, timeout=None):
+        waits.append(timeout)
+        return fan_out(self, function, names, parallel, timeout)
+    monkeypatch.setattr(pizzeria.BranchSet, '_run', slow_sur)
+    monkeypatch.setattr(pizzeria.BranchSet, 'fan_out', recording)
+    branch_set = pizzeria.BranchSet(branches, timeout=0.6)
+    try:
+        started = time.monotonic()
+        _, _, _, failures = branch_set.special_query('top_clientes')
+        elapsed = time.monotonic() - started
+    finally:
+        branch_set.close()
+    assert 'Sur' in failures
+    assert elapsed < 0.75
+    assert len(waits) >= 2 and waits[0] <= 0.6 and waits == sorted(waits, reverse=True)
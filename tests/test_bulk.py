@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+@pytest.fixture
+def unused_pizzas(seeded):
+    """Dos pizzas sin pedidos (se pueden borrar); las del catálogo generado están en uso."""
+    backend, cnxn, cursor = seeded
+    cursor.executemany("INSERT INTO Pizza (Nombre_Pizza, Descripcion_Pizza, Precio_Base_Pizza) VALUES (?, '', ?)",
+                       [('Especial 50%', 10.0), ('Especial 50x', 12.0)])
+    cnxn.commit()
+    return seeded
+
+
+def _pizzas(cursor):
+    return cursor.execute("SELECT ID_Pizza, Nombre_Pizza, Precio_Base_Pizza, Disponible FROM Pizza ORDER BY ID_Pizza").fetchall()
+
+
+def test_delete_preview_counts_only_deletable_rows(unused_pizzas, monkeypatch, capsys):
+    _, cnxn, cursor = unused_pizzas
+    columns, preview = pizzeria.bulk_maintenance(cnxn, cursor, 'Pizza', 'borrar', dry_run=True)
+    assert len(preview) > 2
+    assert pizzeria.bulk_affected('borrar', preview) == 2
+
+    prompts = []
+    answers = iter(['4', '', '', '', 'n'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': prompts.append(prompt) or next(answers))
+    pizzeria.handle_bulk_maintenance(cnxn, cursor, 'Pizza')
+    assert prompts[-1] == "¿Aplicar los cambios a 2 registros? (s/n): "
+
+    before = len(_pizzas(cursor))
+    pizzeria.bulk_maintenance(cnxn, cursor, 'Pizza', 'borrar')
+    assert len(_pizzas(cursor)) == before - 2
+
+
+def test_name_filter_matches_wildcards_literally(unused_pizzas):
+    _, cnxn, cursor = unused_pizzas
+    _, preview = pizzeria.bulk_maintenance(cnxn, cursor, 'Pizza', 'monto', 1, {'nombre': '50%'}, dry_run=True)
+    assert [row[1] for row in preview] == ['Especial 50%']
+    _, preview = pizzeria.bulk_maintenance(cnxn, cursor, 'Pizza', 'monto', 1, {'nombre': 'l_5'}, dry_run=True)
+    assert preview == []
+
+
+@pytest.mark.parametrize("action, value", [('porcentaje', 10), ('monto', -1), ('disponible', False), ('borrar', None)])
+def test_dry_run_leaves_database_unchanged(unused_pizzas, action, value):
+    _, cnxn, cursor = unused_pizzas
+    before = _pizzas(cursor)
+    _, preview = pizzeria.bulk_maintenance(cnxn, cursor, 'Pizza', action, value, dry_run=True)
+    assert preview
+    assert _pizzas(cursor) == before
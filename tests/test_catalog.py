@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+CHANGES = {
+    # Dos precios que se intercambian: la suma de precios no cambia
+    'precios_cruzados': ["UPDATE Pizza SET Precio_Base_Pizza = Precio_Base_Pizza + 1 WHERE ID_Pizza = ?",
+                         "UPDATE Pizza SET Precio_Base_Pizza = Precio_Base_Pizza - 1 WHERE ID_Pizza = ?"],
+    'nombre': ["UPDATE Pizza SET Nombre_Pizza = Nombre_Pizza || ' Nueva' WHERE ID_Pizza = ?"],
+    'disponible': ["UPDATE Pizza SET Disponible = 1 - Disponible WHERE ID_Pizza = ?"],
+}
+
+
+@pytest.mark.parametrize('change', sorted(CHANGES))
+def test_cache_sees_changes_from_another_terminal(seeded, change):
+    backend, cnxn, cursor = seeded
+    cache = pizzeria.CatalogCache(ttl=0)
+    pizza_ids = sorted(cache._ensure(cursor)[0])
+    before = dict(cache._ensure(cursor)[0])
+
+    other = backend.connect()
+    for statement, pizza_id in zip(CHANGES[change], pizza_ids):
+        other.execute(statement, pizza_id)
+    other.commit()
+    other.close()
+
+    after = cache._ensure(cursor)[0]
+    assert after != before
+    assert after == {row[0]: (row[1], float(row[2]), bool(row[3]))
+                     for row in cursor.execute(pizzeria.CatalogCache.PIZZA_SQL).fetchall()}
+
+
+def test_version_is_stable_without_changes(seeded):
+    _, _, cursor = seeded
+    cache = pizzeria.CatalogCache(ttl=0)
+    assert cache._version_of(cursor) == cache._version_of(cursor)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+QUERIES = ["ma", "María", "maría g", "LUIS", "gar", "Ángel", "án", "ál", "9000000", "90000000 1", "cliente1", "CLIENTE2@",
+           "x", "zz", "Pé", "a_b", "50%", "[a"]
+
+
+@pytest.fixture
+def clients(seeded):
+    _, cnxn, cursor = seeded
+    for nombre, apellido, telefono, email in [("Ángel", "Álvarez", "5550001", "angel@ejemplo.com"),
+                                              ("ángela", "Pérez", "5550002", None),
+                                              ("a_b", "50%", "5550003", "[a@ejemplo.com")]:
+        pizzeria.insert_client(cnxn, cursor, nombre, apellido, telefono, email)
+    cnxn.commit()
+    return cursor
+
+
+@pytest.mark.parametrize("text", QUERIES)
+def test_index_and_database_return_the_same_clients(clients, monkeypatch, text):
+    monkeypatch.setattr(pizzeria, 'CLIENT_INDEX_ENABLED', False)
+    from_database = [tuple(row) for row in pizzeria.search_clients(clients, text, limit=25)]
+    monkeypatch.setattr(pizzeria, 'CLIENT_INDEX_ENABLED', True)
+    monkeypatch.setattr(pizzeria, 'client_index', pizzeria.ClientSearchIndex())
+    from_index = [tuple(row) for row in pizzeria.search_clients(clients, text, limit=25)]
+    assert from_index == from_database
+
+
+def test_name_search_is_case_insensitive_outside_ascii(clients):
+    assert {row[1] for row in pizzeria.search_clients(clients, "án")} == {"Ángel", "ángela"}
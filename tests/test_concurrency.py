@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+@pytest.fixture
+def fast_switching():
+    # Cambios de hilo frecuentes para que las carreras aparezcan en pocas iteraciones
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(previous)
+
+
+def _race(readers, read, invalidate, seconds=1.0):
+    """Lee desde varios hilos mientras otro invalida sin pausa; devuelve las excepciones."""
+    errors = []
+    stop = threading.Event()
+
+    def read_loop():
+        try:
+            while not stop.is_set():
+                read()
+        except Exception as ex:  # La prueba reporta cualquier fallo, no solo los de base de datos
+            errors.append(ex)
+
+    def invalidate_loop():
+        while not stop.is_set():
+            invalidate()
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)] + [threading.Thread(target=invalidate_loop)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_orders_are_saved_once_with_bounded_pool(seeded):
+    backend, cnxn, cursor = seeded
+    before = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    clientes = [row[0] for row in cursor.execute("SELECT ID_Cliente FROM Cliente").fetchall()]
+    pizzas = [row[0] for row in cursor.execute("SELECT ID_Pizza FROM Pizza").fetchall()]
+    cnxn.commit()
+
+    opened = []
+    connect = backend.connect
+    backend.connect = lambda: opened.append(1) or connect()
+    pool = pizzeria.ConnectionPool(backend, size=4)
+    service = pizzeria.OrderService(pool)
+    jobs = [(clientes[i % len(clientes)], [{'id_pizza': pizzas[i % len(pizzas)], 'cantidad': 1 + i % 3}]) for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda job: service.create_order(job[0], job[1], "Prueba"), jobs))
+    pool.close()
+
+    assert len({id_pedido for id_pedido, _ in results}) == 200
+    assert cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval() == before + 200
+    assert set(pizzeria.verify_summaries(cursor).values()) == {0}
+    assert len(opened) <= 4
+
+
+def test_catalog_reads_survive_invalidate_right_after_load(seeded):
+    _, _, cursor = seeded
+
+    class InterleavedCache(pizzeria.CatalogCache):
+        # Otro hilo invalida justo después de que _ensure suelta el candado
+        def _ensure(self, cursor):
+            result = super()._ensure(cursor)
+            self.invalidate()
+            return result
+
+    cache = InterleavedCache(ttl=300)
+    assert cache.pizza_price(cursor, 1) is not None
+    assert cache.available_pizzas(cursor)
+    assert cache.ingredient_price(cursor, 1) is not None
+    assert cache.extra_ingredients(cursor)
+
+
+def test_client_index_survives_invalidate_during_search(seeded, fast_switching):
+    backend, _, _ = seeded
+    index = pizzeria.ClientSearchIndex(ttl=300)
+    cursors = threading.local()
+
+    def search():
+        if not hasattr(cursors, 'cursor'):
+            cursors.cursor = backend.connect().cursor()
+        index.search(cursors.cursor, 'nombre', ['ma'], 10)
+
+    assert _race(4, search, index.invalidate) == []
+
+
+def test_latency_is_charged_for_every_statement(tmp_path):
+    backend = pizzeria.SQLiteBackend(str(tmp_path / 'latencia.sqlite3'), latency_ms=20)
+    cnxn = backend.connect()
+    cursor = cnxn.cursor()
+    started = time.perf_counter()
+    cursor.execute("INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente) VALUES ('A', 1)")
+    cursor.execute("INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente) VALUES ('B', 1)")
+    cursor.execute("INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente) VALUES ('C', 1)")
+    cnxn.commit()
+    assert time.perf_counter() - started >= 4 * 0.020  # Ida y vuelta de tres sentencias y del commit
+    cnxn.close()
+
+
+def test_order_throughput_grows_with_workers(seeded):
+    # Con latencia de red simulada los hilos se solapan en las esperas que no retienen al
+    # único escritor de SQLite: 4 hilos deben superar con holgura a uno solo
+    backend, cnxn, cursor = seeded
+    before = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    cnxn.commit()
+    slow = pizzeria.SQLiteBackend(backend.path, latency_ms=10)
+    (one, _, rate_one, errors_one), (four, _, rate_four, errors_four) = \
+        pizzeria.run_concurrency_benchmark(slow, (1, 4), operations=40)
+    assert (one, four) == (1, 4)
+    assert errors_one == errors_four == 0
+    assert rate_four >= 1.8 * rate_one
+    assert cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval() == before + 80
+    assert set(pizzeria.verify_summaries(cursor).values()) == {0}
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import time
+from datetime import datetime
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+def test_orders_seen_by_hook_and_poll_count_once(seeded, monkeypatch):
+    backend, cnxn, cursor = seeded
+    clientes = [row[0] for row in cursor.execute("SELECT ID_Cliente FROM Cliente").fetchall()]
+    pizzas = [row[0] for row in cursor.execute("SELECT ID_Pizza FROM Pizza").fetchall()]
+    extras = [row[0] for row in cursor.execute("SELECT ID_Ingrediente FROM Ingrediente").fetchall()]
+    dashboard = pizzeria.LiveDashboard()
+    dashboard.poll(cursor)
+    cnxn.commit()
+    monkeypatch.setattr(pizzeria, 'order_listeners', [dashboard.record])
+
+    # Pedidos de esta terminal: uno por el menú y un lote por la API
+    service = pizzeria.OrderService(pizzeria.ConnectionPool(backend, size=1))
+    local = [service.create_order(clientes[0], [{'id_pizza': pizzas[0], 'cantidad': 2, 'extras': extras[:1]}])]
+    local += service.create_orders([(clientes[i], [{'id_pizza': pizzas[i], 'cantidad': 1}], '', None) for i in range(1, 4)])
+    # Pedido de otra terminal: solo lo ve el sondeo
+    other = backend.connect()
+    carrito, total = pizzeria.price_cart(other.cursor(), [{'id_pizza': pizzas[4], 'cantidad': 3}])
+    backend.insert_order(other.cursor(), clientes[4], datetime.now(), '', total, carrito)
+    other.commit()
+    other.close()
+
+    assert dashboard.minutes.totals(time.time())[0] == len(local)
+    dashboard.poll(cursor)
+    dashboard.poll(cursor)
+    orders, revenue, units, added = dashboard.minutes.totals(time.time())
+    assert orders == len(local) + 1
+    assert round(revenue, 2) == round(sum(t for _, t in local) + total, 2)
+    assert sum(units.values()) == 2 + 3 + 3 and dict(added) == {extras[0]: 1}
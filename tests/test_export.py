@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import glob
+import os
+from datetime import datetime
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+pq = pytest.importorskip('pyarrow.parquet')
+pa = pytest.importorskip('pyarrow')
+
+
+def _insert_order(cursor, id_pedido, id_detalle, pizza, extra):
+    """Pedido con ID explícito, como uno cuyo IDENTITY se confirma fuera de orden."""
+    cursor.execute("INSERT INTO Pedido (ID_Pedido, ID_Cliente, Fecha_Hora_Pedido, Direccion_Entrega_Pedido, Total_Pedido) "
+                   "VALUES (?, (SELECT MIN(ID_Cliente) FROM Cliente), ?, 'Calle 1', 14.5)",
+                   id_pedido, datetime(2025, 2, 3, 12, id_pedido % 60, 15))
+    cursor.execute("INSERT INTO DetallePedido (ID_DetallePedido, ID_Pedido, ID_Pizza_Menu, Cantidad, "
+                   "Precio_Unitario_Pizza_Personalizada, Subtotal_Detalle) VALUES (?, ?, ?, 1, 14.5, 14.5)",
+                   id_detalle, id_pedido, pizza)
+    cursor.execute("INSERT INTO Pizza_Ingrediente_Personalizado (ID_DetallePedido, ID_Ingrediente) VALUES (?, ?)",
+                   id_detalle, extra)
+
+
+def _parts(folder, table):
+    return sorted(glob.glob(os.path.join(folder, table, '0*.parquet')))  # Prefijo: marca anterior + 1
+
+
+def test_incremental_export_appends_only_new_rows(seeded, tmp_path):
+    _, cnxn, cursor = seeded
+    folder = str(tmp_path / 'exportacion')
+
+    first = pizzeria.export_tables(cursor, folder)
+    assert first['Pedido'] == cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    top_order = cursor.execute("SELECT MAX(ID_Pedido) FROM Pedido").fetchval()
+    top_line = cursor.execute("SELECT MAX(ID_DetallePedido) FROM DetallePedido").fetchval()
+    pizza = cursor.execute("SELECT MIN(ID_Pizza) FROM Pizza").fetchval()
+    extra = cursor.execute("SELECT MIN(ID_Ingrediente) FROM Ingrediente").fetchval()
+
+    # El pedido con el ID mayor se confirma antes que el anterior
+    _insert_order(cursor, top_order + 2, top_line + 2, pizza, extra)
+    cnxn.commit()
+    second = pizzeria.export_tables(cursor, folder)
+    _insert_order(cursor, top_order + 1, top_line + 1, pizza, extra)
+    cnxn.commit()
+    third = pizzeria.export_tables(cursor, folder)
+    assert [second[table] for table in ('Pedido', 'DetallePedido', 'Pizza_Ingrediente_Personalizado')] == [1, 1, 1]
+    assert [third[table] for table in ('Pedido', 'DetallePedido', 'Pizza_Ingrediente_Personalizado')] == [1, 1, 1]
+    assert pizzeria.export_tables(cursor, folder)['Pedido'] == 0
+
+    parts = [pq.read_table(path) for path in _parts(folder, 'Pedido')]
+    assert [part.num_rows for part in parts] == [first['Pedido'], 1, 1]
+    assert [part.column('ID_Pedido').to_pylist() for part in parts[1:]] == [[top_order + 2], [top_order + 1]]
+    exported = pa.concat_tables(parts)
+    assert exported.schema.field('Fecha_Hora_Pedido').type == pa.timestamp('us')
+    rows = cursor.execute("SELECT ID_Pedido, Fecha_Hora_Pedido FROM Pedido ORDER BY ID_Pedido").fetchall()
+    assert sorted(zip(exported.column('ID_Pedido').to_pylist(), exported.column('Fecha_Hora_Pedido').to_pylist())) == \
+        [(id_pedido, datetime.fromisoformat(fecha)) for id_pedido, fecha in rows]
+    for table, key in (('DetallePedido', 'ID_DetallePedido'), ('Pizza_Ingrediente_Personalizado', 'ID_DetallePedido')):
+        keys = pa.concat_tables([pq.read_table(path) for path in _parts(folder, table)]).column(key).to_pylist()
+        assert sorted(keys) == [row[0] for row in cursor.execute(f"SELECT {key} FROM {table} ORDER BY {key}").fetchall()]
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import json
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+def _ids(cursor):
+    id_cliente = cursor.execute("SELECT MIN(ID_Cliente) FROM Cliente").fetchval()
+    id_pizza = cursor.execute("SELECT MIN(ID_Pizza) FROM Pizza").fetchval()
+    return id_cliente, id_pizza
+
+
+def _import(cnxn, cursor, path, **options):
+    before = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    imported, rejected = pizzeria.import_orders(cnxn, cursor, str(path), **options)
+    after = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    assert after - before == imported
+    with open(str(path) + ".rechazos.jsonl", encoding='utf-8') as rejects:
+        reasons = {entry['registro']: entry['motivo'] for entry in map(json.loads, rejects)}
+    return imported, rejected, reasons
+
+
+def test_jsonl_bad_records_are_rejected_without_stopping(seeded, tmp_path):
+    _, cnxn, cursor = seeded
+    id_cliente, id_pizza = _ids(cursor)
+    good = {'id_cliente': id_cliente, 'items': [{'id_pizza': id_pizza, 'cantidad': 2}]}
+    lines = [
+        good,                                                                      # 1
+        5,                                                                         # 2
+        None,                                                                      # 3
+        [good],                                                                    # 4
+        {'id_cliente': id_cliente, 'items': [{'id_pizza': id_pizza, 'cantidad': 0}]},   # 5
+        {'id_cliente': id_cliente, 'items': [{'id_pizza': id_pizza, 'cantidad': ""}]},  # 6
+        {'id_cliente': id_cliente, 'items': [{'id_pizza': id_pizza}]},                  # 7
+        {'id_cliente': id_cliente, 'items': 5},                                    # 8
+        good,                                                                      # 9
+    ]
+    path = tmp_path / 'pedidos.jsonl'
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n", encoding='utf-8')
+    imported, rejected, reasons = _import(cnxn, cursor, path, commit_size=2)
+    assert (imported, rejected) == (2, 7)
+    assert sorted(reasons) == [2, 3, 4, 5, 6, 7, 8]
+    assert "objeto JSON" in reasons[2]
+    assert "Cantidad" in reasons[5]
+    assert "Falta la cantidad" in reasons[6] and "Falta la cantidad" in reasons[7]
+
+
+def test_csv_missing_quantity_is_rejected(seeded, tmp_path):
+    _, cnxn, cursor = seeded
+    id_cliente, id_pizza = _ids(cursor)
+    path = tmp_path / 'pedidos.csv'
+    path.write_text("pedido,id_cliente,fecha,direccion,id_pizza,cantidad,extras\n"
+                    f"A,{id_cliente},2024-05-01 20:00:00,Calle 1,{id_pizza},1,\n"
+                    f"B,{id_cliente},2024-05-01 20:05:00,Calle 1,{id_pizza},,\n"
+                    f"C,{id_cliente},2024-05-01 20:10:00,Calle 1,{id_pizza},0,\n", encoding='utf-8')
+    imported, rejected, reasons = _import(cnxn, cursor, path)
+    assert (imported, rejected) == (1, 2)
+    assert sorted(reasons) == [3, 4]
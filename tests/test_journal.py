@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+class Crash(Exception):
+    """El programa se cierra entre el commit en la base y la marca en el diario."""
+
+
+def test_replay_after_crash_does_not_duplicate_orders(seeded, tmp_path, monkeypatch):
+    backend, cnxn, cursor = seeded
+    before = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    clientes = [row[0] for row in cursor.execute("SELECT ID_Cliente FROM Cliente").fetchall()]
+    pizzas = [row[0] for row in cursor.execute("SELECT ID_Pizza FROM Pizza").fetchall()]
+    extras = [row[0] for row in cursor.execute("SELECT ID_Ingrediente FROM Ingrediente").fetchall()]
+    cnxn.commit()
+
+    path = str(tmp_path / 'diario.sqlite3')
+    journal = pizzeria.OrderJournal(path)
+    for i in range(6):
+        carrito, total = pizzeria.price_cart(cursor, [{'id_pizza': pizzas[i % len(pizzas)], 'cantidad': 1,
+                                                       'extras': extras[:i % 2]}])
+        journal.append(clientes[i], datetime(2025, 3, 1, 12, i), f"Calle {i}", total, carrito)
+
+    def crash(applied):
+        raise Crash()
+    monkeypatch.setattr(journal, 'mark_applied', crash)
+    flusher = pizzeria.JournalFlusher(journal, backend, batch_size=4)
+    with pytest.raises(Crash):
+        flusher.flush()
+    flusher.pool.close()
+    journal.close()
+    # El primer lote quedó confirmado en la base aunque el diario lo sigue viendo pendiente
+    assert cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval() == before + 4
+
+    journal = pizzeria.OrderJournal(path)
+    assert journal.counts() == {'pendiente': 6}
+    flusher = pizzeria.JournalFlusher(journal, backend, batch_size=4)
+    assert flusher.flush() == 6
+    flusher.stop()
+    assert journal.counts() == {'aplicado': 6}
+    journal.close()
+
+    assert cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval() == before + 6
+    assert cursor.execute("SELECT COUNT(*), COUNT(DISTINCT ID_Pedido) FROM Pedido_Clave").fetchone() == (6, 6)
+    assert set(pizzeria.verify_summaries(cursor).values()) == {0}
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+@pytest.mark.parametrize("months, years, expected", [
+    # Meses consecutivos en un solo rango
+    ([3, 1, 2], [2024], [(datetime(2024, 1, 1), datetime(2024, 4, 1))]),
+    ([1, 3], [2024], [(datetime(2024, 1, 1), datetime(2024, 2, 1)), (datetime(2024, 3, 1), datetime(2024, 4, 1))]),
+    # Diciembre termina el 1 de enero del año siguiente y se une con el enero de ese año
+    ([12], [2024], [(datetime(2024, 12, 1), datetime(2025, 1, 1))]),
+    ([12, 1], [2024, 2025], [(datetime(2024, 1, 1), datetime(2024, 2, 1)),
+                             (datetime(2024, 12, 1), datetime(2025, 2, 1)),
+                             (datetime(2025, 12, 1), datetime(2026, 1, 1))]),
+    ([11, 12, 12], [2023], [(datetime(2023, 11, 1), datetime(2024, 1, 1))]),
+])
+def test_month_ranges(months, years, expected):
+    assert pizzeria.month_ranges(months, years) == expected
+
+
+def test_search_matches_month_filter(seeded):
+    _, _, cursor = seeded
+    months = [12, 1, 6]
+    years = pizzeria.order_years(cursor)
+    rows = pizzeria.search_orders_by_date(cursor, pizzeria.month_ranges(months, years)).fetchall()
+    found = [row[0] for row in rows]
+
+    expected = [row[0] for row in cursor.execute("SELECT ID_Pedido, Fecha_Hora_Pedido FROM Pedido").fetchall()
+                if datetime.fromisoformat(row[1]).month in months]
+    assert sorted(found) == sorted(expected) and found
+    dates = [row[2] for row in rows]
+    assert dates == sorted(dates)
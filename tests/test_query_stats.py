@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import re
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+def test_prometheus_series_are_unique_for_shared_prefix():
+    stats = pizzeria.QueryStats(slow_log='')
+    prefix = "SELECT " + ", ".join(f"C{i}" for i in range(40))
+    stats.record_execute(prefix + " FROM A", 0.001)
+    stats.record_execute(prefix + " FROM B", 0.002)
+    stats.record_execute(prefix + "  FROM   A", 0.001)  # Mismo texto normalizado que el primero
+    series = [line.rsplit(' ', 1)[0] for line in stats.to_prometheus().splitlines() if not line.startswith('#')]
+    assert len(series) == len(set(series))
+    assert len({re.search(r'query="(\w+)"', line).group(1) for line in series}) == 2
+    assert sorted(s['calls'] for s in stats.snapshot()) == [1, 2]
+
+
+def test_iteration_records_fetch_once(backend):
+    stats = pizzeria.QueryStats(slow_log='')
+    cnxn = pizzeria.InstrumentedConnection(backend.connect(), stats)
+    cursor = cnxn.cursor()
+    cursor.executemany("INSERT INTO Ingrediente (Nombre_Ingrediente, Precio_Adicional_Ingrediente) VALUES (?, ?)",
+                       [(f"I{i}", 1.0) for i in range(1200)])
+    cursor.execute("SELECT ID_Ingrediente FROM Ingrediente")
+    assert len(list(cursor)) == 1200
+    entry = next(s for s in stats.snapshot() if s['sql'].startswith("SELECT ID_Ingrediente"))
+    assert entry['rows'] == 1200
+    assert sum(entry['fetch_histogram']) == 1
+    cnxn.close()
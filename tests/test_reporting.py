@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import threading
+from datetime import datetime
+
+import pytest
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+def test_sqlserver_reports_use_read_only_intent(monkeypatch):
+    backend = pizzeria.SQLServerBackend()
+    reporting = backend.reporting_backend()
+    assert reporting is not backend and reporting.read_only
+    assert "ApplicationIntent=ReadOnly" in reporting.connection_string
+    assert reporting.reporting_backend() is reporting
+    monkeypatch.setattr(pizzeria, 'REPORTING_ENABLED', False)
+    assert backend.reporting_backend() is backend
+
+
+def test_sqlite_reporting_connection_rejects_writes(seeded):
+    backend, _, _ = seeded
+    reporting = backend.reporting_backend()
+    assert reporting is not backend and reporting.read_only
+    cnxn = reporting.connect()
+    with pytest.raises(pizzeria.DB_ERRORS):
+        cnxn.cursor().execute("UPDATE Pizza SET Precio_Base_Pizza = Precio_Base_Pizza + 1")
+    cnxn.close()
+
+
+def test_open_report_does_not_block_orders(seeded):
+    backend, cnxn, cursor = seeded
+    id_cliente = cursor.execute("SELECT MIN(ID_Cliente) FROM Cliente").fetchval()
+    id_pizza, precio = cursor.execute("SELECT ID_Pizza, Precio_Base_Pizza FROM Pizza ORDER BY ID_Pizza").fetchone()
+    before = cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval()
+    cnxn.commit()
+
+    report = backend.reporting_backend().connect()
+    report_cursor = report.cursor()
+    report_cursor.execute("SELECT P.ID_Pedido FROM Pedido AS P JOIN DetallePedido AS D ON D.ID_Pedido = P.ID_Pedido")
+    report_cursor.fetchmany(1)  # El reporte queda a medio leer
+
+    outcome = {}
+
+    def write():
+        try:
+            writer = backend.connect()
+            carrito = [{'id_pizza': id_pizza, 'cantidad': 1, 'precio_unitario': precio, 'subtotal': precio, 'extras': []}]
+            outcome['id'] = pizzeria.place_order(writer, writer.cursor(), id_cliente, datetime.now(), "Prueba", precio, carrito)
+            writer.close()
+        except pizzeria.DB_ERRORS as ex:
+            outcome['error'] = ex
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "el pedido quedó bloqueado por el reporte"
+    assert 'error' not in outcome
+    report_cursor.fetchall()
+    report.close()
+    assert cursor.execute("SELECT COUNT(*) FROM Pedido").fetchval() == before + 1
+
+
+def _on_reporting_connection(cursor):
+    """True si el cursor es de la conexión de reportes: de solo lectura y rechaza escrituras."""
+    try:
+        cursor.execute("UPDATE Pizza SET Disponible = Disponible WHERE 1 = 0")
+    except pizzeria.DB_ERRORS:
+        return pizzeria.backend_for(cursor).read_only
+    return False
+
+
+def _recorder(calls, name, result=None):
+    def record(cursor, *args, **kwargs):
+        calls[name] = _on_reporting_connection(cursor)
+        return result
+    return record
+
+
+def test_menu_reads_go_through_reporting_connection(seeded, monkeypatch):
+    backend, cnxn, _ = seeded
+    cnxn.commit()
+    calls = {}
+    monkeypatch.setattr(pizzeria, 'JOURNAL_ENABLED', False)
+    monkeypatch.setattr(pizzeria, 'BRANCHES', '')
+    monkeypatch.setattr(pizzeria, 'dump_tables', _recorder(calls, 'ver_tablas'))
+    monkeypatch.setattr(pizzeria, 'run_special_queries', _recorder(calls, 'consultas'))
+    monkeypatch.setattr(pizzeria, 'create_new_order',
+                        lambda cnxn, cursor, journal: calls.setdefault('pedido', pizzeria.backend_for(cursor).read_only))
+    answers = iter(['1', '2', '.', '3', '2', '7'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    pizzeria.main(backend)
+    assert calls == {'ver_tablas': True, 'consultas': True, 'pedido': False}
+
+
+def test_service_reports_go_through_reporting_connection(seeded, monkeypatch):
+    backend, cnxn, _ = seeded
+    cnxn.commit()
+    calls = {}
+    monkeypatch.setattr(pizzeria, 'fetch_special_query', _recorder(calls, 'consulta', ([], [])))
+    monkeypatch.setattr(pizzeria, 'order_years', _recorder(calls, 'por_mes', []))
+    api = pizzeria.OrderAPI(backend, workers=1)
+    try:
+        api.service.special_query('top_clientes')
+        api.service.orders_by_month([1])
+    finally:
+        api.executor.shutdown()
+        api.pool.close()
+        api.reports_pool.close()
+    assert calls == {'consulta': True, 'por_mes': True}
+
+
+@pytest.mark.parametrize("command", [['export', '--folder', 'exportacion'], ['analytics', '--report', 'mes']])
+def test_cli_reads_go_through_reporting_connection(seeded, tmp_path, monkeypatch, command):
+    backend, cnxn, _ = seeded
+    cnxn.commit()
+    calls = {}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pizzeria, 'export_tables', _recorder(calls, 'export'))
+    monkeypatch.setattr(pizzeria.analytics, 'refresh', _recorder(calls, 'analytics', 0))
+    assert pizzeria.cli(['--backend', 'sqlite', '--sqlite-path', backend.path] + command) == 0
+    assert calls == {command[0]: True}
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+import PizzeriaDB_Evaluacion as pizzeria
+
+
+def _no_drift(cursor):
+    return set(pizzeria.verify_summaries(cursor).values()) == {0}
+
+
+def test_summaries_follow_inserts_and_deletes(seeded):
+    backend, cnxn, cursor = seeded
+    assert _no_drift(cursor)
+    clientes = [row[0] for row in cursor.execute("SELECT ID_Cliente FROM Cliente").fetchall()]
+    pizzas = [row[0] for row in cursor.execute("SELECT ID_Pizza FROM Pizza").fetchall()]
+    extras = [row[0] for row in cursor.execute("SELECT ID_Ingrediente FROM Ingrediente").fetchall()]
+    cnxn.commit()
+
+    service = pizzeria.OrderService(pizzeria.ConnectionPool(backend, size=2))
+    for i in range(30):
+        items = [{'id_pizza': pizzas[i % len(pizzas)], 'cantidad': 1, 'extras': extras[:i % 3]},
+                 {'id_pizza': pizzas[(i + 1) % len(pizzas)], 'cantidad': 2}]
+        service.create_order(clientes[i % 5], items)
+    results = service.create_orders([(clientes[-1], [{'id_pizza': pizzas[0], 'cantidad': 1, 'extras': extras[:2]}], '', None)] * 10)
+    assert all(isinstance(result, tuple) for result in results)
+    assert _no_drift(cursor)
+
+    # Borrado de pedidos: el archivado descuenta los resúmenes en la misma transacción
+    archived = pizzeria.archive_orders(cnxn, cursor, datetime.now() - timedelta(days=365), batch_size=40, pause=0)
+    assert archived > 0
+    assert _no_drift(cursor)
+
+
+def test_verify_reports_drift_and_rebuild_fixes_it(seeded):
+    _, cnxn, cursor = seeded
+    id_pedido = cursor.execute(
+        "SELECT MIN(P.ID_Pedido) FROM Pedido AS P JOIN DetallePedido AS DP ON DP.ID_Pedido = P.ID_Pedido "
+        "JOIN Pizza_Ingrediente_Personalizado AS PIP ON PIP.ID_DetallePedido = DP.ID_DetallePedido").fetchval()
+    # Borrado directo, sin pasar por el código que mantiene los resúmenes
+    cursor.execute("DELETE FROM Pizza_Ingrediente_Personalizado WHERE ID_DetallePedido IN "
+                   "(SELECT ID_DetallePedido FROM DetallePedido WHERE ID_Pedido = ?)", id_pedido)
+    cursor.execute("DELETE FROM DetallePedido WHERE ID_Pedido = ?", id_pedido)
+    cursor.execute("DELETE FROM Pedido WHERE ID_Pedido = ?", id_pedido)
+    cnxn.commit()
+
+    drift = pizzeria.verify_summaries(cursor)
+    assert all(drift[table] > 0 for table in ('Resumen_Cliente', 'Resumen_Pizza', 'Resumen_Ingrediente'))
+    assert pizzeria.rebuild_summaries(cnxn, cursor)
+    assert _no_drift(cursor)